@@ -5,17 +5,30 @@ This file sets up the Flask server and connects all the components
 Author: MAD-II Student Project
 """
 
+import os
 from flask import Flask, jsonify
 from flask_cors import CORS  # Allows frontend to talk to backend
 from flask_jwt_extended import JWTManager  # Handles user authentication
 from config import Config
 from models import db
+from utils.db_profile import init_db_profile
+from utils.query_stats import init_query_stats
+from utils.slow_queries import init_slow_query_log
+from utils.metrics import init_metrics
+from utils.profiler import init_profiler
+from utils.compression import init_compression
 
-def create_app(config_class=Config):
+def create_app(config_class=Config, resume_tasks=True):
     """
     Creates and configures the Flask application
     This is called the 'application factory' pattern
     
+    Args:
+        config_class: Settings to use
+        resume_tasks: Start local background jobs left over from the last run.
+            serve.py passes False: the app is built in the parent process before
+            the workers are forked, and the parent must not start threads.
+    
     Returns:
         Flask app instance ready to run
     """
@@ -23,14 +36,31 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
-    # Setup database connection
-    db.init_app(app)
+    # Setup database connection (with the SQLite tuning profile)
+    init_db_profile(app, db)
+    
+    # Optional SQL query counting per request (QUERY_STATS_ENABLED)
+    init_query_stats(app)
+    
+    # Optional log of slow SQL statements with their query plans
+    init_slow_query_log(app)
+    
+    # Request/DB/cache/queue metrics for Prometheus (/api/metrics)
+    init_metrics(app)
+    
+    # Optional stack sampling of slow requests (PROFILING_ENABLED)
+    init_profiler(app)
+    
+    # gzip/brotli for large JSON responses (COMPRESSION_ENABLED)
+    init_compression(app)
     
     # Enable CORS so Vue frontend can make requests
     CORS(app)
     
     # Setup JWT for token-based authentication
     jwt_manager = JWTManager(app)
+    from utils.auth_utils import init_token_scopes
+    init_token_scopes(jwt_manager)  # Stream-only tokens (see create_stream_token)
     
     # Import and register all route blueprints
     # (Importing here to avoid circular imports)
@@ -54,6 +84,11 @@ def create_app(config_class=Config):
         """Handle 500 errors (server problems)"""
         return jsonify({'error': 'Internal server error occurred'}), 500
     
+    # Pick up local background jobs left over from a previous run
+    if resume_tasks:
+        from utils.task_dispatch import resume_local_tasks
+        resume_local_tasks()
+    
     # Simple health check endpoint to test if API is running
     @app.route('/api/health', methods=['GET'])
     def health_check():
@@ -65,16 +100,18 @@ def create_app(config_class=Config):
     
     return app
 
-# Run the application
+# Run the application (development server - use serve.py in production)
 if __name__ == '__main__':
     app = create_app()
+    port = int(os.environ.get('PORT') or 5000)
     print("=" * 60)
     print("🚗 Vehicle Parking Management System Starting...")
     print("=" * 60)
-    print("Server running at: http://localhost:5000")
-    print("API endpoints available at: http://localhost:5000/api/")
-    print("Health check: http://localhost:5000/api/health")
+    print(f"Server running at: http://localhost:{port}")
+    print(f"API endpoints available at: http://localhost:{port}/api/")
+    print(f"Health check: http://localhost:{port}/api/health")
+    print("Development server - for production run: python serve.py")
     print("=" * 60)
     
     # Start the development server
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app.run(debug=True, host='0.0.0.0', port=port)
@@ -0,0 +1,351 @@
+"""
+API Load Test
+Runs the real app (create_app) on a temporary SQLite database and drives it
+from many concurrent clients with a realistic mix of requests:
+- users: browse available lots → reserve → occupy → release, and now and
+  then look at their history and current reservation
+- admins: dashboards (lots, occupancy, revenue, reservations, users)
+
+Reports throughput, p50/p95/p99 latency and SQL queries per request for each
+endpoint, and can save the results as JSON and compare against an earlier run.
+
+Student Project - Performance Testing
+Usage:
+    python benchmarks/bench_api.py --clients 16 --duration 10 --output results.json
+    python benchmarks/bench_api.py --baseline results.json --threshold 0.25
+
+Redis is used if REDIS_URL points at a running server, otherwise the app runs
+without a cache (same as in production when Redis is down).
+The exit code is 1 if --baseline is given and an endpoint got slower than
+the threshold allows or runs more queries than before.
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import time
+import platform
+from datetime import datetime
+
+# Make sure we can import from the backend folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from app import create_app
+from models import db
+from models.user import User
+from models.parking_lot import ParkingLot
+from models.parking_spot import ParkingSpot
+from utils.cache import is_redis_available, clear_all_cache
+
+PASSWORD = 'benchmark'
+ADMIN_PAGES = [
+    '/api/admin/lots',
+    '/api/admin/analytics/occupancy',
+    '/api/admin/analytics/revenue',
+    '/api/admin/analytics/popular-lots',
+    '/api/admin/reservations',
+    '/api/admin/users',
+]
+
+
+def percentile(sorted_samples, fraction):
+    """Value below which `fraction` of the samples fall (samples must be sorted)"""
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+class Recorder:
+    """Collects latency and query counts per endpoint from all client threads"""
+
+    def __init__(self):
+        self.samples = {}   # endpoint → list of (seconds, queries, status)
+        self.lock = threading.Lock()
+
+    def add(self, endpoint, seconds, queries, status):
+        with self.lock:
+            self.samples.setdefault(endpoint, []).append((seconds, queries, status))
+
+    def summary(self, duration):
+        results = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            latencies = sorted(s[0] for s in samples)
+            queries = [s[1] for s in samples if s[1] is not None]
+            errors = sum(1 for s in samples if s[2] >= 500)
+            results[endpoint] = {
+                'requests': len(samples),
+                'errors': errors,
+                'throughput_rps': round(len(samples) / duration, 2),
+                'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+                'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+                'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None
+            }
+        return results
+
+
+class Client:
+    """One simulated browser session (its own test client and login)"""
+
+    def __init__(self, app, recorder, username):
+        self.client = app.test_client()
+        self.recorder = recorder
+        self.headers = {}
+        response = self.call('POST', '/api/auth/login', json={'username': username, 'password': PASSWORD})
+        self.headers = {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+
+    def call(self, method, url, endpoint=None, **kwargs):
+        """Sends one request and records its latency and query count"""
+        start = time.perf_counter()
+        response = self.client.open(url, method=method, headers=self.headers, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        query_count = response.headers.get('X-Query-Count')
+        self.recorder.add(f'{method} {endpoint or url}', elapsed,
+                          int(query_count) if query_count is not None else None, response.status_code)
+        return response
+
+
+def user_session(client, lot_ids):
+    """Browse → reserve → occupy → release, sometimes checking history"""
+    response = client.call('GET', '/api/user/lots/available')
+    lots = response.get_json().get('lots') or []
+    lot_id = random.choice(lots)['id'] if lots else random.choice(lot_ids)
+
+    response = client.call('POST', '/api/user/reserve', json={'lot_id': lot_id})
+    if response.status_code == 201:
+        reservation_id = response.get_json()['reservation']['id']
+        client.call('POST', f'/api/user/occupy/{reservation_id}', endpoint='/api/user/occupy/<id>')
+        client.call('GET', '/api/user/current')
+        client.call('POST', f'/api/user/release/{reservation_id}', endpoint='/api/user/release/<id>')
+
+    if random.random() < 0.3:
+        client.call('GET', '/api/user/reservations')
+    if random.random() < 0.1:
+        client.call('GET', '/api/user/analytics/spending')
+
+
+def admin_session(client, lot_ids):
+    """An admin clicking through the dashboard"""
+    for page in random.sample(ADMIN_PAGES, 3):
+        client.call('GET', page)
+
+
+def create_benchmark_app(directory):
+    """The real app on a temporary database, with query counting on"""
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(directory, 'bench.db')
+        SQLALCHEMY_BINDS = {}
+        SQLALCHEMY_REPLICA_URI = None
+        TASK_BACKEND = 'local'
+        LOCAL_TASK_QUEUE_PATH = os.path.join(directory, 'tasks.db')
+        QUERY_STATS_ENABLED = True
+        QUERY_REPEAT_THRESHOLD = 1000  # Don't flood the output with N+1 warnings
+        RATE_LIMIT_ENABLED = False  # Every simulated user reserves over and over from one IP
+
+    return create_app(BenchmarkConfig)
+
+
+def seed(app, number_of_users, number_of_admins, number_of_lots, spots_per_lot):
+    """Creates the users and lots the clients will use"""
+    with app.app_context():
+        db.create_all()
+
+        # Hash the password once - hashing is slow on purpose
+        template = User(username='template', email='template@example.com')
+        template.set_password(PASSWORD)
+
+        for i in range(number_of_admins):
+            db.session.add(User(username=f'admin{i}', email=f'admin{i}@example.com',
+                                role='admin', password_hash=template.password_hash))
+        for i in range(number_of_users):
+            db.session.add(User(username=f'user{i}', email=f'user{i}@example.com',
+                                role='user', password_hash=template.password_hash))
+
+        lot_ids = []
+        for i in range(number_of_lots):
+            lot = ParkingLot(prime_location_name=f'Benchmark Lot {i}', price_per_hour=40.0 + i,
+                             address=f'{i} Benchmark Road', pin_code='110001',
+                             number_of_spots=spots_per_lot)
+            db.session.add(lot)
+            db.session.flush()
+            db.session.add_all(ParkingSpot(lot_id=lot.id, spot_number=n) for n in range(1, spots_per_lot + 1))
+            lot_ids.append(lot.id)
+        db.session.commit()
+        return lot_ids
+
+
+def run_load_test(clients=16, duration=10.0, admin_every=8, lots=10, spots_per_lot=50, seed_value=42):
+    """
+    Runs the load test and returns the results dictionary
+
+    Args:
+        clients: Number of concurrent clients
+        duration: Seconds to run
+        admin_every: One in this many clients is an admin
+        lots, spots_per_lot: Size of the seeded data
+    """
+    random.seed(seed_value)
+    number_of_admins = max(1, clients // admin_every)
+    number_of_users = clients - number_of_admins
+
+    directory = tempfile.mkdtemp()
+    try:
+        app = create_benchmark_app(directory)
+        lot_ids = seed(app, number_of_users, number_of_admins, lots, spots_per_lot)
+        if is_redis_available():
+            clear_all_cache()
+
+        recorder = Recorder()
+        sessions = [('admin', f'admin{i}') for i in range(number_of_admins)]
+        sessions += [('user', f'user{i}') for i in range(number_of_users)]
+
+        ready = threading.Barrier(len(sessions) + 1)  # Everyone has logged in
+        go = threading.Event()
+        stop_at = [0.0]
+        failures = []
+
+        def worker(role, username):
+            try:
+                client = Client(app, recorder, username)
+                session = admin_session if role == 'admin' else user_session
+                ready.wait()
+                go.wait()
+                while time.perf_counter() < stop_at[0]:
+                    session(client, lot_ids)
+            except threading.BrokenBarrierError:
+                pass
+            except Exception as e:
+                failures.append(f'{username}: {e!r}')
+                ready.abort()
+
+        threads = [threading.Thread(target=worker, args=session) for session in sessions]
+        for thread in threads:
+            thread.start()
+
+        # Start the clock once every client has logged in (logins are not measured)
+        try:
+            ready.wait()
+            recorder.samples.clear()
+        except threading.BrokenBarrierError:
+            pass
+        stop_at[0] = time.perf_counter() + duration
+        go.set()
+        for thread in threads:
+            thread.join()
+        if failures:
+            raise RuntimeError('Client failed: ' + '; '.join(failures))
+
+        with app.app_context():
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    endpoints = recorder.summary(duration)
+    total_requests = sum(e['requests'] for e in endpoints.values())
+    return {
+        'created_at': datetime.utcnow().isoformat(),
+        'settings': {
+            'clients': clients, 'admins': number_of_admins, 'duration_s': duration,
+            'lots': lots, 'spots_per_lot': spots_per_lot,
+            'sqlite_profile': Config.SQLITE_PROFILE, 'redis': is_redis_available(),
+            'python': platform.python_version()
+        },
+        'total': {
+            'requests': total_requests,
+            'errors': sum(e['errors'] for e in endpoints.values()),
+            'throughput_rps': round(total_requests / duration, 2)
+        },
+        'endpoints': endpoints
+    }
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """
+    Finds endpoints that got worse than the baseline run
+
+    An endpoint regresses if its p95 latency grew by more than `threshold`
+    (0.25 = 25%), its throughput dropped by more than `threshold`, or it
+    now runs more SQL queries per request.
+
+    Returns:
+        List of regression messages (empty if all is fine)
+    """
+    regressions = []
+    for endpoint, old in baseline.get('endpoints', {}).items():
+        new = results['endpoints'].get(endpoint)
+        if new is None:
+            continue
+        if old['p95_ms'] and new['p95_ms'] > old['p95_ms'] * (1 + threshold):
+            regressions.append(f"{endpoint}: p95 {old['p95_ms']} → {new['p95_ms']} ms")
+        if old['throughput_rps'] and new['throughput_rps'] < old['throughput_rps'] * (1 - threshold):
+            regressions.append(f"{endpoint}: throughput {old['throughput_rps']} → {new['throughput_rps']} req/s")
+        if (old.get('queries_per_request') is not None and new.get('queries_per_request') is not None
+                and new['queries_per_request'] > old['queries_per_request'] + 0.5):
+            regressions.append(
+                f"{endpoint}: queries/request {old['queries_per_request']} → {new['queries_per_request']}"
+            )
+    return regressions
+
+
+def print_results(results):
+    settings = results['settings']
+    print("\n" + "=" * 96)
+    print(f"🚗 API LOAD TEST ({settings['clients']} clients, {settings['duration_s']}s, "
+          f"redis={'on' if settings['redis'] else 'off'}, profile={settings['sqlite_profile']})")
+    print("=" * 96)
+    print(f"  {'endpoint':<44} {'reqs':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+    for endpoint, stats in results['endpoints'].items():
+        queries = stats['queries_per_request']
+        print(f"  {endpoint:<44} {stats['requests']:>6} {stats['throughput_rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+              f"{queries if queries is not None else '-':>8}")
+    total = results['total']
+    print("-" * 96)
+    print(f"  Total: {total['requests']} requests, {total['throughput_rps']} req/s, {total['errors']} errors (5xx)")
+    print("=" * 96 + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test for the parking API')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to run')
+    parser.add_argument('--admin-every', type=int, default=8, help='One in N clients is an admin')
+    parser.add_argument('--lots', type=int, default=10)
+    parser.add_argument('--spots-per-lot', type=int, default=50)
+    parser.add_argument('--output', help='Save results to this JSON file')
+    parser.add_argument('--baseline', help='Earlier results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed slowdown before a run counts as a regression (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    results = run_load_test(args.clients, args.duration, args.admin_every, args.lots, args.spots_per_lot)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"✗ {len(regressions)} regressions against {args.baseline}:")
+            for message in regressions:
+                print(f"  - {message}")
+            return 1
+        print(f"✓ No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
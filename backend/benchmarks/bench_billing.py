@@ -0,0 +1,135 @@
+"""
+Bulk Billing Benchmark
+Reprices every reservation with utils/billing.py, checks the costs are
+exactly what Reservation.calculate_cost gives, and compares the time with
+repricing one object at a time
+
+Student Project - Performance Testing
+Usage: python benchmarks/bench_billing.py [reservations]   (default: 1000000)
+Every 10th lot gets a tariff (peak and night bands, a daily cap) and every
+5th reservation an occupancy surcharge, so all pricing paths are used.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+from datetime import date
+
+# Make sure we can import from the backend folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import text, select, func
+from config import Config
+from models import db
+from models.parking_lot import ParkingLot
+from models.reservation import Reservation
+from models.lot_tariff import LotTariff
+from models.invoice import Invoice
+from utils.db_profile import init_db_profile
+from utils.data_generator import generate_synthetic_data
+from utils.pricing import get_tariffs, get_tariff
+from utils.billing import load_stays, compute_costs, rebill_reservations, generate_invoices
+
+DEFAULT_RESERVATIONS = 1000000
+LOTS = 1000
+SAMPLE = 20000  # Reservations checked (and timed) one object at a time
+
+
+def create_benchmark_app(database_path):
+    """Minimal app (database only)"""
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + database_path
+        SQLALCHEMY_BINDS = {}
+
+    app = Flask(__name__)
+    app.config.from_object(BenchmarkConfig)
+    init_db_profile(app, db)
+    return app
+
+
+def add_tariffs():
+    """Tariff on every 10th lot, surcharge on every 5th reservation"""
+    for lot_id in db.session.execute(select(ParkingLot.id).where(ParkingLot.id % 10 == 0)).scalars():
+        db.session.add(LotTariff(
+            lot_id=lot_id,
+            bands=[{'start': 8, 'end': 11, 'multiplier': 1.5}, {'start': 22, 'end': 6, 'multiplier': 0.6}],
+            occupancy_multipliers=[{'min_occupancy': 0.8, 'multiplier': 1.25}],
+            daily_cap=400 if lot_id % 20 == 0 else None
+        ))
+    db.session.commit()
+    with db.engine.begin() as conn:
+        conn.execute(text('UPDATE reservations SET price_multiplier = 1.25 WHERE id % 5 = 0'))
+
+
+def one_at_a_time(reservation_ids):
+    """The old way: load each reservation and call calculate_cost"""
+    costs = {}
+    for reservation in Reservation.query.filter(Reservation.id.in_(reservation_ids)).all():
+        lot = reservation.spot.lot
+        costs[reservation.id] = reservation.calculate_cost(lot.price_per_hour, get_tariff(lot.id))
+    return costs
+
+
+def main():
+    reservations = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RESERVATIONS
+    directory = tempfile.mkdtemp()
+    try:
+        app = create_benchmark_app(os.path.join(directory, 'billing.db'))
+        with app.app_context():
+            db.create_all()
+            print("\n" + "=" * 70)
+            print(f"🧾 BULK BILLING BENCHMARK - {reservations:,} reservations, {LOTS:,} lots")
+            print("=" * 70)
+            print("  Seeding...")
+            generate_synthetic_data(db, lots=LOTS, spots_per_lot=20, users=5000, reservations=reservations,
+                                    months=6, seed=3, end_date=date(2026, 10, 1))
+            add_tariffs()
+
+            # --- Same cost as calculate_cost, for a random sample ---
+            stays = load_stays()
+            costs = compute_costs(stays, dict(db.session.execute(
+                select(ParkingLot.id, ParkingLot.price_per_hour)).all()), get_tariffs())
+            sample = random.Random(1).sample(range(len(costs)), min(SAMPLE, len(costs)))
+            sample_ids = [int(stays['id'][i]) for i in sample]
+
+            start = time.perf_counter()
+            expected = one_at_a_time(sample_ids)
+            old_ms_per_row = (time.perf_counter() - start) * 1000 / len(sample_ids)
+
+            mismatches = sum(expected[int(stays['id'][i])] != float(costs[i]) for i in sample)
+            print(f"\n  {'✓' if not mismatches else '✗'} Bulk costs equal calculate_cost for "
+                  f"{len(sample) - mismatches:,}/{len(sample):,} sampled reservations")
+
+            # --- Full re-billing (load, price, write the changed costs) ---
+            result = rebill_reservations()
+            total_s = sum(result['timings'].values())
+            print(f"\n  {'Re-bill all reservations':<40}{'time':>12}")
+            print(f"  {'Bulk (NumPy + batched UPDATEs)':<40}{total_s:>11.2f}s  {result['timings']}")
+            print(f"  {'One object at a time (estimated)':<40}{old_ms_per_row * len(costs) / 1000:>11.2f}s"
+                  f"  ({old_ms_per_row:.3f}ms per reservation, no writes)")
+            print(f"  {result['changed']:,} costs changed (surcharges and tariffs added after seeding)")
+
+            again = rebill_reservations()
+            print(f"  Second run: {again['changed']} changed (nothing left to write)")
+
+            # --- Invoices for the last month ---
+            start = time.perf_counter()
+            invoices = generate_invoices('2026-09')
+            invoice_s = time.perf_counter() - start
+            stored = db.session.query(func.coalesce(func.sum(Invoice.total_amount), 0.0)).scalar()
+            print(f"\n  Invoices for 2026-09: {invoices['invoices']:,} users, {invoices['parkings']:,} "
+                  f"parkings in {invoice_s:.2f}s (₹{invoices['total_amount']:,.2f}, stored ₹{stored:,.2f})")
+
+            db.session.remove()
+            db.engine.dispose()
+        print("=" * 70 + "\n")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Occupancy Forecast Benchmark
+Times the nightly forecast fit (utils/forecasting.py) and checks how good
+it is: the model is fitted on the history up to one week before the end,
+then compared with what really happened in that last week
+
+Student Project - Performance Testing
+Usage: python benchmarks/bench_forecast.py [reservations]   (default: 1000000)
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+import numpy as np
+
+# Make sure we can import from the backend folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from config import Config
+from models import db
+from models.lot_forecast import LotForecast
+from utils.db_profile import init_db_profile
+from utils.data_generator import generate_synthetic_data
+from utils.forecasting import fit_forecasts, save_forecasts, upcoming_hours, occupied_spot_hours
+
+DEFAULT_RESERVATIONS = 1000000
+LOTS = 200
+END = date(2026, 10, 1)
+
+
+def create_benchmark_app(database_path):
+    """Minimal app (database only)"""
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + database_path
+        SQLALCHEMY_BINDS = {}
+
+    app = Flask(__name__)
+    app.config.from_object(BenchmarkConfig)
+    init_db_profile(app, db)
+    return app
+
+
+def mean_error(predicted, actual, lot_ids):
+    """Mean absolute error in percentage points over all lots and hours"""
+    errors = [np.abs(predicted[lot_id] - actual[lot_id]) for lot_id in lot_ids]
+    return float(np.mean(errors)) * 100
+
+
+def check_sparse_history():
+    """
+    Spot-hours are right when there is little or no history (the synthetic
+    data is dense, so the fit above never sees these cases)
+    """
+    # One stay 9:40 → 11:10: 20 min + a full hour + 10 min
+    used = occupied_spot_hours(np.array([0]), np.array([9 + 40 / 60]), np.array([11 + 10 / 60]), 1, 24)
+    expected = np.zeros((1, 24))
+    expected[0, 9:12] = [20 / 60, 1, 10 / 60]
+    assert np.allclose(used, expected), used[0, 8:13]
+
+    # No stays at all (a fresh install)
+    empty = np.array([], dtype=np.float64)
+    used = occupied_spot_hours(np.array([], dtype=np.int64), empty, empty, 2, 24)
+    assert used.dtype == np.float64 and not used.any()
+    print("  ✓ One multi-hour stay and no stays give the right spot-hours")
+
+
+def main():
+    reservations = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RESERVATIONS
+    directory = tempfile.mkdtemp()
+    try:
+        app = create_benchmark_app(os.path.join(directory, 'forecast.db'))
+        with app.app_context():
+            db.create_all()
+            print("\n" + "=" * 70)
+            print(f"📈 OCCUPANCY FORECAST BENCHMARK - {reservations:,} reservations, {LOTS} lots")
+            print("=" * 70)
+            check_sparse_history()
+            print("  Seeding...")
+            generate_synthetic_data(db, lots=LOTS, spots_per_lot=10, users=5000, reservations=reservations,
+                                    months=6, seed=11, end_date=END)
+
+            end = datetime(END.year, END.month, END.day)
+            cutoff = end - timedelta(weeks=1)
+
+            start = time.perf_counter()
+            fitted = fit_forecasts(now=cutoff)
+            fit_s = time.perf_counter() - start
+            start = time.perf_counter()
+            save_forecasts(fitted)
+            save_s = time.perf_counter() - start
+            print(f"\n  Fit {len(fitted)} lots from 8 weeks of history: {fit_s:.2f}s, save {save_s * 1000:.0f}ms")
+
+            forecast = db.session.get(LotForecast, next(iter(fitted)))
+            start = time.perf_counter()
+            for _ in range(1000):
+                upcoming_hours(forecast, 10, 72)
+            print(f"  Read 72 hours from a saved profile: {(time.perf_counter() - start):.3f}ms per request")
+
+            # What happened in the held-out week (one week, no smoothing = the week itself)
+            actual = {lot_id: profile for lot_id, (profile, _) in fit_forecasts(now=end, weeks=1, alpha=1).items()}
+            last_week = {lot_id: profile for lot_id, (profile, _) in
+                         fit_forecasts(now=cutoff, weeks=1, alpha=1).items()}
+            model = {lot_id: profile for lot_id, (profile, _) in fitted.items()}
+            flat = {lot_id: np.full_like(profile, profile.mean()) for lot_id, profile in model.items()}
+            lot_ids = sorted(set(actual) & set(model) & set(last_week))
+
+            print(f"\n  {'Held-out week, mean error per lot-hour':<44}{'error':>10}")
+            print(f"  {'Hour-of-week profile, smoothed (this model)':<44}{mean_error(model, actual, lot_ids):>8.2f}pp")
+            print(f"  {'Same hour last week':<44}{mean_error(last_week, actual, lot_ids):>8.2f}pp")
+            print(f"  {'Each lot at its average occupancy':<44}{mean_error(flat, actual, lot_ids):>8.2f}pp")
+            busiest = np.mean([actual[lot_id].max() for lot_id in lot_ids]) * 100
+            print(f"  (average peak occupancy in that week: {busiest:.0f}%)")
+
+            db.session.remove()
+            db.engine.dispose()
+        print("=" * 70 + "\n")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Lot Search Benchmark
+Times GET /api/user/lots/search style queries (utils/lot_search.py) on a
+large number of lots, next to the old way: load every lot with its spot
+counts and filter in Python
+
+Student Project - Performance Testing
+Usage: python benchmarks/bench_lot_search.py [lots]   (default: 100000)
+Every lot gets 10 spots; every 3rd spot is occupied.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from datetime import date
+
+# Make sure we can import from the backend folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import text
+from config import Config
+from models import db
+from utils.db_profile import init_db_profile
+from utils.data_generator import generate_synthetic_data
+from utils.serializers import serialize_lots
+from utils.lot_search import search_lots
+
+DEFAULT_LOTS = 100000
+RUNS = 5
+
+# (label, search_lots() arguments, the same filter in Python for the old way)
+SEARCHES = [
+    ('words "central pl"', {'q': 'central pl'},
+     lambda lot: 'central' in lot['prime_location_name'].lower() and ' pl' in lot['prime_location_name'].lower()),
+    ('pin prefix 11004', {'pin_code': '11004'},
+     lambda lot: lot['pin_code'].startswith('11004')),
+    ('price 40-50, 7+ free', {'min_price': 40, 'max_price': 50, 'min_available': 7},
+     lambda lot: 40 <= lot['price_per_hour'] <= 50 and lot['available_spots'] >= 7),
+    ('words + pin + price', {'q': 'mall', 'pin_code': '1100', 'max_price': 60},
+     lambda lot: 'mall' in lot['prime_location_name'].lower() and lot['pin_code'].startswith('1100')
+     and lot['price_per_hour'] <= 60),
+    ('most free, page 200', {'sort': 'available', 'descending': True, 'page': 200},
+     lambda lot: True),
+]
+
+
+def create_benchmark_app(database_path):
+    """Minimal app (database only)"""
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + database_path
+        SQLALCHEMY_BINDS = {}
+
+    app = Flask(__name__)
+    app.config.from_object(BenchmarkConfig)
+    init_db_profile(app, db)
+    return app
+
+
+def best_time(fn):
+    """Best of RUNS calls, in milliseconds, and the last result"""
+    best, result = None, None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    lots = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LOTS
+    directory = tempfile.mkdtemp()
+    try:
+        app = create_benchmark_app(os.path.join(directory, 'search.db'))
+        with app.app_context():
+            db.create_all()
+            print("\n" + "=" * 70)
+            print(f"🔎 LOT SEARCH BENCHMARK - {lots:,} lots (best of {RUNS} runs)")
+            print("=" * 70)
+            print("  Seeding...")
+            generate_synthetic_data(db, lots=lots, spots_per_lot=10, users=10, reservations=0,
+                                    months=1, seed=7, end_date=date(2026, 10, 1))
+            with db.engine.begin() as conn:
+                conn.execute(text("UPDATE parking_spots SET status = 'occupied' WHERE id % 3 = 0"))
+                mismatched = conn.execute(text(
+                    "SELECT COUNT(*) FROM parking_lots WHERE available_spots != (SELECT COUNT(*) "
+                    "FROM parking_spots WHERE lot_id = parking_lots.id AND status = 'available')"
+                )).scalar()
+            print(f"  {'✓' if mismatched == 0 else '✗'} available_spots matches the spots "
+                  f"({mismatched} lots differ)\n")
+
+            old_time, all_lots = best_time(lambda: serialize_lots())
+            print(f"  Old way - load all {len(all_lots):,} lots with counts: {old_time:.0f}ms "
+                  f"(before any filtering)\n")
+
+            print(f"  {'search':<24}{'matches':>10}{'index':>12}{'old way':>12}")
+            for label, arguments, keep in SEARCHES:
+                search_time, (page, total) = best_time(lambda: search_lots(**arguments))
+                filter_time, _ = best_time(lambda: [lot for lot in serialize_lots() if keep(lot)])
+                print(f"  {label:<24}{total:>10,}{search_time:>10.1f}ms{filter_time:>10.0f}ms")
+
+            db.session.remove()
+            db.engine.dispose()
+        print("=" * 70 + "\n")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Email Throughput Benchmark
+Compares one-SMTP-connection-per-email against the pooled Mailer
+
+Student Project - Performance Testing
+Usage: python benchmarks/bench_mailer.py [number_of_messages]
+"""
+
+import os
+import sys
+import time
+import smtplib
+
+# Make sure we can import from the backend folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.mailer import build_message, create_mailer
+from utils.smtp_sink import LocalSMTPSink
+
+
+def send_one_connection_per_message(sink, messages):
+    """The naive way: connect, send, quit for every single email"""
+    for message in messages:
+        connection = smtplib.SMTP(sink.host, sink.port)
+        connection.send_message(message)
+        connection.quit()
+
+
+def send_pooled(sink, messages):
+    """The pooled Mailer used by tasks.py"""
+    mailer = create_mailer({'MAIL_SERVER': sink.host, 'MAIL_PORT': sink.port, 'MAIL_POOL_SIZE': 1})
+    result = mailer.send_batch(messages)
+    mailer.pool.close_all()
+    return result
+
+
+def run_benchmark(count=2000):
+    messages = [
+        build_message(f'user{i}@example.com', 'We miss you!', f'Hi user{i}! Check out available parking spots!')
+        for i in range(count)
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"📧 EMAIL THROUGHPUT BENCHMARK ({count} messages)")
+    print("=" * 60)
+
+    results = {}
+    for name, send in [('connection per message', send_one_connection_per_message),
+                       ('pooled mailer', send_pooled)]:
+        with LocalSMTPSink(keep_messages=False) as sink:
+            start = time.perf_counter()
+            send(sink, messages)
+            elapsed = time.perf_counter() - start
+            results[name] = count / elapsed
+            print(f"  {name:<25} {results[name]:>10.1f} msg/s   "
+                  f"({sink.connections} connections, {sink.message_count} received)")
+
+    speedup = results['pooled mailer'] / results['connection per message']
+    print(f"\n  Speedup: {speedup:.1f}x")
+    print("=" * 60 + "\n")
+    return results
+
+
+if __name__ == '__main__':
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,128 @@
+"""
+Nearby Lots Benchmark
+Times the k-d tree in utils/geo_index.py against checking the distance to
+every lot, and checks both find the same lots
+
+Student Project - Performance Testing
+Usage: python benchmarks/bench_nearby.py [lots]   (default: 100000)
+Lots are generated around the city centre like `init_db.py --synthetic`;
+every 3rd spot is occupied and every 7th lot is full.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from datetime import date
+import numpy as np
+
+# Make sure we can import from the backend folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import text, select
+from config import Config
+from models import db
+from models.parking_lot import ParkingLot
+from utils.db_profile import init_db_profile
+from utils.data_generator import generate_synthetic_data, CITY_CENTER
+from utils.geo_index import SpatialIndex, find_nearest_available, get_spatial_index, EARTH_RADIUS_KM
+from utils.serializers import serialize_lots
+
+DEFAULT_LOTS = 100000
+QUERIES = 200
+K = 10
+
+
+def create_benchmark_app(database_path):
+    """Minimal app (database only)"""
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + database_path
+        SQLALCHEMY_BINDS = {}
+
+    app = Flask(__name__)
+    app.config.from_object(BenchmarkConfig)
+    init_db_profile(app, db)
+    return app
+
+
+def brute_force(latitudes, longitudes, lot_ids, latitude, longitude, k):
+    """Haversine distance to every lot (NumPy), k smallest"""
+    lat, lon = np.radians(latitudes), np.radians(longitudes)
+    qlat, qlon = np.radians(latitude), np.radians(longitude)
+    h = np.sin((lat - qlat) / 2) ** 2 + np.cos(lat) * np.cos(qlat) * np.sin((lon - qlon) / 2) ** 2
+    distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))
+    nearest = np.argpartition(distances, k)[:k]
+    return lot_ids[nearest[np.argsort(distances[nearest])]].tolist()
+
+
+def per_query_ms(fn, queries):
+    start = time.perf_counter()
+    results = [fn(latitude, longitude) for latitude, longitude in queries]
+    return (time.perf_counter() - start) * 1000 / len(queries), results
+
+
+def main():
+    lots = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LOTS
+    directory = tempfile.mkdtemp()
+    try:
+        app = create_benchmark_app(os.path.join(directory, 'nearby.db'))
+        with app.app_context():
+            db.create_all()
+            print("\n" + "=" * 70)
+            print(f"📍 NEARBY LOTS BENCHMARK - {lots:,} lots, {QUERIES} searches, k={K}")
+            print("=" * 70)
+            print("  Seeding...")
+            generate_synthetic_data(db, lots=lots, spots_per_lot=10, users=10, reservations=0,
+                                    months=1, seed=7, end_date=date(2026, 10, 1))
+            with db.engine.begin() as conn:
+                conn.execute(text("UPDATE parking_spots SET status = 'occupied' WHERE id % 3 = 0 OR lot_id % 7 = 0"))
+
+            rows = db.session.execute(select(ParkingLot.id, ParkingLot.latitude, ParkingLot.longitude)).all()
+            lot_ids = np.array([row[0] for row in rows])
+            latitudes = np.array([row[1] for row in rows])
+            longitudes = np.array([row[2] for row in rows])
+
+            start = time.perf_counter()
+            index = SpatialIndex(lot_ids, latitudes, longitudes)
+            print(f"  Build k-d tree: {(time.perf_counter() - start) * 1000:.0f}ms\n")
+
+            rng = np.random.default_rng(1)
+            queries = list(zip((CITY_CENTER[0] + rng.normal(0, 0.1, QUERIES)).tolist(),
+                               (CITY_CENTER[1] + rng.normal(0, 0.1, QUERIES)).tolist()))
+
+            def tree(latitude, longitude):
+                nearest = index.iter_nearest(latitude, longitude)
+                return [lot_id for _, lot_id in (next(nearest) for _ in range(K))]
+
+            tree_ms, tree_results = per_query_ms(tree, queries)
+            brute_ms, brute_results = per_query_ms(
+                lambda latitude, longitude: brute_force(latitudes, longitudes, lot_ids, latitude, longitude, K),
+                queries)
+            same = sum(a == b for a, b in zip(tree_results, brute_results))
+            print(f"  {'k nearest lots (no availability)':<42}{'per search':>12}")
+            print(f"  {'k-d tree':<42}{tree_ms:>10.3f}ms")
+            print(f"  {'NumPy distance to every lot':<42}{brute_ms:>10.3f}ms")
+            print(f"  {'✓' if same == QUERIES else '✗'} Same lots in {same}/{QUERIES} searches\n")
+
+            get_spatial_index()  # Built once per process
+            full_ms, _ = per_query_ms(lambda latitude, longitude: find_nearest_available(latitude, longitude, K),
+                                      queries)
+            start = time.perf_counter()
+            all_lots = serialize_lots(only_available=True)
+            old_ms = (time.perf_counter() - start) * 1000
+            print(f"  {'k nearest lots with a free spot':<42}{'per search':>12}")
+            print(f"  {'find_nearest_available (tree + counts)':<42}{full_ms:>10.3f}ms")
+            print(f"  {'Old way: load all lots, then measure':<42}{old_ms:>10.0f}ms"
+                  f"  ({len(all_lots):,} lots, before any distance)")
+
+            db.session.remove()
+            db.engine.dispose()
+        print("=" * 70 + "\n")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Serializer Benchmark
+Compares the old way of building list responses (load ORM objects, call
+to_dict() on each, jsonify) with utils/serializers.py (selected columns as
+tuples, encoded by orjson or the standard json module)
+
+Student Project - Performance Testing
+Usage: python benchmarks/bench_serializers.py [rows ...]   (default: 10000 100000)
+For each size it creates that many spots, users and reservations with the
+synthetic data generator, checks both paths give the same JSON, and prints
+the best time of a few runs.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+from datetime import date
+
+# Make sure we can import from the backend folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+from sqlalchemy import text
+from sqlalchemy.orm import joinedload
+from config import Config
+from models import db
+from models.user import User
+from models.parking_spot import ParkingSpot
+from models.reservation import Reservation
+from utils.db_profile import init_db_profile
+from utils.data_generator import generate_synthetic_data
+from utils.archive import reservations_query
+from utils import serializers
+
+DEFAULT_SIZES = [10000, 100000]
+RUNS = 3
+
+
+def create_benchmark_app(database_path):
+    """Minimal app (database only)"""
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + database_path
+        SQLALCHEMY_BINDS = {}
+
+    app = Flask(__name__)
+    app.config.from_object(BenchmarkConfig)
+    init_db_profile(app, db)
+    return app
+
+
+def seed(rows):
+    """About `rows` spots, users and reservations; every 50th spot is occupied"""
+    generate_synthetic_data(db, lots=max(1, rows // 100), spots_per_lot=100, users=rows,
+                            reservations=rows, months=6, seed=7, end_date=date(2026, 10, 1))
+    with db.engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO reservations (spot_id, user_id, reserved_at, parking_timestamp, status) "
+            "SELECT id, (id % :users) + 1, '2026-10-01 09:00:00.000000', '2026-10-01 09:05:00.000000', 'active' "
+            "FROM parking_spots WHERE id % 50 = 0"
+        ), {'users': rows})
+        conn.execute(text("UPDATE parking_spots SET status = 'occupied' WHERE id % 50 = 0"))
+
+
+# ============================================================================
+# OLD PATH: ORM objects + to_dict() + jsonify
+# ============================================================================
+
+def spots_with_to_dict():
+    spots = ParkingSpot.query.all()
+    active = {res.spot_id: res for res in Reservation.query.filter_by(status='active').all()}
+    spots_data = []
+    for spot in spots:
+        spot_data = spot.to_dict()
+        if spot.id in active:
+            spot_data['current_reservation'] = active[spot.id].to_dict()
+        spots_data.append(spot_data)
+    return jsonify({'spots': spots_data, 'total': len(spots_data)}).get_data()
+
+
+def users_with_to_dict():
+    users = User.query.filter_by(role='user').all()
+    live_counts = {}
+    for user_id, status, count in db.session.query(
+        Reservation.user_id, Reservation.status, db.func.count(Reservation.id)
+    ).group_by(Reservation.user_id, Reservation.status).all():
+        live_counts.setdefault(user_id, {})[status] = count
+    users_data = []
+    for user in users:
+        counts = live_counts.get(user.id, {})
+        user_dict = user.to_dict(include_sensitive=True)
+        user_dict['total_reservations'] = sum(counts.values())
+        user_dict['active_reservations'] = counts.get('active', 0)
+        user_dict['completed_reservations'] = counts.get('completed', 0)
+        users_data.append(user_dict)
+    return jsonify({'users': users_data, 'total': len(users_data)}).get_data()
+
+
+def reservations_with_to_dict():
+    # Eager loading, so this measures serialization and not the N+1 lazy loads
+    reservations = Reservation.query.options(
+        joinedload(Reservation.spot).joinedload(ParkingSpot.lot), joinedload(Reservation.user)
+    ).order_by(Reservation.reserved_at.desc(), Reservation.id.desc()).all()
+    data = [res.to_dict(include_full_details=True) for res in reservations]
+    return jsonify({'reservations': data, 'total': len(data)}).get_data()
+
+
+# ============================================================================
+# NEW PATH: utils/serializers.py
+# ============================================================================
+
+def spots_with_serializer():
+    spots = serializers.serialize_spots()
+    return serializers.dumps({'spots': spots, 'total': len(spots)})
+
+
+def users_with_serializer():
+    users = serializers.serialize_users()
+    return serializers.dumps({'users': users, 'total': len(users)})
+
+
+def reservations_with_serializer():
+    rows = reservations_query(include_archive=False)
+    result = db.session.execute(db.select(rows).order_by(rows.c.reserved_at.desc(), rows.c.id.desc())).all()
+    data = serializers.serialize_reservation_rows(result)
+    return serializers.dumps({'reservations': data, 'total': len(data)})
+
+
+LISTS = [
+    ('spots', spots_with_to_dict, spots_with_serializer),
+    ('users', users_with_to_dict, users_with_serializer),
+    ('reservations', reservations_with_to_dict, reservations_with_serializer),
+]
+
+
+def best_time(fn):
+    """Best of RUNS runs, each with an empty session (nothing cached in the identity map)"""
+    best, output = None, None
+    for _ in range(RUNS):
+        db.session.remove()
+        started = time.perf_counter()
+        output = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+
+def same_json(old_output, new_output, key):
+    """Both responses have the same items (compared on the keys the old one has)"""
+    old_items = json.loads(old_output)[key]
+    new_items = json.loads(new_output)[key]
+    if len(old_items) != len(new_items):
+        return False
+    return all(new.get(name, 'missing') == value
+               for old, new in zip(old_items, new_items)
+               for name, value in old.items() if name != 'username')
+
+
+def run_size(rows):
+    directory = tempfile.mkdtemp()
+    try:
+        app = create_benchmark_app(os.path.join(directory, 'serializers.db'))
+        with app.test_request_context():
+            db.create_all()
+            print(f"\n  Seeding ~{rows:,} spots, users and reservations...")
+            seed(rows)
+
+            print(f"  {'list':<14}{'to_dict':>12}{'columns+json':>15}{'columns+orjson':>17}{'speed-up':>10}")
+            for name, old_path, new_path in LISTS:
+                old_time, old_output = best_time(old_path)
+
+                fast_encoder = serializers.orjson
+                serializers.orjson = None  # Standard json module
+                json_time, json_output = best_time(new_path)
+                serializers.orjson = fast_encoder
+                fast_time, fast_output = best_time(new_path) if fast_encoder else (None, None)
+
+                if not same_json(old_output, json_output, name) or (
+                        fast_output and not same_json(old_output, fast_output, name)):
+                    print(f"  ✗ {name}: responses differ!")
+                    return False
+
+                best_new = fast_time or json_time
+                print(f"  {name:<14}{old_time * 1000:>10.0f}ms{json_time * 1000:>13.0f}ms"
+                      f"{(f'{fast_time * 1000:.0f}ms' if fast_time else 'n/a'):>17}"
+                      f"{old_time / best_new:>9.1f}x")
+            db.session.remove()
+            db.engine.dispose()
+        return True
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print("\n" + "=" * 70)
+    print("⚡ SERIALIZER BENCHMARK (best of %d runs)" % RUNS)
+    print("=" * 70)
+    if serializers.orjson is None:
+        print("  ⚠ orjson is not installed - only the standard json module is measured")
+
+    ok = all(run_size(rows) for rows in sizes)
+
+    print("\n" + "=" * 70)
+    print("✓ Same JSON from both paths" if ok else "✗ Outputs differ")
+    print("=" * 70 + "\n")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Serving Throughput Benchmark
+Starts the API for real (separate server process, real HTTP over TCP) and
+compares Flask's debug server (`python app.py`) with the production
+server (`python serve.py`: pre-forked workers x threads)
+
+Student Project - Performance Testing
+Usage:
+    python benchmarks/bench_serving.py --clients 32 --duration 15
+    python benchmarks/bench_serving.py --modes debug,4x4,8x4
+
+Each mode is "debug" or "<workers>x<threads>". Load comes from several client
+processes (so the load generator itself is not held back by the GIL), every
+client keeps one connection open and loops over a read-only mix of user
+pages. Reports requests per second and latency percentiles per mode.
+Note: clients and servers share the machine's CPUs - the CPU count is printed.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+import multiprocessing
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 5099
+USERS = 20
+REQUEST_MIX = [
+    '/api/user/lots/available',
+    '/api/user/lots/available',
+    '/api/user/lots/search?q=parking',
+    '/api/user/reservations',
+    '/api/user/current',
+    '/api/health',
+]
+
+
+def percentile(sorted_samples, fraction):
+    """Value below which `fraction` of the samples fall (samples must be sorted)"""
+    if not sorted_samples:
+        return 0.0
+    return sorted_samples[min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))]
+
+
+# ============================================================================
+# SERVER PROCESSES
+# ============================================================================
+
+def start_server(mode, environment):
+    """Starts the server for one mode in its own process group"""
+    if mode == 'debug':
+        command = [sys.executable, 'app.py']
+    else:
+        workers, threads = mode.split('x')
+        command = [sys.executable, 'serve.py', '--bind', f'127.0.0.1:{PORT}',
+                   '--workers', workers, '--threads', threads]
+    return subprocess.Popen(command, cwd=BACKEND, env=environment, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_up(timeout=30):
+    """Polls /api/health until the server answers"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', PORT, timeout=2)
+            connection.request('GET', '/api/health')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('Server did not start')
+
+
+def stop_server(process):
+    """Stops the server and everything it started (the debug reloader, gunicorn workers)"""
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+    time.sleep(0.5)  # Let the port free up
+
+
+def login(username):
+    """JWT for a synthetic user"""
+    connection = http.client.HTTPConnection('127.0.0.1', PORT, timeout=10)
+    connection.request('POST', '/api/auth/login', body=json.dumps({'username': username, 'password': 'password123'}),
+                       headers={'Content-Type': 'application/json'})
+    return json.loads(connection.getresponse().read())['access_token']
+
+
+# ============================================================================
+# LOAD
+# ============================================================================
+
+def client_process(tokens, threads, duration, results):
+    """One load process: `threads` clients, each with its own connection"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def client(number):
+        headers = {'Authorization': f'Bearer {tokens[number % len(tokens)]}'}
+        connection = http.client.HTTPConnection('127.0.0.1', PORT, timeout=30)
+        mine, failed, step = [], 0, number
+        while time.time() < stop_at:
+            path = REQUEST_MIX[step % len(REQUEST_MIX)]
+            step += 1
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()  # Reconnects on the next request
+                continue
+            mine.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    workers = [threading.Thread(target=client, args=(number,)) for number in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    results.put((latencies, errors[0]))
+
+
+def run_load(tokens, clients, duration, processes):
+    """Runs the clients spread over `processes` processes"""
+    results = multiprocessing.Queue()
+    per_process = [clients // processes + (1 if i < clients % processes else 0) for i in range(processes)]
+    started = [multiprocessing.Process(target=client_process, args=(tokens, count, duration, results))
+               for count in per_process if count]
+    for process in started:
+        process.start()
+    latencies, errors = [], 0
+    for _ in started:
+        mine, failed = results.get()
+        latencies.extend(mine)
+        errors += failed
+    for process in started:
+        process.join()
+    latencies.sort()
+    return {
+        'requests_per_s': len(latencies) / duration,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'errors': errors,
+    }
+
+
+def main():
+    default_workers = min(2 * (os.cpu_count() or 1) + 1, 9)
+    parser = argparse.ArgumentParser(description='Debug server vs pre-fork server throughput')
+    parser.add_argument('--modes', default=f'debug,1x1,1x8,{default_workers}x4',
+                        help='Comma-separated: debug or <workers>x<threads>')
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent connections')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per mode')
+    parser.add_argument('--client-processes', type=int, default=max(2, (os.cpu_count() or 1) // 2))
+    parser.add_argument('--lots', type=int, default=200)
+    parser.add_argument('--reservations', type=int, default=50000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    environment = dict(os.environ, PORT=str(PORT), TASK_BACKEND='local',
+                       DATABASE_URL='sqlite:///' + os.path.join(directory, 'serving.db'),
+                       LOCAL_TASK_QUEUE_PATH=os.path.join(directory, 'task_queue.db'),
+                       RATE_LIMIT_ENABLED='false')  # All logins come from one IP
+    environment.pop('PROMETHEUS_MULTIPROC_DIR', None)  # serve.py sets up its own
+    try:
+        print("\n" + "=" * 78)
+        print(f"🚗 SERVING BENCHMARK - {args.clients} connections, {args.duration:.0f}s per mode, "
+              f"{os.cpu_count()} CPUs")
+        print("=" * 78)
+        print("  Seeding...")
+        subprocess.run([sys.executable, 'init_db.py', '--synthetic', '--lots', str(args.lots),
+                        '--users', str(USERS), '--reservations', str(args.reservations)],
+                       cwd=BACKEND, env=environment, check=True, stdout=subprocess.DEVNULL)
+
+        print(f"\n  {'Mode':<26}{'req/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>9}")
+        baseline = None
+        for mode in args.modes.split(','):
+            server = start_server(mode, environment)
+            try:
+                wait_until_up()
+                tokens = [login(f'synthetic_user{number}') for number in range(USERS)]
+                run_load(tokens, args.clients, 2, args.client_processes)  # Warm-up
+                result = run_load(tokens, args.clients, args.duration, args.client_processes)
+            finally:
+                stop_server(server)
+
+            label = 'debug server (app.py)' if mode == 'debug' else f'serve.py {mode.replace("x", " x ")} threads'
+            baseline = baseline or result['requests_per_s']
+            print(f"  {label:<26}{result['requests_per_s']:>9.0f}{result['p50_ms']:>8.1f}ms"
+                  f"{result['p95_ms']:>8.1f}ms{result['p99_ms']:>8.1f}ms{result['errors']:>9}"
+                  f"   {result['requests_per_s'] / baseline:.1f}x")
+        print("=" * 78 + "\n")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
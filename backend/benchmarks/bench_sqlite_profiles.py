@@ -0,0 +1,154 @@
+"""
+SQLite Concurrency Benchmark
+Runs the reserve → occupy → release database work from many threads at once
+and compares the SQLite profiles in utils/db_profile.py
+
+Student Project - Performance Testing
+Usage: python benchmarks/bench_sqlite_profiles.py [seconds_per_run]
+"""
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# Make sure we can import from the backend folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from config import Config
+from models import db
+from models.user import User
+from models.parking_lot import ParkingLot
+from models.parking_spot import ParkingSpot
+from models.reservation import Reservation
+from utils.db_profile import init_db_profile, SQLITE_PROFILES
+
+THREAD_COUNTS = [1, 8, 32]
+NUMBER_OF_LOTS = 10
+SPOTS_PER_LOT = 100
+
+
+def create_benchmark_app(profile, database_path):
+    """Minimal app (database only) using the given profile"""
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + database_path
+        SQLITE_PROFILE = profile
+
+    app = Flask(__name__)
+    app.config.from_object(BenchmarkConfig)
+    init_db_profile(app, db)
+    return app
+
+
+def seed(app, number_of_users):
+    """Creates lots, spots and one user per thread"""
+    with app.app_context():
+        db.create_all()
+        for i in range(number_of_users):
+            db.session.add(User(username=f'user{i}', email=f'user{i}@example.com', password_hash='x'))
+        for i in range(NUMBER_OF_LOTS):
+            lot = ParkingLot(prime_location_name=f'Lot {i}', price_per_hour=50.0,
+                             address='Benchmark Road', pin_code='110001',
+                             number_of_spots=SPOTS_PER_LOT)
+            db.session.add(lot)
+            db.session.flush()
+            db.session.add_all(ParkingSpot(lot_id=lot.id, spot_number=n) for n in range(1, SPOTS_PER_LOT + 1))
+        db.session.commit()
+
+
+def parking_cycle(user_id):
+    """Same queries as the reserve, occupy and release routes"""
+    lot_id = random.randint(1, NUMBER_OF_LOTS)
+
+    # Listing: how many spots are free (what the lots page does)
+    db.session.query(func.count(ParkingSpot.id)).filter_by(lot_id=lot_id, status='available').scalar()
+
+    # Reserve
+    spot = ParkingSpot.query.filter_by(lot_id=lot_id, status='available').first()
+    if not spot:
+        return
+    reservation = Reservation(spot_id=spot.id, user_id=user_id, reserved_at=datetime.utcnow(), status='reserved')
+    db.session.add(reservation)
+    db.session.commit()
+
+    # Occupy
+    reservation.parking_timestamp = datetime.utcnow()
+    reservation.status = 'active'
+    spot.mark_occupied()
+    db.session.commit()
+
+    # Release
+    reservation.leaving_timestamp = datetime.utcnow()
+    reservation.status = 'completed'
+    reservation.parking_cost = reservation.calculate_cost(50.0)
+    spot.mark_available()
+    db.session.commit()
+
+
+def run_threads(app, thread_count, seconds):
+    """Runs parking cycles from many threads, returns (cycles, lock errors)"""
+    counts = {'cycles': 0, 'locked': 0}
+    counts_lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def worker(user_id):
+        cycles = locked = 0
+        with app.app_context():
+            while time.perf_counter() < stop_at:
+                try:
+                    parking_cycle(user_id)
+                    cycles += 1
+                except OperationalError as e:
+                    db.session.rollback()
+                    if 'locked' not in str(e):
+                        raise
+                    locked += 1
+            db.session.remove()
+        with counts_lock:
+            counts['cycles'] += cycles
+            counts['locked'] += locked
+
+    threads = [threading.Thread(target=worker, args=(i + 1,)) for i in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts['cycles'], counts['locked']
+
+
+def run_benchmark(seconds=5):
+    print("\n" + "=" * 70)
+    print(f"🗄  SQLITE PROFILE BENCHMARK (reserve → occupy → release, {seconds}s per run)")
+    print("=" * 70)
+    print(f"  {'profile':<12} {'threads':>7} {'cycles/s':>10} {'commits/s':>10} {'locked errors':>14}")
+
+    results = {}
+    for profile in SQLITE_PROFILES:
+        for thread_count in THREAD_COUNTS:
+            directory = tempfile.mkdtemp()
+            try:
+                app = create_benchmark_app(profile, os.path.join(directory, 'bench.db'))
+                seed(app, thread_count)
+                cycles, locked = run_threads(app, thread_count, seconds)
+                with app.app_context():
+                    db.engine.dispose()
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+
+            rate = cycles / seconds
+            results[(profile, thread_count)] = {'cycles_per_second': rate, 'locked_errors': locked}
+            print(f"  {profile:<12} {thread_count:>7} {rate:>10.1f} {rate * 3:>10.1f} {locked:>14}")
+
+    print("=" * 70 + "\n")
+    return results
+
+
+if __name__ == '__main__':
+    run_benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 5)
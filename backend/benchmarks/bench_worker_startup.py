@@ -0,0 +1,83 @@
+"""
+Celery Worker Startup Benchmark
+Measures how long a worker process takes to import its tasks and how much
+memory it uses, compared with building the full Flask web app
+
+Student Project - Performance Testing
+Usage: python benchmarks/bench_worker_startup.py [runs]
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each scenario runs in a fresh Python process so imports are not cached
+SCENARIOS = {
+    'full web app (create_app)': """
+from app import create_app
+from utils.cache import is_redis_available
+app = create_app()
+is_redis_available()
+""",
+    'celery worker import': """
+import celery_worker
+""",
+    'celery worker + first task': """
+import celery_worker
+from models import db
+from sqlalchemy import text
+with celery_worker.get_flask_app().app_context():
+    db.session.execute(text('SELECT 1'))
+""",
+}
+
+MEASURE = """
+import resource, sys, time
+start = time.perf_counter()
+exec(compile({code!r}, 'scenario', 'exec'))
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print('RESULT', elapsed, rss_kb)
+"""
+
+
+def measure(code):
+    """Runs one scenario in a new interpreter, returns (seconds, max RSS in MB)"""
+    output = subprocess.run(
+        [sys.executable, '-c', MEASURE.format(code=code)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    line = [l for l in output.splitlines() if l.startswith('RESULT')][-1]
+    _, seconds, rss_kb = line.split()
+    return float(seconds), int(rss_kb) / 1024
+
+
+def run_benchmark(runs=5):
+    print("\n" + "=" * 60)
+    print(f"🚀 WORKER COLD-START BENCHMARK ({runs} runs each)")
+    print("=" * 60)
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        try:
+            samples = [measure(code) for _ in range(runs)]
+        except subprocess.CalledProcessError as e:
+            print(f"  {name:<30} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        best_time = min(seconds for seconds, _ in samples)
+        max_rss = max(rss for _, rss in samples)
+        results[name] = {'seconds': round(best_time, 4), 'max_rss_mb': round(max_rss, 1)}
+        print(f"  {name:<30} {best_time * 1000:>8.1f} ms   {max_rss:>7.1f} MB")
+
+    print("=" * 60 + "\n")
+    return results
+
+
+if __name__ == '__main__':
+    numbers = [arg for arg in sys.argv[1:] if arg.isdigit()]
+    results = run_benchmark(int(numbers[0]) if numbers else 5)
+    if '--json' in sys.argv:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,183 @@
+"""
+Query Budget Check
+Calls every read endpoint and fails if it runs more SQL queries than its
+budget. The data is seeded twice (small and large) - an endpoint whose
+query count grows with the data has an N+1 problem.
+
+Student Project - Performance Testing
+Usage: python benchmarks/check_query_budgets.py
+Exit code is 1 if any endpoint is over budget (so it can run in CI).
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+# Make sure we can import from the backend folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token
+from config import Config
+from app import create_app
+from models import db
+from models.user import User
+from models.parking_lot import ParkingLot
+from models.parking_spot import ParkingSpot
+from models.reservation import Reservation
+from utils.query_stats import assert_query_budget
+
+# (role, path) → most SQL queries the endpoint may run
+# The JWT check that loads the current user counts as one query
+QUERY_BUDGETS = {
+    ('admin', '/api/admin/lots'): 4,
+    ('admin', '/api/admin/spots'): 4,
+    ('admin', '/api/admin/changes'): 3,
+    ('admin', '/api/admin/users'): 4,
+    ('admin', '/api/admin/reservations'): 3,
+    ('admin', '/api/admin/analytics/revenue'): 4,
+    ('admin', '/api/admin/analytics/occupancy'): 4,
+    ('admin', '/api/admin/analytics/popular-lots'): 3,
+    ('admin', '/api/admin/reports/monthly'): 2,
+    ('admin', '/api/admin/billing/invoices/2026-09'): 3,
+    ('user', '/api/auth/me'): 1,
+    ('user', '/api/user/lots/available'): 4,
+    ('user', '/api/user/lots/search?q=plaza&max_price=80'): 4,
+    ('user', '/api/user/lots/nearby?lat=28.61&lon=77.21&k=5'): 4,
+    ('user', '/api/user/current'): 5,
+    ('user', '/api/user/reservations'): 5,
+    ('user', '/api/user/analytics/spending'): 5,
+    ('user', '/api/user/analytics/usage'): 5,
+    ('user', '/api/user/invoices'): 3,
+}
+
+# Endpoints with version ETags (utils/http_cache.py): asking again with
+# If-None-Match must give 304 after the user lookup + the version lookup
+REVALIDATE_PATHS = [
+    ('admin', '/api/admin/lots'),
+    ('admin', '/api/admin/spots'),
+    ('admin', '/api/admin/analytics/occupancy'),
+    ('user', '/api/user/lots/available'),
+    ('user', '/api/user/lots/search?q=plaza&max_price=80'),
+]
+REVALIDATE_BUDGET = 2
+
+# Seed sizes: (lots, spots per lot, users)
+DATA_SIZES = [(3, 5, 3), (20, 20, 20)]
+
+
+def seed(number_of_lots, spots_per_lot, number_of_users):
+    """Lots, spots, users and some reservations (one active for user #2)"""
+    admin = User(username='admin', email='admin@example.com', role='admin')
+    admin.set_password('admin123')
+    users = [User(username=f'user{i}', email=f'user{i}@example.com', role='user')
+             for i in range(number_of_users)]
+    for user in users:
+        user.set_password('password')
+    db.session.add_all([admin] + users)
+    db.session.commit()
+
+    now = datetime.utcnow()
+    for i in range(number_of_lots):
+        lot = ParkingLot(prime_location_name=f'Lot {i}', price_per_hour=50.0,
+                         address='Budget Road', pin_code='110001', number_of_spots=spots_per_lot)
+        db.session.add(lot)
+        db.session.flush()
+        spots = [ParkingSpot(lot_id=lot.id, spot_number=n) for n in range(1, spots_per_lot + 1)]
+        db.session.add_all(spots)
+        db.session.flush()
+
+        # A few completed reservations per lot, spread over users and months
+        for n, user in enumerate(users):
+            started = now - timedelta(days=(i * 7 + n) % 120, hours=3)
+            db.session.add(Reservation(
+                spot_id=spots[n % spots_per_lot].id, user_id=user.id, reserved_at=started,
+                parking_timestamp=started, leaving_timestamp=started + timedelta(hours=2),
+                status='completed', parking_cost=100.0
+            ))
+
+    # The first normal user is parked right now
+    spot = ParkingSpot.query.first()
+    spot.mark_occupied()
+    db.session.add(Reservation(spot_id=spot.id, user_id=users[0].id, reserved_at=now,
+                               parking_timestamp=now, status='active'))
+    db.session.commit()
+    return admin.id, users[0].id
+
+
+def check_budgets(size):
+    """Runs every endpoint once on a fresh database, returns list of results"""
+    directory = tempfile.mkdtemp()
+
+    class BudgetConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(directory, 'budget.db')
+        SQLALCHEMY_BINDS = {}
+        SQLALCHEMY_REPLICA_URI = None
+        TASK_BACKEND = 'local'
+        LOCAL_TASK_QUEUE_PATH = os.path.join(directory, 'tasks.db')
+
+    try:
+        app = create_app(BudgetConfig)
+        with app.app_context():
+            db.create_all()
+            admin_id, user_id = seed(*size)
+            headers = {
+                'admin': {'Authorization': 'Bearer ' + create_access_token(identity=str(admin_id))},
+                'user': {'Authorization': 'Bearer ' + create_access_token(identity=str(user_id))},
+            }
+
+        client = app.test_client()
+        results = []
+        for (role, path), budget in QUERY_BUDGETS.items():
+            try:
+                response, stats = assert_query_budget(client, 'GET', path, budget, headers=headers[role])
+                ok = response.status_code == 200
+                detail = f'{stats.count} queries' + ('' if ok else f' (HTTP {response.status_code})')
+            except AssertionError as e:
+                ok = False
+                detail = str(e)
+            results.append((path, budget, ok, detail))
+
+        for role, path in REVALIDATE_PATHS:
+            etag = client.get(path, headers=headers[role]).headers.get('ETag')
+            try:
+                response, stats = assert_query_budget(
+                    client, 'GET', path, REVALIDATE_BUDGET,
+                    headers={**headers[role], 'If-None-Match': etag or '"none"'}
+                )
+                ok = response.status_code == 304
+                detail = f'{stats.count} queries' + ('' if ok else f' (HTTP {response.status_code}, expected 304)')
+            except AssertionError as e:
+                ok = False
+                detail = str(e)
+            results.append((path + ' (304)', REVALIDATE_BUDGET, ok, detail))
+
+        with app.app_context():
+            db.engine.dispose()
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    print("\n" + "=" * 70)
+    print("🔎 QUERY BUDGET CHECK")
+    print("=" * 70)
+
+    failures = 0
+    for size in DATA_SIZES:
+        print(f"\n  Data: {size[0]} lots x {size[1]} spots, {size[2]} users")
+        for path, budget, ok, detail in check_budgets(size):
+            mark = '✓' if ok else '✗'
+            print(f"  {mark} {path:<38} budget {budget:>2}  {detail}")
+            failures += 0 if ok else 1
+
+    print("\n" + "=" * 70)
+    print("✓ All endpoints within budget" if not failures else f"✗ {failures} endpoint checks failed")
+    print("=" * 70 + "\n")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
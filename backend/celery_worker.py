@@ -3,41 +3,132 @@ Celery Worker Setup
 This file creates the Celery application instance that runs background tasks.
 It connects Flask with Celery so our tasks can access the database.
 
+The worker does NOT build the full web app (blueprints, CORS, JWT).
+Tasks only need the database, so a small Flask app with just SQLAlchemy
+is created the first time a task runs. This keeps `celery` CLI commands
+and worker start-up fast.
+
 Student Project - MAD-II
 """
 
 from celery import Celery
-from app import create_app
+from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
+from flask import Flask
+from config import Config
+
+# The Flask app is created lazily by get_flask_app()
+flask_app = None
+
+def create_worker_app(config_class=Config):
+    """
+    Creates a minimal Flask app for background tasks
+    Only the database is set up - no routes, CORS or JWT
+
+    Returns:
+        Flask app instance
+    """
+    from models import db
+    from utils.db_profile import init_db_profile
+    from utils.slow_queries import init_slow_query_log
+
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    init_db_profile(app, db)
+    init_slow_query_log(app)  # Task queries are logged too (if enabled)
+    return app
 
-def make_celery(app):
+def get_flask_app():
+    """
+    Returns the worker's Flask app, creating it on first use
+
+    Returns:
+        Flask app instance
+    """
+    global flask_app
+    if flask_app is None:
+        flask_app = create_worker_app()
+    return flask_app
+
+def make_celery(config_class=Config):
     """
     Creates and configures a Celery instance that works with Flask
     """
     celery = Celery(
-        app.import_name,
-        backend=app.config['CELERY_RESULT_BACKEND'],
-        broker=app.config['CELERY_BROKER_URL']
+        'celery_worker',
+        backend=config_class.CELERY_RESULT_BACKEND,
+        broker=config_class.CELERY_BROKER_URL
     )
-    
-    # Update Celery config with Flask config
-    celery.conf.update(app.config)
 
     # This magic class ensures that Celery tasks run inside a Flask app context
     # This is needed so tasks can access the database (db.session)
     class ContextTask(celery.Task):
         def __call__(self, *args, **kwargs):
-            with app.app_context():
+            with get_flask_app().app_context():
                 return self.run(*args, **kwargs)
 
     celery.Task = ContextTask
-    return celery
 
-# Create the Flask app instance
-flask_app = create_app()
+    # Scheduled jobs - run by `celery -A celery_worker.celery beat`
+    celery.conf.beat_schedule = {
+        'send-daily-reminders': {
+            'task': 'tasks.send_daily_reminders',
+            'schedule': crontab(hour=18, minute=0)  # Every day at 6 PM
+        },
+        'generate-monthly-invoices': {
+            'task': 'tasks.generate_monthly_invoices',
+            'schedule': crontab(day_of_month=1, hour=5, minute=0)  # 1st of the month, 5 AM
+        },
+        'send-monthly-report': {
+            'task': 'tasks.send_monthly_report',
+            'schedule': crontab(day_of_month=1, hour=6, minute=0)  # 1st of the month, 6 AM
+        },
+        'expire-stale-reservations': {
+            'task': 'tasks.expire_stale_reservations',
+            'schedule': config_class.RESERVATION_SWEEP_INTERVAL  # Every few minutes
+        },
+        'archive-completed-reservations': {
+            'task': 'tasks.archive_completed_reservations',
+            'schedule': crontab(hour=3, minute=0)  # Every night at 3 AM
+        },
+        'compact-spot-events': {
+            'task': 'tasks.compact_spot_events',
+            'schedule': crontab(hour=3, minute=30)  # Every night at 3:30 AM
+        },
+        'fit-occupancy-forecasts': {
+            'task': 'tasks.fit_occupancy_forecasts',
+            'schedule': crontab(hour=4, minute=0)  # Every night at 4 AM
+        }
+    }
+    if config_class.SQLALCHEMY_REPLICA_URI:
+        celery.conf.beat_schedule['refresh-read-replica'] = {
+            'task': 'tasks.refresh_read_replica',
+            'schedule': config_class.REPLICA_REFRESH_INTERVAL
+        }
+    celery.conf.timezone = 'UTC'
+
+    return celery
 
 # Create the Celery app instance
-celery = make_celery(flask_app)
+celery = make_celery()
+
+@worker_process_init.connect
+def reset_connections_after_fork(**kwargs):
+    """
+    Runs in each worker child process right after it is forked.
+    Database and Redis connections must not be shared with the parent,
+    so drop anything that was inherited and let the child open its own.
+    """
+    from utils.forking import reset_after_fork
+    reset_after_fork(flask_app)  # Forgets the parent's connections without closing them
+
+@worker_process_shutdown.connect
+def close_connections_on_shutdown(**kwargs):
+    """Closes pooled SMTP connections when a worker child exits"""
+    from utils import mailer
+
+    if mailer._mailer is not None and mailer._mailer.pool is not None:
+        mailer._mailer.pool.close_all()
 
 # Import tasks so Celery knows about them
-# (We will create this file next)
 import tasks
@@ -30,6 +30,103 @@ class Config:
     # Disable modification tracking to save memory
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Optional read replica for listings, history, analytics and exports
+    # (e.g. a second SQLite file kept fresh by the refresh_read_replica task)
+    SQLALCHEMY_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URL')
+    SQLALCHEMY_BINDS = {'replica': SQLALCHEMY_REPLICA_URI} if SQLALCHEMY_REPLICA_URI else {}
+    REPLICA_READ_YOUR_WRITES_SECONDS = int(os.environ.get('REPLICA_READ_YOUR_WRITES_SECONDS') or 10)
+    REPLICA_REFRESH_INTERVAL = int(os.environ.get('REPLICA_REFRESH_INTERVAL') or 60)  # Seconds (SQLite stand-in only)
+    
+    # SQLite tuning: 'production' turns on WAL, busy_timeout, mmap and a
+    # connection pool (see utils/db_profile.py), 'default' keeps plain SQLite
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE') or 'production'
+    
+    # Per-request SQL statistics (X-Query-Count / Server-Timing headers and
+    # N+1 warnings, see utils/query_stats.py) - off by default
+    QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', 'false').lower() == 'true'
+    QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD') or 10)  # Same query more often than this = warning
+    
+    # Prometheus metrics at /api/metrics (see utils/metrics.py). With several
+    # server processes also set the PROMETHEUS_MULTIPROC_DIR environment variable
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    # Who may read it: requests with "Authorization: Bearer <METRICS_TOKEN>",
+    # or from these addresses (comma-separated; empty = token only)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+                           if ip.strip()]
+    
+    # Request profiling (see utils/profiler.py) - off by default
+    # Requests slower than PROFILE_SLOW_MS, plus a random PROFILE_SAMPLE_RATE
+    # share of all requests, are saved as collapsed stacks in PROFILE_DIR
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+    PROFILE_SLOW_MS = float(os.environ.get('PROFILE_SLOW_MS') or 500)
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE') or 0.01)
+    PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS') or 5)  # Time between stack samples
+    PROFILE_PATH_PREFIXES = (os.environ.get('PROFILE_PATH_PREFIXES') or '/api/').split(',')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(BASE_DIR, 'profiles')
+    PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP') or 100)  # Older profiles are deleted
+    
+    # Slow query log (see utils/slow_queries.py) - off by default
+    # Statements slower than the threshold are written to rotating JSON-lines files,
+    # one per process: SLOW_QUERY_LOG_PATH 'slow_queries.log' → 'slow_queries.<pid>.log'
+    SLOW_QUERY_LOG_ENABLED = os.environ.get('SLOW_QUERY_LOG_ENABLED', 'false').lower() == 'true'
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS') or 100)
+    SLOW_QUERY_LOG_PATH = os.environ.get('SLOW_QUERY_LOG_PATH') or os.path.join(BASE_DIR, 'logs', 'slow_queries.log')
+    SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES') or 5 * 1024 * 1024)
+    SLOW_QUERY_LOG_BACKUPS = int(os.environ.get('SLOW_QUERY_LOG_BACKUPS') or 3)
+    
+    # HTTP caching of the lot lists (see utils/http_cache.py) and response compression
+    # no-cache = the browser keeps the response but checks its ETag on every use
+    HTTP_CACHE_CONTROL = os.environ.get('HTTP_CACHE_CONTROL') or 'private, no-cache'
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES') or 1024)  # Smaller bodies are sent as they are
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL') or 6)  # gzip level 1 (fast) - 9 (small)
+    
+    # Live availability stream (see utils/live_updates.py)
+    LIVE_UPDATES_CHANNEL = os.environ.get('LIVE_UPDATES_CHANNEL') or 'parking:availability'
+    LIVE_UPDATES_QUEUE_SIZE = int(os.environ.get('LIVE_UPDATES_QUEUE_SIZE') or 100)  # Backlog per client before it must reload
+    LIVE_UPDATES_MAX_CLIENTS = int(os.environ.get('LIVE_UPDATES_MAX_CLIENTS') or 10000)  # Open streams per process
+    LIVE_UPDATES_KEEPALIVE = float(os.environ.get('LIVE_UPDATES_KEEPALIVE') or 15)  # Seconds between keep-alive lines
+    LIVE_UPDATES_TOKEN_SECONDS = int(os.environ.get('LIVE_UPDATES_TOKEN_SECONDS') or 60)  # Lifetime of a stream token
+    
+    # Dynamic pricing (see utils/pricing.py): tariff bands are in this local time
+    PRICING_UTC_OFFSET_MINUTES = int(os.environ.get('PRICING_UTC_OFFSET_MINUTES') or 330)  # IST = UTC+5:30
+    
+    # Bulk re-billing (see utils/billing.py): changed costs written per transaction
+    BILLING_BATCH_SIZE = int(os.environ.get('BILLING_BATCH_SIZE') or 50000)
+    
+    # Occupancy forecasts (see utils/forecasting.py), fitted every night
+    FORECAST_HISTORY_WEEKS = int(os.environ.get('FORECAST_HISTORY_WEEKS') or 8)
+    FORECAST_SMOOTHING = float(os.environ.get('FORECAST_SMOOTHING') or 0.3)  # Weight of the newest week
+    FORECAST_LOT_BATCH = int(os.environ.get('FORECAST_LOT_BATCH') or 2000)  # Lots fitted at once (memory)
+    FORECAST_MAX_HOURS = int(os.environ.get('FORECAST_MAX_HOURS') or 72)
+    
+    # Production server (see serve.py): pre-forked worker processes, each with a thread pool
+    WEB_BIND = os.environ.get('WEB_BIND') or '0.0.0.0:5000'
+    WEB_WORKERS = int(os.environ.get('WEB_WORKERS') or min(2 * (os.cpu_count() or 1) + 1, 9))
+    WEB_THREADS = int(os.environ.get('WEB_THREADS') or 4)  # Requests handled at once per worker
+    WEB_TIMEOUT = int(os.environ.get('WEB_TIMEOUT') or 60)  # Seconds before a stuck worker is restarted
+    WEB_GRACEFUL_TIMEOUT = int(os.environ.get('WEB_GRACEFUL_TIMEOUT') or 30)  # Seconds to finish requests on reload/stop
+    WEB_MAX_REQUESTS = int(os.environ.get('WEB_MAX_REQUESTS') or 0)  # Recycle a worker after this many (0 = never)
+    
+    # Rate limiting (see utils/rate_limit.py): token buckets per client IP and per user,
+    # per route. 'burst/seconds' = up to `burst` requests at once, refilled at `burst`
+    # requests per `seconds`. An empty value turns that bucket off.
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMITS = {
+        'login': {'ip': os.environ.get('RATE_LIMIT_LOGIN_IP', '30/60'),
+                  'user': os.environ.get('RATE_LIMIT_LOGIN_USER', '5/60')},  # Per username tried
+        'register': {'ip': os.environ.get('RATE_LIMIT_REGISTER_IP', '10/60')},
+        'reserve': {'ip': os.environ.get('RATE_LIMIT_RESERVE_IP', '120/60'),
+                    'user': os.environ.get('RATE_LIMIT_RESERVE_USER', '10/60')},
+    }
+    RATE_LIMIT_MEMORY_KEYS = int(os.environ.get('RATE_LIMIT_MEMORY_KEYS') or 100000)  # Buckets kept without Redis
+    
+    # Spot change feed (see utils/change_feed.py)
+    CHANGE_FEED_MAX_BATCH = int(os.environ.get('CHANGE_FEED_MAX_BATCH') or 5000)  # Events per /api/admin/changes call
+    CHANGE_FEED_COMPACT_AFTER_HOURS = int(os.environ.get('CHANGE_FEED_COMPACT_AFTER_HOURS') or 24)
+    CHANGE_FEED_REMOVED_RETENTION_DAYS = int(os.environ.get('CHANGE_FEED_REMOVED_RETENTION_DAYS') or 7)
+    
     # JWT token settings for authentication
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-parking-secret-2024'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)  # Token valid for 24 hours
@@ -42,5 +139,37 @@ class Config:
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL') or 'redis://localhost:6379/0'
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND') or 'redis://localhost:6379/0'
     
+    # Where background tasks run: 'celery', 'local' (thread pool in this process)
+    # or 'auto' (Celery, falling back to local when the broker is down)
+    TASK_BACKEND = os.environ.get('TASK_BACKEND') or 'auto'
+    LOCAL_TASK_WORKERS = int(os.environ.get('LOCAL_TASK_WORKERS') or 2)
+    LOCAL_TASK_QUEUE_PATH = os.environ.get('LOCAL_TASK_QUEUE_PATH') or \
+        os.path.join(BASE_DIR, 'task_queue.db')  # Local jobs are saved here so they survive restarts
+
+    # Email settings for the background tasks (reminders, reports, exports)
+    # If MAIL_SERVER is not set, emails are just printed to the console
+    MAIL_SERVER = os.environ.get('MAIL_SERVER')
+    MAIL_PORT = int(os.environ.get('MAIL_PORT') or 25)
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'false').lower() == 'true'
+    MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
+    MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or 'noreply@parkingapp.com'
+    MAIL_POOL_SIZE = int(os.environ.get('MAIL_POOL_SIZE') or 2)  # SMTP connections kept open per worker
+    MAIL_BATCH_SIZE = int(os.environ.get('MAIL_BATCH_SIZE') or 50)  # Messages sent per connection checkout
+    MAIL_RATE_LIMIT = float(os.environ.get('MAIL_RATE_LIMIT') or 0)  # Max messages per second (0 = no limit)
+    MAIL_MAX_RETRIES = int(os.environ.get('MAIL_MAX_RETRIES') or 3)
+    MAIL_RETRY_BACKOFF = float(os.environ.get('MAIL_RETRY_BACKOFF') or 0.5)  # Seconds, doubled on each retry
+    MAIL_TIMEOUT = float(os.environ.get('MAIL_TIMEOUT') or 10)
+
+    # Reservations still in 'reserved' state after this long are expired
+    # by the sweeper task and their spots given back
+    RESERVATION_HOLD_TTL_MINUTES = int(os.environ.get('RESERVATION_HOLD_TTL_MINUTES') or 30)
+    RESERVATION_SWEEP_BATCH_SIZE = int(os.environ.get('RESERVATION_SWEEP_BATCH_SIZE') or 500)
+    RESERVATION_SWEEP_INTERVAL = int(os.environ.get('RESERVATION_SWEEP_INTERVAL') or 300)  # Seconds between sweeps
+    
+    # Completed reservations older than this are moved to the archive table
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS') or 180)
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE') or 1000)
+    
     # Default parking price (can be customized per lot)
     DEFAULT_PRICE_PER_HOUR = 50  # Rs. 50 per hour
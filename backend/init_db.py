@@ -4,10 +4,16 @@ Run this file to set up the database with tables and sample data
 
 Author: MAD-II Student Project
 Usage: python init_db.py
+       python init_db.py --synthetic --lots 500 --users 100000 --reservations 10000000 --months 24
+
+With --synthetic, the sample lots are replaced by generated production-sized
+data (see utils/data_generator.py). Same --seed and --end-date = same data.
 """
 
 import sys
 import os
+import argparse
+from datetime import datetime
 
 # Make sure we can import from the backend folder
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -15,10 +21,18 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from flask import Flask
 from config import Config
 from models import db
+from utils.db_profile import init_db_profile
 from models.user import User
 from models.parking_lot import ParkingLot
 from models.parking_spot import ParkingSpot
 from models.reservation import Reservation
+from models.reservation_archive import ReservationArchive
+from models.monthly_report import MonthlyReport, MonthlyLotReport
+from models.data_version import DataVersion
+from models.spot_event import SpotEvent
+from models.lot_tariff import LotTariff
+from models.invoice import Invoice
+from models.lot_forecast import LotForecast
 
 def create_app():
     """
@@ -27,10 +41,10 @@ def create_app():
     """
     app = Flask(__name__)
     app.config.from_object(Config)
-    db.init_app(app)
+    init_db_profile(app, db)
     return app
 
-def init_database():
+def init_database(synthetic=None):
     """
     Main function to initialize the entire database
     This will:
@@ -39,6 +53,10 @@ def init_database():
     3. Create some sample users
     4. Create sample parking lots
     5. Create parking spots for each lot  
+    
+    Args:
+        synthetic: Options for generate_synthetic_data() - if given, steps 4
+                   and 5 generate large random data instead of the 3 sample lots
     """
     print("\n" + "="*70)
     print("🚗 VEHICLE PARKING SYSTEM - Database Setup")
@@ -55,7 +73,8 @@ def init_database():
         # Step 2: Create all new tables based on our models
         print("Step 2: Creating database tables...")
         db.create_all()
-        print("  ✓ Tables created: users, parking_lots, parking_spots, reservations\n")
+        print("  ✓ Tables created: users, parking_lots, parking_spots, reservations, reservations_archive, monthly_reports, data_versions, spot_events, lot_tariffs, invoices, lot_forecasts")
+        print("  ✓ Lot search index and triggers created\n")
         
         # Step 3: Create the admin account
         print("Step 3: Setting up administrator account...")
@@ -91,63 +110,25 @@ def init_database():
         db.session.commit()
         print("  ✓ Created 3 user accounts (1 admin + 2 regular users)\n")
         
-        # Step 5: Create sample parking lots
-        print("Step 5: Adding sample parking lots...")
-        
-        # Lot 1: Downtown area
-        downtown_lot = ParkingLot(
-            prime_location_name='Downtown Business Plaza',
-            price_per_hour=50.0,
-            address='123 Main Street, Downtown District',
-            pin_code='110001',
-            number_of_spots=20
-        )
-        db.session.add(downtown_lot)
-        
-        # Lot 2: Shopping area
-        mall_lot = ParkingLot(
-            prime_location_name='Central Shopping Mall',
-            price_per_hour=40.0,
-            address='456 Mall Road, Shopping District',
-            pin_code='110002',
-            number_of_spots=30
-        )
-        db.session.add(mall_lot)
-        
-        # Lot 3: Airport
-        airport_lot = ParkingLot(
-            prime_location_name='International Airport Parking',
-            price_per_hour=75.0,
-            address='789 Airport Road, Terminal 2',
-            pin_code='110037',
-            number_of_spots=50
-        )
-        db.session.add(airport_lot)
-        
-        # Save parking lots
-        db.session.commit()
-        total_lots = ParkingLot.query.count()
-        print(f"  ✓ Created {total_lots} parking lots\n")
-        
-        # Step 6: Generate parking spots for each lot
-        print("Step 6: Generating parking spots...")
-        
-        total_spots = 0
-        # Loop through each parking lot we just created
-        for lot in ParkingLot.query.all():
-            # Create spots numbered 1, 2, 3, ... up to number_of_spots
-            for spot_number in range(1, lot.number_of_spots + 1):
-                new_spot = ParkingSpot(
-                    lot_id=lot.id,
-                    spot_number=spot_number,
-                    status='available'  # All spots start as available
-                )
-                db.session.add(new_spot)
-                total_spots += 1
-        
-        # Save all parking spots
-        db.session.commit()
-        print(f"  ✓ Created {total_spots} parking spots across all lots\n")
+        if synthetic is not None:
+            # Steps 5-6: Production-sized random data instead of the sample lots
+            from utils.data_generator import generate_synthetic_data
+            
+            print("Step 5: Generating synthetic lots, spots, users and reservations...")
+            result = generate_synthetic_data(db, **synthetic)
+            print(f"  ✓ Generated {result['lots']:,} lots, {result['spots']:,} spots, "
+                  f"{result['users']:,} users and {result['reservations']:,} reservations "
+                  f"({result['history']}, seed {result['seed']})")
+            print(f"  ✓ Took {result['timings']['total_s']}s {result['timings']}\n")
+        else:
+            create_sample_lots()
+        
+        # Copy everything into the local read replica, if one is configured
+        replica_uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+        if replica_uri and replica_uri.startswith('sqlite'):
+            from utils.db_routing import refresh_sqlite_replica
+            refresh_sqlite_replica(app.config['SQLALCHEMY_DATABASE_URI'], replica_uri)
+            print("  ✓ Read replica refreshed\n")
         
         # All done! Show summary
         print("="*70)
@@ -165,16 +146,108 @@ def init_database():
         print("\n   SAMPLE USER ACCOUNTS:")
         print("   Username: john_doe    | Password: password123")
         print("   Username: jane_smith  | Password: password123")
+        if synthetic is not None:
+            print("   Generated users: synthetic_user0, synthetic_user1, ... | Password: password123")
         
         print("\n📊 Database Summary:")
         print(f"   Total Users: {User.query.count()}")
         print(f"   Total Parking Lots: {ParkingLot.query.count()}")
         print(f"   Total Parking Spots: {ParkingSpot.query.count()}")
+        print(f"   Total Reservations: {Reservation.query.count()}")
         
         print("\n" + "="*70)
         print("You can now run the Flask server with: python app.py")
         print("="*70 + "\n")
 
+def create_sample_lots():
+    """Steps 5-6: The 3 sample parking lots and their spots"""
+    # Step 5: Create sample parking lots
+    print("Step 5: Adding sample parking lots...")
+    
+    # Lot 1: Downtown area
+    downtown_lot = ParkingLot(
+        prime_location_name='Downtown Business Plaza',
+        price_per_hour=50.0,
+        address='123 Main Street, Downtown District',
+        pin_code='110001',
+        latitude=28.6315,
+        longitude=77.2167,
+        number_of_spots=20
+    )
+    db.session.add(downtown_lot)
+    
+    # Lot 2: Shopping area
+    mall_lot = ParkingLot(
+        prime_location_name='Central Shopping Mall',
+        price_per_hour=40.0,
+        address='456 Mall Road, Shopping District',
+        pin_code='110002',
+        latitude=28.6280,
+        longitude=77.2410,
+        number_of_spots=30
+    )
+    db.session.add(mall_lot)
+    
+    # Lot 3: Airport
+    airport_lot = ParkingLot(
+        prime_location_name='International Airport Parking',
+        price_per_hour=75.0,
+        address='789 Airport Road, Terminal 2',
+        pin_code='110037',
+        latitude=28.5562,
+        longitude=77.0999,
+        number_of_spots=50
+    )
+    db.session.add(airport_lot)
+    
+    # Save parking lots
+    db.session.commit()
+    total_lots = ParkingLot.query.count()
+    print(f"  ✓ Created {total_lots} parking lots\n")
+    
+    # Step 6: Generate parking spots for each lot
+    print("Step 6: Generating parking spots...")
+    
+    total_spots = 0
+    # Loop through each parking lot we just created
+    for lot in ParkingLot.query.all():
+        # Create spots numbered 1, 2, 3, ... up to number_of_spots
+        for spot_number in range(1, lot.number_of_spots + 1):
+            new_spot = ParkingSpot(
+                lot_id=lot.id,
+                spot_number=spot_number,
+                status='available'  # All spots start as available
+            )
+            db.session.add(new_spot)
+            total_spots += 1
+    
+    # Save all parking spots
+    db.session.commit()
+    print(f"  ✓ Created {total_spots} parking spots across all lots\n")
+
 # Run the initialization when this file is executed
+def parse_args():
+    """Command line options for generating synthetic data"""
+    parser = argparse.ArgumentParser(description='Create the database (optionally with generated data)')
+    parser.add_argument('--synthetic', action='store_true', help='Generate large random data instead of the sample lots')
+    parser.add_argument('--lots', type=int, default=50)
+    parser.add_argument('--spots-per-lot', type=int, default=100, help='Average spots per lot')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--reservations', type=int, default=100000)
+    parser.add_argument('--months', type=int, default=12, help='Months of reservation history')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end-date', type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+                        help='Last day of history, YYYY-MM-DD (default today) - fix it for repeatable data')
+    parser.add_argument('--batch-size', type=int, default=200000, help='Reservations per insert transaction')
+    return parser.parse_args()
+
 if __name__ == '__main__':
-    init_database()
+    args = parse_args()
+    synthetic = None
+    if args.synthetic:
+        synthetic = {
+            'lots': args.lots, 'spots_per_lot': args.spots_per_lot, 'users': args.users,
+            'reservations': args.reservations, 'months': args.months, 'seed': args.seed,
+            'end_date': args.end_date, 'batch_size': args.batch_size
+        }
+    init_database(synthetic)
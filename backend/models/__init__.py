@@ -1,4 +1,6 @@
 # This file makes the models directory a Python package
 from flask_sqlalchemy import SQLAlchemy
+from utils.db_routing import RoutingSession
 
-db = SQLAlchemy()
+# RoutingSession lets read-only routes use the read replica (if configured)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
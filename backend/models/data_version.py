@@ -0,0 +1,26 @@
+"""
+Data Version Model - Counters that go up whenever some data changes
+Used for HTTP caching: a response built from version 42 gets the ETag
+"...-v42", and as long as the counter is still 42 the client's copy is current
+
+Student Project - MAD-II
+"""
+
+from models import db
+from datetime import datetime
+
+class DataVersion(db.Model):
+    """
+    One row per kind of data, e.g. name='availability' for lots and spot status
+    The counter is bumped in the same transaction as the change itself
+    (see utils/http_cache.py), so it can never be behind the data.
+    """
+    __tablename__ = 'data_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<DataVersion {self.name} v{self.version}>'
@@ -0,0 +1,63 @@
+"""
+Invoice Model - What a user was charged in one calendar month
+Built once a month by a background job (utils/billing.py), one row per
+user, so the invoice page never adds up reservations itself
+
+Student Project - MAD-II
+"""
+
+from models import db
+from datetime import datetime
+import json
+
+class Invoice(db.Model):
+    """
+    Monthly invoice of one user, with a line per parking lot
+    Covers the completed parkings that ended in the month (live and archived).
+    """
+    __tablename__ = 'invoices'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'month', name='uq_invoice_user_month'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    month = db.Column(db.String(7), nullable=False, index=True)  # 'YYYY-MM'
+
+    parkings = db.Column(db.Integer, nullable=False, default=0)
+    billable_hours = db.Column(db.Integer, nullable=False, default=0)  # Rounded up per parking
+    total_amount = db.Column(db.Float, nullable=False, default=0.0)
+
+    # [{'lot_id', 'lot_name', 'parkings', 'billable_hours', 'amount'}, ...] as JSON
+    lines = db.Column(db.Text, nullable=False, default='[]')
+
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def get_lines(self):
+        """Returns the per-lot lines as a list of dictionaries"""
+        return json.loads(self.lines or '[]')
+
+    def to_dict(self, include_lines=False):
+        """
+        Converts invoice to dictionary for API responses
+
+        Args:
+            include_lines: Whether to include the per-lot lines
+        """
+        invoice_data = {
+            'month': self.month,
+            'user_id': self.user_id,
+            'parkings': self.parkings,
+            'billable_hours': self.billable_hours,
+            'total_amount': self.total_amount,
+            'generated_at': self.generated_at.isoformat() if self.generated_at else None
+        }
+
+        if include_lines:
+            invoice_data['lines'] = self.get_lines()
+
+        return invoice_data
+
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<Invoice {self.month} - User:{self.user_id} ₹{self.total_amount:.2f}>'
@@ -0,0 +1,45 @@
+"""
+Lot Forecast Model - Expected occupancy of one lot for each hour of the week
+Fitted every night by a background job (utils/forecasting.py), so the
+forecast endpoint only reads one small row
+
+Student Project - MAD-II
+"""
+
+from models import db
+from datetime import datetime
+import numpy as np
+
+HOURS_PER_WEEK = 168
+
+class LotForecast(db.Model):
+    """
+    Hour-of-week occupancy profile of one lot
+    The profile is 168 numbers (one per hour of the week, in UTC) stored as
+    2-byte per-mille values - 336 bytes per lot.
+    """
+    __tablename__ = 'lot_forecasts'
+
+    lot_id = db.Column(db.Integer, db.ForeignKey('parking_lots.id'), primary_key=True)
+
+    # Share of spots taken, x1000, little-endian uint16; index = UTC hours since 1970 % 168
+    profile = db.Column(db.LargeBinary, nullable=False)
+
+    weeks_of_history = db.Column(db.Integer, nullable=False, default=0)
+    fitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Deleting a lot deletes its forecast
+    lot = db.relationship('ParkingLot', backref=db.backref('forecast', uselist=False, cascade='all, delete-orphan'))
+
+    @staticmethod
+    def encode_profile(occupancy):
+        """168 shares of spots taken (0.0 to 1.0) → bytes for the profile column"""
+        return np.round(np.clip(occupancy, 0, 1) * 1000).astype('<u2').tobytes()
+
+    def occupancy_profile(self):
+        """The profile as 168 shares of spots taken"""
+        return np.frombuffer(self.profile, dtype='<u2') / 1000
+
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<LotForecast lot {self.lot_id}: {self.weeks_of_history} weeks>'
@@ -0,0 +1,48 @@
+"""
+Lot Tariff Model - Dynamic pricing rules of one parking lot
+Lots without a tariff keep the flat price_per_hour.
+
+Student Project - MAD-II
+Example (hours are local time, see PRICING_UTC_OFFSET_MINUTES):
+    bands = [{"start": 8, "end": 11, "multiplier": 1.5},     # Morning peak
+             {"start": 22, "end": 6, "multiplier": 0.6}]     # Night, past midnight
+    occupancy_multipliers = [{"min_occupancy": 0.8, "multiplier": 1.25},   # 80% full or more
+                             {"min_occupancy": 0.95, "multiplier": 1.5}]
+    daily_cap = 400                                          # Most charged per day
+"""
+
+from models import db
+from datetime import datetime
+
+class LotTariff(db.Model):
+    """
+    Time-of-day bands, occupancy surcharges and a daily cap for one lot
+    The rules are checked and compiled by utils/pricing.py.
+    """
+    __tablename__ = 'lot_tariffs'
+
+    lot_id = db.Column(db.Integer, db.ForeignKey('parking_lots.id'), primary_key=True)
+
+    # Price = price_per_hour x band multiplier x occupancy multiplier
+    bands = db.Column(db.JSON, nullable=False, default=list)
+    occupancy_multipliers = db.Column(db.JSON, nullable=False, default=list)
+    daily_cap = db.Column(db.Float, nullable=True)  # None = no cap
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Deleting a lot deletes its tariff
+    lot = db.relationship('ParkingLot', backref=db.backref('tariff', uselist=False, cascade='all, delete-orphan'))
+
+    def to_dict(self):
+        """Converts tariff to dictionary for API responses"""
+        return {
+            'lot_id': self.lot_id,
+            'bands': self.bands,
+            'occupancy_multipliers': self.occupancy_multipliers,
+            'daily_cap': self.daily_cap,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<LotTariff lot {self.lot_id}: {len(self.bands)} bands>'
@@ -0,0 +1,128 @@
+"""
+Monthly Report Models - Saved results of the monthly activity report
+The report is computed once per month by a background job and stored,
+so the admin can look at past months without recomputing anything
+
+Student Project - MAD-II
+"""
+
+from models import db
+from datetime import datetime
+import json
+
+
+def get_month_range(month):
+    """
+    Converts a month string into a date range
+
+    Args:
+        month: Month in 'YYYY-MM' format
+
+    Returns:
+        (start, end) datetimes - start is inclusive, end is exclusive
+    """
+    start = datetime.strptime(month, '%Y-%m')
+    if start.month == 12:
+        end = start.replace(year=start.year + 1, month=1)
+    else:
+        end = start.replace(month=start.month + 1)
+    return start, end
+
+
+def get_previous_month(today=None):
+    """
+    Returns the month before `today` as 'YYYY-MM'
+    The report runs on the 1st, so it always covers the month that just ended
+    """
+    today = today or datetime.utcnow()
+    first_of_month = today.replace(day=1)
+    if first_of_month.month == 1:
+        return f'{first_of_month.year - 1}-12'
+    return f'{first_of_month.year}-{first_of_month.month - 1:02d}'
+
+
+class MonthlyLotReport(db.Model):
+    """
+    Rollup of one parking lot's activity for one calendar month
+    Filled in by the per-lot subtasks of the monthly report job
+    """
+    __tablename__ = 'monthly_lot_reports'
+    __table_args__ = (
+        db.UniqueConstraint('month', 'lot_id', name='uq_monthly_lot_report'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.String(7), nullable=False, index=True)  # 'YYYY-MM'
+    lot_id = db.Column(db.Integer, nullable=False)  # No foreign key - reports outlive deleted lots
+    lot_name = db.Column(db.String(200), nullable=False)
+
+    reservations_made = db.Column(db.Integer, nullable=False, default=0)
+    completed_parkings = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    hours_parked = db.Column(db.Float, nullable=False, default=0.0)
+
+    def to_dict(self):
+        """Converts lot rollup to dictionary for API responses"""
+        return {
+            'lot_id': self.lot_id,
+            'lot_name': self.lot_name,
+            'reservations_made': self.reservations_made,
+            'completed_parkings': self.completed_parkings,
+            'revenue': self.revenue,
+            'hours_parked': round(self.hours_parked, 2)
+        }
+
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<MonthlyLotReport {self.month} - Lot {self.lot_id}>'
+
+
+class MonthlyReport(db.Model):
+    """
+    Summary of the whole system's activity for one calendar month
+    """
+    __tablename__ = 'monthly_reports'
+
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.String(7), unique=True, nullable=False, index=True)  # 'YYYY-MM'
+
+    new_users = db.Column(db.Integer, nullable=False, default=0)
+    reservations_made = db.Column(db.Integer, nullable=False, default=0)
+    completed_parkings = db.Column(db.Integer, nullable=False, default=0)
+    active_parkings = db.Column(db.Integer, nullable=False, default=0)  # Snapshot when generated
+    total_revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+    # Per-lot breakdown stored as JSON so one row is enough to show the report
+    lot_breakdown = db.Column(db.Text, nullable=False, default='[]')
+
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def get_lot_breakdown(self):
+        """Returns the per-lot breakdown as a list of dictionaries"""
+        return json.loads(self.lot_breakdown or '[]')
+
+    def to_dict(self, include_lots=False):
+        """
+        Converts report to dictionary for API responses
+
+        Args:
+            include_lots: Whether to include the per-lot breakdown
+        """
+        report_data = {
+            'month': self.month,
+            'new_users': self.new_users,
+            'reservations_made': self.reservations_made,
+            'completed_parkings': self.completed_parkings,
+            'active_parkings': self.active_parkings,
+            'total_revenue': self.total_revenue,
+            'generated_at': self.generated_at.isoformat() if self.generated_at else None
+        }
+
+        if include_lots:
+            report_data['lots'] = self.get_lot_breakdown()
+
+        return report_data
+
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<MonthlyReport {self.month}>'
@@ -7,6 +7,7 @@ Student: MAD-II Project
 
 from models import db
 from datetime import datetime
+from sqlalchemy import DDL, event
 
 class ParkingLot(db.Model):
     """
@@ -20,15 +21,25 @@ class ParkingLot(db.Model):
     prime_location_name = db.Column(db.String(200), nullable=False)
     
     # Pricing information (per hour)
-    price_per_hour = db.Column(db.Float, nullable=False)
+    price_per_hour = db.Column(db.Float, nullable=False, index=True)
     
     # Location details
     address = db.Column(db.Text, nullable=False)
-    pin_code = db.Column(db.String(10), nullable=False)
+    pin_code = db.Column(db.String(10), nullable=False, index=True)
+    
+    # Map position in degrees (optional - lots without it are not found by
+    # the "nearby" search, see utils/geo_index.py)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
     
     # Capacity information
     number_of_spots = db.Column(db.Integer, nullable=False)
     
+    # Free spots right now - kept up to date by database triggers on
+    # parking_spots (see models/parking_spot.py), so searches can filter and
+    # sort on it without counting spots. Never set it from Python.
+    available_spots = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+    
     # Tracking timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -55,6 +66,33 @@ class ParkingLot(db.Model):
         """
         return self.spots.filter_by(status='occupied').count()
     
+    @staticmethod
+    def get_spot_counts(lot_ids=None):
+        """
+        Counts available and occupied spots for every lot in ONE query
+        Use this for lists of lots instead of calling the count methods
+        above for each lot (that would be two extra queries per lot)
+        
+        Args:
+            lot_ids: Only count these lots (default: all lots)
+        
+        Returns:
+            Dictionary like {lot_id: {'available': 3, 'occupied': 2}}
+        """
+        from models.parking_spot import ParkingSpot
+        
+        query = db.session.query(
+            ParkingSpot.lot_id, ParkingSpot.status, db.func.count(ParkingSpot.id)
+        )
+        if lot_ids is not None:
+            query = query.filter(ParkingSpot.lot_id.in_(lot_ids))
+        rows = query.group_by(ParkingSpot.lot_id, ParkingSpot.status).all()
+        
+        counts = {}
+        for lot_id, status, count in rows:
+            counts.setdefault(lot_id, {'available': 0, 'occupied': 0})[status] = count
+        return counts
+    
     def can_delete(self):
         """
         Checks if this lot can be safely deleted
@@ -65,25 +103,39 @@ class ParkingLot(db.Model):
         """
         return self.get_occupied_spots_count() == 0
     
-    def to_dict(self, include_spots_details=False):
+    def to_dict(self, include_spots_details=False, spot_counts=None):
         """
         Converts lot to dictionary for API responses
         
         Args:
             include_spots_details: Whether to include full spot information
+            spot_counts: Counts for this lot from get_spot_counts() (saves two queries)
             
         Returns:
             Dictionary with lot data
         """
+        from utils.pricing import make_price_lookup
+        
+        if spot_counts is None:
+            spot_counts = {
+                'available': self.get_available_spots_count(),
+                'occupied': self.get_occupied_spots_count()
+            }
+        price_now = make_price_lookup()
+        
         lot_data = {
             'id': self.id,
             'prime_location_name': self.prime_location_name,
             'price_per_hour': self.price_per_hour,
+            'current_price_per_hour': price_now(self.id, self.price_per_hour,
+                                                spot_counts.get('available', 0), self.number_of_spots),
             'address': self.address,
             'pin_code': self.pin_code,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
             'number_of_spots': self.number_of_spots,
-            'available_spots': self.get_available_spots_count(),
-            'occupied_spots': self.get_occupied_spots_count(),
+            'available_spots': spot_counts.get('available', 0),
+            'occupied_spots': spot_counts.get('occupied', 0),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -97,3 +149,42 @@ class ParkingLot(db.Model):
     def __repr__(self):
         """String representation for debugging"""
         return f'<ParkingLot {self.prime_location_name} - {self.number_of_spots} spots>'
+
+
+# ============================================================================
+# FULL-TEXT SEARCH INDEX (used by utils/lot_search.py)
+# ============================================================================
+
+# External content table: the index stores only the words, the text itself
+# stays in parking_lots. prefix='2 3' adds extra indexes for short prefixes.
+# The triggers keep it up to date for every kind of write (ORM or plain SQL).
+SEARCH_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE parking_lots_fts USING fts5(
+        prime_location_name, address,
+        content='parking_lots', content_rowid='id', prefix='2 3'
+    )""",
+    """CREATE TRIGGER parking_lots_fts_insert AFTER INSERT ON parking_lots BEGIN
+        INSERT INTO parking_lots_fts (rowid, prime_location_name, address)
+        VALUES (new.id, new.prime_location_name, new.address);
+    END""",
+    """CREATE TRIGGER parking_lots_fts_delete AFTER DELETE ON parking_lots BEGIN
+        INSERT INTO parking_lots_fts (parking_lots_fts, rowid, prime_location_name, address)
+        VALUES ('delete', old.id, old.prime_location_name, old.address);
+    END""",
+    # Only when the text changes - not when a spot trigger changes available_spots
+    """CREATE TRIGGER parking_lots_fts_update
+    AFTER UPDATE OF prime_location_name, address ON parking_lots BEGIN
+        INSERT INTO parking_lots_fts (parking_lots_fts, rowid, prime_location_name, address)
+        VALUES ('delete', old.id, old.prime_location_name, old.address);
+        INSERT INTO parking_lots_fts (rowid, prime_location_name, address)
+        VALUES (new.id, new.prime_location_name, new.address);
+    END""",
+]
+
+for _statement in SEARCH_INDEX_DDL:
+    event.listen(ParkingLot.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+
+# db.drop_all() does not know the FTS table (the triggers go with their table)
+event.listen(ParkingLot.__table__, 'before_drop',
+             DDL('DROP TABLE IF EXISTS parking_lots_fts').execute_if(dialect='sqlite'))
+
@@ -7,6 +7,7 @@ MAD-II Student Project
 
 from models import db
 from datetime import datetime
+from sqlalchemy import DDL, event
 
 class ParkingSpot(db.Model):
     """
@@ -24,7 +25,7 @@ class ParkingSpot(db.Model):
     status = db.Column(db.String(20), nullable=False, default='available')
     
     # When this spot was created
-    created_at = db.Column(db.Integer, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationship: One spot can have many reservations over time
     reservations = db.relationship('Reservation', backref='spot', lazy='dynamic', 
@@ -85,3 +86,34 @@ class ParkingSpot(db.Model):
     def __repr__(self):
         """String representation for debugging"""
         return f'<ParkingSpot #{self.spot_number} in Lot {self.lot_id} - {self.status}>'
+
+
+# ============================================================================
+# FREE SPOT COUNTER (parking_lots.available_spots)
+# ============================================================================
+
+# Triggers run inside SQLite in the same transaction as the spot change, so
+# the counter is also right after bulk UPDATEs (hold sweeper) and plain
+# INSERTs (synthetic data generator) that skip the ORM
+AVAILABLE_SPOTS_DDL = [
+    """CREATE TRIGGER parking_spots_available_insert
+    AFTER INSERT ON parking_spots WHEN new.status = 'available' BEGIN
+        UPDATE parking_lots SET available_spots = available_spots + 1 WHERE id = new.lot_id;
+    END""",
+    """CREATE TRIGGER parking_spots_available_delete
+    AFTER DELETE ON parking_spots WHEN old.status = 'available' BEGIN
+        UPDATE parking_lots SET available_spots = available_spots - 1 WHERE id = old.lot_id;
+    END""",
+    """CREATE TRIGGER parking_spots_available_update
+    AFTER UPDATE OF status, lot_id ON parking_spots
+    WHEN (old.status = 'available') != (new.status = 'available') OR old.lot_id != new.lot_id BEGIN
+        UPDATE parking_lots SET available_spots = available_spots - 1
+        WHERE id = old.lot_id AND old.status = 'available';
+        UPDATE parking_lots SET available_spots = available_spots + 1
+        WHERE id = new.lot_id AND new.status = 'available';
+    END""",
+]
+
+for _statement in AVAILABLE_SPOTS_DDL:
+    event.listen(ParkingSpot.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+
@@ -9,12 +9,30 @@ from models import db
 from datetime import datetime
 import math
 
+def format_duration(parking_timestamp, leaving_timestamp):
+    """
+    Returns human-readable duration like "2h 30m"
+    Shared by live and archived reservations
+    """
+    if not parking_timestamp or not leaving_timestamp:
+        return "Not yet completed"
+    
+    time_diff = leaving_timestamp - parking_timestamp
+    hours = int(time_diff.total_seconds() // 3600)
+    minutes = int((time_diff.total_seconds() % 3600) // 60)
+    
+    return f"{hours}h {minutes}m"
+
 class Reservation(db.Model):
     """
     Keeps track of parking reservations
     Handles the complete lifecycle: reserve → park → leave
     """
     __tablename__ = 'reservations'
+    __table_args__ = (
+        # Lets the expiry sweeper find old 'reserved' holds without a table scan
+        db.Index('ix_reservations_status_reserved_at', 'status', 'reserved_at'),
+    )
     
     # Primary identification
     id = db.Column(db.Integer, primary_key=True)
@@ -24,16 +42,22 @@ class Reservation(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
     # Important timestamps for tracking
-    reserved_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # (reserved_at and leaving_timestamp are indexed for monthly date-range reports)
+    reserved_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     parking_timestamp = db.Column(db.DateTime, nullable=True)  # When user actually parks
-    leaving_timestamp = db.Column(db.DateTime, nullable=True)  # When user leaves
+    leaving_timestamp = db.Column(db.DateTime, nullable=True, index=True)  # When user leaves
     
     # Status tracking: 'reserved' → 'active' → 'completed'
+    # (or 'reserved' → 'expired' if the user never shows up)
     status = db.Column(db.String(20), nullable=False, default='reserved')
     
     # Cost information (calculated when leaving)
     parking_cost = db.Column(db.Float, nullable=True)
     
+    # Occupancy surcharge of the lot's tariff when the spot was reserved
+    # (the price the user saw - see utils/pricing.py). None = no surcharge.
+    price_multiplier = db.Column(db.Float, nullable=True)
+    
     # Optional notes
     remarks = db.Column(db.Text, nullable=True)
     
@@ -54,13 +78,15 @@ class Reservation(db.Model):
         
         return hours
     
-    def calculate_cost(self, hourly_rate):
+    def calculate_cost(self, hourly_rate, tariff=None):
         """
         Calculates parking cost based on duration
         We round UP to the nearest hour for billing
         
         Args:
             hourly_rate: Price per hour for this parking lot
+            tariff: The lot's CompiledTariff (utils/pricing.py) for time-of-day
+                    bands and the daily cap - None means a flat rate
             
         Returns:
             Total cost in rupees
@@ -70,8 +96,16 @@ class Reservation(db.Model):
         # Round up to nearest hour (even 10 min = 1 hour charge)
         billable_hours = math.ceil(hours_parked) if hours_parked > 0 else 0
         
-        total_cost = billable_hours * hourly_rate
-        return total_cost
+        # Surcharge locked in when the spot was reserved
+        if self.price_multiplier is not None:
+            hourly_rate = hourly_rate * self.price_multiplier
+        
+        if tariff is None or tariff.is_flat:
+            return billable_hours * hourly_rate
+        
+        # Priced band by band across the stay (O(bands), not hour by hour)
+        from utils.pricing import to_local_time
+        return tariff.stay_cost(hourly_rate, to_local_time(self.parking_timestamp), billable_hours)
     
     def get_duration_string(self):
         """
@@ -80,14 +114,7 @@ class Reservation(db.Model):
         Returns:
             String representation of duration
         """
-        if not self.parking_timestamp or not self.leaving_timestamp:
-            return "Not yet completed"
-        
-        time_diff = self.leaving_timestamp - self.parking_timestamp
-        hours = int(time_diff.total_seconds() // 3600)
-        minutes = int((time_diff.total_seconds() % 3600) // 60)
-        
-        return f"{hours}h {minutes}m"
+        return format_duration(self.parking_timestamp, self.leaving_timestamp)
     
     def to_dict(self, include_full_details=False):
         """
@@ -0,0 +1,51 @@
+"""
+Reservation Archive Model - Old completed reservations
+Completed reservations older than ARCHIVE_AFTER_DAYS are moved here by a
+background job, so the live 'reservations' table stays small and fast
+
+Student Project - MAD-II
+"""
+
+from models import db
+from models.reservation import format_duration
+from datetime import datetime
+
+class ReservationArchive(db.Model):
+    """
+    Cold storage for completed reservations
+
+    Lot and spot details are copied in when a row is archived, so the
+    history still makes sense after a lot or spot has been deleted.
+    """
+    __tablename__ = 'reservations_archive'
+
+    # Same ID as the original reservation
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+    # No foreign keys - archived rows outlive deleted spots and lots
+    spot_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    lot_id = db.Column(db.Integer, nullable=True, index=True)
+
+    # Copied from the spot and lot at archive time
+    spot_number = db.Column(db.Integer, nullable=True)
+    lot_name = db.Column(db.String(200), nullable=True)
+    lot_address = db.Column(db.Text, nullable=True)
+    price_per_hour = db.Column(db.Float, nullable=True)
+
+    reserved_at = db.Column(db.DateTime, nullable=False, index=True)
+    parking_timestamp = db.Column(db.DateTime, nullable=True)
+    leaving_timestamp = db.Column(db.DateTime, nullable=True, index=True)
+    status = db.Column(db.String(20), nullable=False, default='completed')
+    parking_cost = db.Column(db.Float, nullable=True)
+    remarks = db.Column(db.Text, nullable=True)
+
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def get_duration_string(self):
+        """Returns human-readable duration like "2h 30m\""""
+        return format_duration(self.parking_timestamp, self.leaving_timestamp)
+
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<ReservationArchive #{self.id} - User:{self.user_id}>'
@@ -0,0 +1,39 @@
+"""
+Spot Event Model - Append-only log of spot status changes
+Every time a spot is created, changes status or is removed, one row is
+added in the same transaction. Gate displays and dashboards read the log
+from their last sequence number instead of downloading all spots again.
+
+Student Project - MAD-II
+"""
+
+from models import db
+from datetime import datetime
+
+class SpotEvent(db.Model):
+    """
+    One change of one parking spot
+
+    seq is the position in the log. AUTOINCREMENT makes SQLite never reuse
+    a number, and because SQLite has a single writer, events become visible
+    in seq order - a reader never sees seq 12 before seq 11 is committed.
+    """
+    __tablename__ = 'spot_events'
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    seq = db.Column(db.Integer, primary_key=True)
+
+    # No foreign keys - events outlive removed spots and lots
+    spot_id = db.Column(db.Integer, nullable=False, index=True)
+    lot_id = db.Column(db.Integer, nullable=True)
+    spot_number = db.Column(db.Integer, nullable=True)
+
+    # 'available' / 'occupied' after the change, or 'removed' if the spot was deleted
+    status = db.Column(db.String(20), nullable=False)
+    previous_status = db.Column(db.String(20), nullable=True)  # None for new spots (or unknown)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        """String representation for debugging"""
+        return f'<SpotEvent #{self.seq} spot {self.spot_id}: {self.previous_status} → {self.status}>'
@@ -28,7 +28,7 @@ class User(db.Model):
     role = db.Column(db.String(20), nullable=False, default='user')
     
     # Timestamps for tracking
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     last_booking_date = db.Column(db.DateTime, nullable=True)  # For reminder system
     
     # Relationship: One user can have many reservations
@@ -2,17 +2,30 @@
 Admin routes
 Handles admin-specific operations: lot/spot management, user listing, analytics
 """
-from flask import Blueprint, request, jsonify
+import os
+from flask import Blueprint, request, jsonify, current_app, send_from_directory
 from flask_jwt_extended import jwt_required
 from models import db
-from models.user import User
 from models.parking_lot import ParkingLot
 from models.parking_spot import ParkingSpot
-from models.reservation import Reservation
+from models.lot_tariff import LotTariff
+from models.monthly_report import MonthlyReport
+from models.invoice import Invoice
 from utils.auth_utils import admin_required
-from utils.cache import invalidate_cache
+from utils.http_cache import versioned_etag
+from utils.live_updates import publish_availability
+from utils.db_routing import read_replica
+from utils.task_dispatch import dispatch, get_dispatch_stats
+from utils.archive import reservations_query, get_date_range_args
+from utils.serializers import (json_response, serialize_lots, serialize_occupancy,
+                               serialize_spots, serialize_users, serialize_reservation_rows)
+from utils.profiler import list_profiles, is_valid_profile_name
+from utils.slow_queries import top_slow_queries
+from utils.change_feed import get_changes, get_last_seq, get_feed_floor
+from utils.geo_index import parse_coordinates
+from utils.pricing import compile_tariff, pricing_period
 from datetime import datetime, timedelta
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -23,13 +36,15 @@ admin_bp = Blueprint('admin', __name__)
 @admin_bp.route('/lots', methods=['GET'])
 @jwt_required()
 @admin_required()
+@read_replica()
+@versioned_etag('admin:lots', period=pricing_period)
 def get_all_lots():
     """Get all parking lots"""
-    lots = ParkingLot.query.all()
-    return jsonify({
-        'lots': [lot.to_dict() for lot in lots],
+    lots = serialize_lots()  # Lot columns + one query for all spot counts
+    return json_response({
+        'lots': lots,
         'total': len(lots)
-    }), 200
+    })
 
 @admin_bp.route('/lots', methods=['POST'])
 @jwt_required()
@@ -51,12 +66,20 @@ def create_lot():
     except ValueError:
         return jsonify({'error': 'Invalid number of spots'}), 400
     
+    # Map position is optional (needed for the "nearby lots" search)
+    try:
+        latitude, longitude = parse_coordinates(data.get('latitude'), data.get('longitude'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Create parking lot
     lot = ParkingLot(
         prime_location_name=data['prime_location_name'],
         price_per_hour=float(data['price_per_hour']),
         address=data['address'],
         pin_code=data['pin_code'],
+        latitude=latitude,
+        longitude=longitude,
         number_of_spots=number_of_spots
     )
     
@@ -75,9 +98,7 @@ def create_lot():
         
         db.session.commit()
         
-        # Invalidate cache
-        invalidate_cache('user:lots:available:*')
-        invalidate_cache('admin:spots:*')
+        publish_availability([lot.id])  # Live streams see the new lot
         
         return jsonify({
             'message': 'Parking lot created successfully',
@@ -110,6 +131,12 @@ def update_lot(lot_id):
             lot.address = data['address']
         if 'pin_code' in data:
             lot.pin_code = data['pin_code']
+        if 'latitude' in data or 'longitude' in data:
+            # Send both (or both as null to remove the position)
+            try:
+                lot.latitude, lot.longitude = parse_coordinates(data.get('latitude'), data.get('longitude'))
+            except (TypeError, ValueError) as e:
+                return jsonify({'error': str(e)}), 400
         
         # Update number of spots (add/remove spots)
         if 'number_of_spots' in data:
@@ -139,9 +166,7 @@ def update_lot(lot_id):
         lot.updated_at = datetime.utcnow()
         db.session.commit()
         
-        # Invalidate cache
-        invalidate_cache('user:lots:available:*')
-        invalidate_cache('admin:spots:*')
+        publish_availability([lot.id])
         
         return jsonify({
             'message': 'Parking lot updated successfully',
@@ -174,9 +199,7 @@ def delete_lot(lot_id):
         db.session.delete(lot)
         db.session.commit()
         
-        # Invalidate cache
-        invalidate_cache('user:lots:available:*')
-        invalidate_cache('admin:spots:*')
+        publish_availability([lot_id])  # Counts are now 0 - streams drop the lot
         
         return jsonify({'message': 'Parking lot deleted successfully'}), 200
     
@@ -184,6 +207,84 @@ def delete_lot(lot_id):
         db.session.rollback()
         return jsonify({'error': 'Failed to delete parking lot', 'details': str(e)}), 500
 
+# ============================================================================
+# DYNAMIC PRICING
+# ============================================================================
+
+@admin_bp.route('/lots/<int:lot_id>/tariff', methods=['GET'])
+@jwt_required()
+@admin_required()
+def get_lot_tariff(lot_id):
+    """Get the pricing rules of a lot (null tariff = flat price_per_hour)"""
+    lot = ParkingLot.query.get(lot_id)
+    if not lot:
+        return jsonify({'error': 'Parking lot not found'}), 404
+    
+    tariff = LotTariff.query.get(lot_id)
+    return jsonify({
+        'lot_id': lot_id,
+        'price_per_hour': lot.price_per_hour,
+        'tariff': tariff.to_dict() if tariff else None
+    }), 200
+
+@admin_bp.route('/lots/<int:lot_id>/tariff', methods=['PUT'])
+@jwt_required()
+@admin_required()
+def set_lot_tariff(lot_id):
+    """
+    Set the pricing rules of a lot (see models/lot_tariff.py for the format)
+    Reservations made before keep their surcharge; stays are billed with
+    the bands and cap that apply when the user leaves.
+    """
+    lot = ParkingLot.query.get(lot_id)
+    if not lot:
+        return jsonify({'error': 'Parking lot not found'}), 404
+    
+    data = request.get_json() or {}
+    bands = data.get('bands') or []
+    occupancy_multipliers = data.get('occupancy_multipliers') or []
+    daily_cap = data.get('daily_cap')
+    
+    # Check the rules before saving them
+    try:
+        if not isinstance(bands, list) or not isinstance(occupancy_multipliers, list):
+            raise ValueError('bands and occupancy_multipliers must be lists')
+        compile_tariff(bands, occupancy_multipliers, daily_cap)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        tariff = LotTariff.query.get(lot_id) or LotTariff(lot_id=lot_id)
+        tariff.bands = bands
+        tariff.occupancy_multipliers = occupancy_multipliers
+        tariff.daily_cap = float(daily_cap) if daily_cap is not None else None
+        db.session.add(tariff)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Tariff saved successfully',
+            'tariff': tariff.to_dict(),
+            'lot': lot.to_dict()
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to save tariff', 'details': str(e)}), 500
+
+@admin_bp.route('/lots/<int:lot_id>/tariff', methods=['DELETE'])
+@jwt_required()
+@admin_required()
+def delete_lot_tariff(lot_id):
+    """Remove the pricing rules - the lot goes back to its flat price"""
+    tariff = LotTariff.query.get(lot_id)
+    if not tariff:
+        return jsonify({'error': 'This lot has no tariff'}), 404
+    
+    db.session.delete(tariff)
+    db.session.commit()
+    
+    return jsonify({'message': 'Tariff removed, flat price applies'}), 200
+
 # ============================================================================
 # PARKING SPOT MANAGEMENT
 # ============================================================================
@@ -191,39 +292,82 @@ def delete_lot(lot_id):
 @admin_bp.route('/spots', methods=['GET'])
 @jwt_required()
 @admin_required()
+@read_replica()
+@versioned_etag('admin:spots')
 def get_all_spots():
     """Get all parking spots with optional filtering"""
     lot_id = request.args.get('lot_id', type=int)
     status = request.args.get('status')
     
-    query = ParkingSpot.query
-    
-    if lot_id:
-        query = query.filter_by(lot_id=lot_id)
-    if status:
-        query = query.filter_by(status=status)
+    # Read before the spots: a change that lands in between is sent again
+    # by /changes, which is harmless (events hold the new status)
+    last_seq = get_last_seq()
     
-    spots = query.all()
+    # Spots and their active reservations in one query (not one query per spot)
+    spots = serialize_spots(lot_id=lot_id, status=status)
     
-    return jsonify({
-        'spots': [spot.to_dict(include_reservation=True) for spot in spots],
-        'total': len(spots)
-    }), 200
+    return json_response({
+        'spots': spots,
+        'total': len(spots),
+        'last_seq': last_seq  # Pass as ?since= to /changes to get what changed after this
+    })
 
 @admin_bp.route('/spots/<int:spot_id>', methods=['GET'])
 @jwt_required()
 @admin_required()
+@read_replica()
 def get_spot_details(spot_id):
     """Get specific spot details including current vehicle info"""
     spot = ParkingSpot.query.get(spot_id)
     if not spot:
         return jsonify({'error': 'Parking spot not found'}), 404
     
-    spot_data = spot.to_dict(include_reservation=True)
+    spot_data = spot.to_dict(include_reservation_info=True)
     spot_data['lot'] = spot.lot.to_dict() if spot.lot else None
     
     return jsonify({'spot': spot_data}), 200
 
+# ============================================================================
+# CHANGE FEED
+# ============================================================================
+
+@admin_bp.route('/changes', methods=['GET'])
+@jwt_required()
+@admin_required()
+def get_spot_changes():
+    """
+    Spot changes after a sequence number (see utils/change_feed.py)
+    Reads the primary, so a change is visible as soon as it is committed.
+    
+    Query params:
+        since: Last seq the consumer has seen (default 0 = from the start)
+        limit: Events per batch (default 500, at most CHANGE_FEED_MAX_BATCH)
+    """
+    since = request.args.get('since', 0, type=int)
+    limit = request.args.get('limit', 500, type=int)
+    limit = max(1, min(limit, current_app.config['CHANGE_FEED_MAX_BATCH']))
+    
+    if since < 0:
+        return jsonify({'error': 'since must be 0 or more'}), 400
+    
+    # Events this consumer needed were compacted away - it has to start over
+    floor = get_feed_floor()
+    if since < floor:
+        return jsonify({
+            'error': 'Changes before this sequence number were compacted',
+            'floor': floor,
+            'resync': 'GET /api/admin/spots, then continue from its last_seq'
+        }), 410
+    
+    changes, has_more = get_changes(since, limit)
+    
+    return json_response({
+        'changes': changes,
+        'since': since,
+        'next_since': changes[-1]['seq'] if changes else since,
+        'has_more': has_more
+    })
+
 # ============================================================================
 # USER MANAGEMENT
 # ============================================================================
@@ -231,23 +375,17 @@ def get_spot_details(spot_id):
 @admin_bp.route('/users', methods=['GET'])
 @jwt_required()
 @admin_required()
+@read_replica()
 def get_all_users():
     """Get all registered users"""
-    users = User.query.filter_by(role='user').all()
-    
-    # Get reservation stats for each user
-    users_data = []
-    for user in users:
-        user_dict = user.to_dict(include_email=True)
-        user_dict['total_reservations'] = user.reservations.count()
-        user_dict['active_reservations'] = user.reservations.filter_by(status='active').count()
-        user_dict['completed_reservations'] = user.reservations.filter_by(status='completed').count()
-        users_data.append(user_dict)
+    # User columns + reservation counts per user (live and archived) in
+    # three queries, instead of three COUNT queries per user
+    users = serialize_users()
     
-    return jsonify({
-        'users': users_data,
-        'total': len(users_data)
-    }), 200
+    return json_response({
+        'users': users,
+        'total': len(users)
+    })
 
 # ============================================================================
 # RESERVATION MANAGEMENT
@@ -256,27 +394,26 @@ def get_all_users():
 @admin_bp.route('/reservations', methods=['GET'])
 @jwt_required()
 @admin_required()
+@read_replica()
 def get_all_reservations():
-    """Get all reservations with optional filtering"""
+    """Get all reservations with optional filtering (includes archived ones when needed)"""
     status = request.args.get('status')
     user_id = request.args.get('user_id', type=int)
     lot_id = request.args.get('lot_id', type=int)
+    try:
+        start, end = get_date_range_args()
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
     
-    query = Reservation.query
-    
-    if status:
-        query = query.filter_by(status=status)
-    if user_id:
-        query = query.filter_by(user_id=user_id)
-    if lot_id:
-        query = query.join(ParkingSpot).filter(ParkingSpot.lot_id == lot_id)
-    
-    reservations = query.order_by(Reservation.reserved_at.desc()).all()
+    rows = reservations_query(user_id=user_id, status=status, lot_id=lot_id, start=start, end=end)
+    reservations = db.session.execute(
+        select(rows).order_by(rows.c.reserved_at.desc(), rows.c.id.desc())
+    ).all()
     
-    return jsonify({
-        'reservations': [res.to_dict(include_details=True) for res in reservations],
+    return json_response({
+        'reservations': serialize_reservation_rows(reservations),
         'total': len(reservations)
-    }), 200
+    })
 
 # ============================================================================
 # ANALYTICS
@@ -285,71 +422,241 @@ def get_all_reservations():
 @admin_bp.route('/analytics/revenue', methods=['GET'])
 @jwt_required()
 @admin_required()
+@read_replica()
 def get_revenue_analytics():
-    """Get revenue analytics"""
-    # Get completed reservations with costs
-    completed_reservations = Reservation.query.filter_by(status='completed').all()
+    """Get revenue analytics (live + archived reservations)"""
+    completed = reservations_query(status='completed')
     
-    total_revenue = sum(res.parking_cost for res in completed_reservations if res.parking_cost)
+    # Totals are computed in the database instead of loading every reservation
+    total_completed, total_revenue = db.session.query(
+        func.count(),
+        func.coalesce(func.sum(completed.c.parking_cost), 0)
+    ).select_from(completed).one()
     
     # Revenue by lot
     revenue_by_lot = db.session.query(
-        ParkingLot.prime_location_name,
-        func.sum(Reservation.parking_cost).label('revenue')
-    ).join(ParkingSpot).join(Reservation).filter(
-        Reservation.status == 'completed',
-        Reservation.parking_cost.isnot(None)
-    ).group_by(ParkingLot.id).all()
+        completed.c.lot_name,
+        func.sum(completed.c.parking_cost).label('revenue')
+    ).filter(
+        completed.c.parking_cost.isnot(None),
+        completed.c.lot_id.isnot(None)
+    ).group_by(completed.c.lot_id).all()
     
-    return jsonify({
-        'total_revenue': total_revenue,
-        'total_completed_reservations': len(completed_reservations),
+    return json_response({
+        'total_revenue': float(total_revenue),
+        'total_completed_reservations': total_completed,
         'revenue_by_lot': [
             {'lot_name': name, 'revenue': float(revenue)} 
             for name, revenue in revenue_by_lot
         ]
-    }), 200
+    })
 
 @admin_bp.route('/analytics/occupancy', methods=['GET'])
 @jwt_required()
 @admin_required()
+@read_replica()
+@versioned_etag('admin:occupancy')
 def get_occupancy_analytics():
     """Get occupancy statistics"""
-    lots = ParkingLot.query.all()
-    
-    occupancy_data = []
-    for lot in lots:
-        total_spots = lot.number_of_spots
-        occupied = lot.get_occupied_spots_count()
-        available = lot.get_available_spots_count()
-        occupancy_rate = (occupied / total_spots * 100) if total_spots > 0 else 0
-        
-        occupancy_data.append({
-            'lot_id': lot.id,
-            'lot_name': lot.prime_location_name,
-            'total_spots': total_spots,
-            'occupied_spots': occupied,
-            'available_spots': available,
-            'occupancy_rate': round(occupancy_rate, 2)
-        })
-    
-    return jsonify({'occupancy_data': occupancy_data}), 200
+    return json_response({'occupancy_data': serialize_occupancy()})
 
 @admin_bp.route('/analytics/popular-lots', methods=['GET'])
 @jwt_required()
 @admin_required()
+@read_replica()
 def get_popular_lots():
-    """Get most popular parking lots by reservation count"""
+    """Get most popular parking lots by reservation count (live + archived reservations)"""
+    rows = reservations_query()
+    
     popular_lots = db.session.query(
-        ParkingLot.prime_location_name,
-        func.count(Reservation.id).label('reservation_count')
-    ).join(ParkingSpot).join(Reservation).group_by(
-        ParkingLot.id
-    ).order_by(func.count(Reservation.id).desc()).limit(10).all()
+        rows.c.lot_name,
+        func.count(rows.c.id).label('reservation_count')
+    ).filter(
+        rows.c.lot_id.isnot(None)
+    ).group_by(
+        rows.c.lot_id
+    ).order_by(func.count(rows.c.id).desc()).limit(10).all()
     
-    return jsonify({
+    return json_response({
         'popular_lots': [
             {'lot_name': name, 'reservation_count': count}
             for name, count in popular_lots
         ]
+    })
+
+# ============================================================================
+# MONTHLY REPORTS (computed by the background job, just read here)
+# ============================================================================
+
+@admin_bp.route('/reports/monthly', methods=['GET'])
+@jwt_required()
+@admin_required()
+@read_replica()
+def get_monthly_reports():
+    """List saved monthly reports, newest first"""
+    reports = MonthlyReport.query.order_by(MonthlyReport.month.desc()).all()
+    
+    return jsonify({
+        'reports': [report.to_dict() for report in reports],
+        'total': len(reports)
+    }), 200
+
+@admin_bp.route('/reports/monthly/<string:month>', methods=['GET'])
+@jwt_required()
+@admin_required()
+@read_replica()
+def get_monthly_report(month):
+    """Get one saved monthly report (month as YYYY-MM) with the per-lot breakdown"""
+    report = MonthlyReport.query.filter_by(month=month).first()
+    if not report:
+        return jsonify({'error': 'Report not found for this month'}), 404
+    
+    return jsonify({'report': report.to_dict(include_lots=True)}), 200
+
+# ============================================================================
+# BILLING (re-billing and invoices run as background jobs, see utils/billing.py)
+# ============================================================================
+
+def _is_month(month):
+    """True for 'YYYY-MM'"""
+    try:
+        datetime.strptime(month, '%Y-%m')
+        return len(month) == 7
+    except ValueError:
+        return False
+
+@admin_bp.route('/billing/rebill', methods=['POST'])
+@jwt_required()
+@admin_required()
+def rebill():
+    """
+    Recompute parking costs with today's prices and tariffs
+    Body (all optional): {"lot_ids": [1, 2], "start_date": "2026-09-01",
+    "end_date": "2026-09-30", "dry_run": true} - dates are when the stay ended
+    """
+    data = request.get_json(silent=True) or {}
+    lot_ids = data.get('lot_ids')
+    if lot_ids is not None and (not isinstance(lot_ids, list)
+                                or not all(isinstance(lot_id, int) for lot_id in lot_ids)):
+        return jsonify({'error': 'lot_ids must be a list of lot IDs'}), 400
+    for key in ('start_date', 'end_date'):
+        if data.get(key):
+            try:
+                datetime.strptime(data[key], '%Y-%m-%d')
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+    
+    from tasks import rebill_reservations_task
+    job = dispatch(rebill_reservations_task, lot_ids, data.get('start_date'), data.get('end_date'),
+                   bool(data.get('dry_run')))
+    
+    return jsonify({
+        'message': 'Re-billing started',
+        'status': 'processing',
+        'task_id': job['task_id']
+    }), 200
+
+@admin_bp.route('/billing/invoices/<string:month>', methods=['POST'])
+@jwt_required()
+@admin_required()
+def regenerate_invoices(month):
+    """(Re)build every user's invoice for a month, e.g. after re-billing"""
+    if not _is_month(month):
+        return jsonify({'error': 'Month must be in YYYY-MM format'}), 400
+    
+    from tasks import generate_monthly_invoices
+    job = dispatch(generate_monthly_invoices, month)
+    
+    return jsonify({
+        'message': f'Invoices for {month} are being generated',
+        'status': 'processing',
+        'task_id': job['task_id']
     }), 200
+
+@admin_bp.route('/billing/invoices/<string:month>', methods=['GET'])
+@jwt_required()
+@admin_required()
+@read_replica()
+def get_month_invoices(month):
+    """Invoices of one month, biggest first (paginated)"""
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 50, type=int)
+    if page < 1 or per_page < 1:
+        # per_page=-1 would become LIMIT -1 (no limit) in SQLite
+        return jsonify({'error': 'page and per_page must be 1 or more'}), 400
+    per_page = min(per_page, 500)
+    
+    total, total_amount = db.session.query(
+        func.count(Invoice.id), func.coalesce(func.sum(Invoice.total_amount), 0.0)
+    ).filter(Invoice.month == month).one()
+    invoices = Invoice.query.filter_by(month=month).order_by(
+        Invoice.total_amount.desc(), Invoice.user_id
+    ).limit(per_page).offset((page - 1) * per_page).all()
+    
+    return jsonify({
+        'month': month,
+        'invoices': [invoice.to_dict() for invoice in invoices],
+        'total': total,
+        'total_amount': round(total_amount, 2),
+        'page': page,
+        'per_page': per_page
+    }), 200
+
+# ============================================================================
+# PROFILES OF SLOW REQUESTS AND SLOW QUERIES
+# ============================================================================
+
+@admin_bp.route('/profiles', methods=['GET'])
+@jwt_required()
+@admin_required()
+def get_profiles():
+    """List recent request profiles (newest first)"""
+    limit = request.args.get('limit', 50, type=int)
+    profiles = list_profiles(current_app.config['PROFILE_DIR'], limit)
+    
+    return jsonify({
+        'enabled': current_app.config['PROFILING_ENABLED'],
+        'profiles': profiles,
+        'total': len(profiles)
+    }), 200
+
+@admin_bp.route('/profiles/<string:name>', methods=['GET'])
+@jwt_required()
+@admin_required()
+def download_profile(name):
+    """Download one profile (collapsed stacks, open it in speedscope.app or flamegraph.pl)"""
+    if not is_valid_profile_name(name):
+        return jsonify({'error': 'Invalid profile name'}), 400
+    
+    directory = current_app.config['PROFILE_DIR']
+    if not os.path.isfile(os.path.join(directory, name)):
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    return send_from_directory(directory, name, mimetype='text/plain', as_attachment=True)
+
+@admin_bp.route('/slow-queries', methods=['GET'])
+@jwt_required()
+@admin_required()
+def get_slow_queries():
+    """SQL statements from the slow query log that took the most total time"""
+    limit = request.args.get('limit', 20, type=int)
+    config = current_app.config
+    queries = top_slow_queries(config['SLOW_QUERY_LOG_PATH'], config['SLOW_QUERY_LOG_BACKUPS'], limit)
+    
+    return jsonify({
+        'enabled': config['SLOW_QUERY_LOG_ENABLED'],
+        'threshold_ms': config['SLOW_QUERY_THRESHOLD_MS'],
+        'queries': queries,
+        'total': len(queries)
+    }), 200
+
+# ============================================================================
+# BACKGROUND TASKS
+# ============================================================================
+
+@admin_bp.route('/tasks/stats', methods=['GET'])
+@jwt_required()
+@admin_required()
+def get_task_stats():
+    """Queue depth and task latency of the background task backend"""
+    return jsonify(get_dispatch_stats()), 200
@@ -7,10 +7,12 @@ from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identi
 from models import db
 from models.user import User
 from utils.auth_utils import get_current_user
+from utils.rate_limit import rate_limit, request_field
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/register', methods=['POST'])
+@rate_limit('register')
 def register():
     """Register a new user"""
     data = request.get_json()
@@ -40,7 +42,7 @@ def register():
         db.session.commit()
         
         # Auto-login: create access token
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=str(user.id))  # JWT subject must be a string
         
         return jsonify({
             'message': 'User registered successfully',
@@ -53,6 +55,7 @@ def register():
         return jsonify({'error': 'Registration failed', 'details': str(e)}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit('login', user_key=request_field('username'))  # Before the slow password check
 def login():
     """Login user (both admin and regular users)"""
     data = request.get_json()
@@ -69,11 +72,11 @@ def login():
         return jsonify({'error': 'Invalid credentials'}), 401
     
     # Create access token
-    access_token = create_access_token(identity=user.id)
+    access_token = create_access_token(identity=str(user.id))  # JWT subject must be a string
     
     return jsonify({
         'message': 'Login successful',
-        'user': user.to_dict(include_email=True),
+        'user': user.to_dict(include_sensitive=True),
         'access_token': access_token
     }), 200
 
@@ -87,7 +90,7 @@ def get_me():
         return jsonify({'error': 'User not found'}), 404
     
     return jsonify({
-        'user': user.to_dict(include_email=True)
+        'user': user.to_dict(include_sensitive=True)
     }), 200
 
 @auth_bp.route('/logout', methods=['POST'])
@@ -2,17 +2,29 @@
 User routes
 Handles user-specific operations: lot viewing, reservations, history, analytics
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db
 from models.user import User
 from models.parking_lot import ParkingLot
 from models.parking_spot import ParkingSpot
 from models.reservation import Reservation
-from utils.auth_utils import user_required, get_current_user
-from utils.cache import invalidate_cache
+from models.invoice import Invoice
+from models.lot_forecast import LotForecast
+from utils.auth_utils import user_required, get_current_user, create_stream_token
+from utils.http_cache import versioned_etag, FORECASTS
+from utils.live_updates import get_broker, publish_availability, availability_message, event_stream
+from utils.db_routing import read_replica
+from utils.task_dispatch import dispatch
+from utils.rate_limit import rate_limit
+from utils.archive import reservations_query, get_date_range_args
+from utils.serializers import json_response, serialize_lots, serialize_reservation_rows
+from utils.lot_search import search_lots, MAX_PER_PAGE
+from utils.geo_index import find_nearest_available, parse_coordinates
+from utils.pricing import get_tariff, occupancy_of, pricing_period
+from utils.forecasting import upcoming_hours, forecast_period
 from datetime import datetime
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 user_bp = Blueprint('user', __name__)
 
@@ -23,20 +35,178 @@ user_bp = Blueprint('user', __name__)
 @user_bp.route('/lots/available', methods=['GET'])
 @jwt_required()
 @user_required()
+@read_replica()
+@versioned_etag('user:lots:available', period=pricing_period)
 def get_available_lots():
     """Get all parking lots with availability information"""
-    lots = ParkingLot.query.all()
+    available_lots = serialize_lots(only_available=True)
     
-    available_lots = []
-    for lot in lots:
-        if lot.get_available_spots_count() > 0:
-            lot_data = lot.to_dict()
-            available_lots.append(lot_data)
-    
-    return jsonify({
+    return json_response({
         'lots': available_lots,
         'total': len(available_lots)
-    }), 200
+    })
+
+@user_bp.route('/lots/search', methods=['GET'])
+@jwt_required()
+@user_required()
+@read_replica()
+@versioned_etag('user:lots:search', period=pricing_period)
+def search_parking_lots():
+    """
+    Search lots, one page at a time (see utils/lot_search.py)
+    
+    Query params:
+        q: Words in the lot name or address (each word can be the start of a word)
+        pin_code: Pin code or its first digits
+        min_price, max_price: Price per hour range
+        min_available: At least this many free spots (default 1, 0 = include full lots)
+        sort: relevance / price / available / name, order: asc / desc
+        page, per_page: Pagination (per_page at most 100)
+    """
+    pin_code = request.args.get('pin_code', '').strip()
+    min_price = request.args.get('min_price', type=float)
+    max_price = request.args.get('max_price', type=float)
+    min_available = request.args.get('min_available', 1, type=int)
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    
+    if pin_code and not pin_code.isdigit():
+        return jsonify({'error': 'pin_code must contain only digits'}), 400
+    if page < 1 or per_page < 1 or min_available < 0:
+        return jsonify({'error': 'page and per_page must be 1 or more, min_available 0 or more'}), 400
+    per_page = min(per_page, MAX_PER_PAGE)
+    
+    try:
+        lots, total = search_lots(
+            q=request.args.get('q'), pin_code=pin_code, min_price=min_price, max_price=max_price,
+            min_available=min_available, sort=request.args.get('sort'),
+            descending=request.args.get('order') == 'desc', page=page, per_page=per_page
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return json_response({
+        'lots': lots,
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'pages': (total + per_page - 1) // per_page
+    })
+
+@user_bp.route('/lots/nearby', methods=['GET'])
+@jwt_required()
+@user_required()
+def get_nearby_lots():
+    """
+    Closest lots with a free spot (see utils/geo_index.py)
+    Reads the primary, so the free spot counts are current.
+    
+    Query params:
+        lat, lon: Where the driver is (degrees)
+        k: How many lots (default 5, at most 50)
+        max_km: Only lots within this distance
+        min_available: Free spots a lot needs (default 1)
+    """
+    try:
+        latitude, longitude = parse_coordinates(request.args.get('lat'), request.args.get('lon'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if latitude is None:
+        return jsonify({'error': 'lat and lon are required'}), 400
+    
+    k = request.args.get('k', 5, type=int)
+    max_km = request.args.get('max_km', type=float)
+    min_available = request.args.get('min_available', 1, type=int)
+    if not 1 <= k <= 50 or min_available < 1 or (max_km is not None and max_km <= 0):
+        return jsonify({'error': 'k must be 1 to 50, min_available 1 or more and max_km positive'}), 400
+    
+    lots = find_nearest_available(latitude, longitude, k=k, max_distance_km=max_km,
+                                  min_available=min_available)
+    
+    return json_response({
+        'lots': lots,
+        'total': len(lots)
+    })
+
+@user_bp.route('/lots/<int:lot_id>/forecast', methods=['GET'])
+@jwt_required()
+@user_required()
+@read_replica()
+@versioned_etag('user:lots:forecast', version_name=FORECASTS, period=forecast_period)
+def get_lot_forecast(lot_id):
+    """
+    Expected occupancy of a lot for the next hours, hour by hour
+    Read from the profile the nightly job fitted (see utils/forecasting.py).
+    
+    Query params:
+        hours: How many hours (default 24, at most FORECAST_MAX_HOURS)
+    """
+    hours = request.args.get('hours', 24, type=int)
+    max_hours = current_app.config['FORECAST_MAX_HOURS']
+    if not 1 <= hours <= max_hours:
+        return jsonify({'error': f'hours must be 1 to {max_hours}'}), 400
+    
+    row = db.session.execute(
+        select(LotForecast, ParkingLot.prime_location_name, ParkingLot.number_of_spots)
+        .join(ParkingLot, LotForecast.lot_id == ParkingLot.id)
+        .where(LotForecast.lot_id == lot_id)
+    ).first()
+    if row is None:
+        if db.session.get(ParkingLot, lot_id) is None:
+            return jsonify({'error': 'Parking lot not found'}), 404
+        return jsonify({'error': 'No forecast for this lot yet (it needs some parking history)'}), 404
+    
+    forecast, lot_name, number_of_spots = row
+    return json_response({
+        'lot_id': lot_id,
+        'lot_name': lot_name,
+        'number_of_spots': number_of_spots,
+        'fitted_at': forecast.fitted_at.isoformat() if forecast.fitted_at else None,
+        'weeks_of_history': forecast.weeks_of_history,
+        'hours': upcoming_hours(forecast, number_of_spots, hours)
+    })
+
+@user_bp.route('/lots/stream/token', methods=['POST'])
+@jwt_required()
+@user_required()
+def get_stream_token():
+    """Short-lived token for opening the live stream (see create_stream_token)"""
+    token, seconds = create_stream_token(get_jwt_identity())
+    return jsonify({'stream_token': token, 'expires_in': seconds}), 200
+
+@user_bp.route('/lots/stream', methods=['GET'])
+@jwt_required(locations=['query_string'])
+@user_required(locations=['query_string'])
+def stream_lot_availability():
+    """
+    Live spot counts as Server-Sent Events
+    The browser's EventSource cannot send headers, so the token is passed as
+    ?jwt=<token> - a stream token from POST /lots/stream/token, the login
+    token is refused here. Events: 'snapshot' (all lots, first), then
+    'availability' ({lot_id, available, occupied}) after every change, and
+    'resync' if the client missed updates and should reload the list.
+    """
+    subscription = get_broker().subscribe()
+    if subscription is None:
+        return jsonify({'error': 'Too many live connections, please try again later'}), 503
+    
+    try:
+        # Subscribed first, so no change between the snapshot and the stream is lost
+        counts = ParkingLot.get_spot_counts()
+        snapshot = {'lots': [availability_message(lot_id, lot_counts)
+                             for lot_id, lot_counts in sorted(counts.items())]}
+    except Exception:
+        get_broker().unsubscribe(subscription)
+        raise
+    
+    # The stream stays open for a long time - give the database connection back now
+    db.session.remove()
+    
+    return Response(
+        event_stream(subscription, snapshot, current_app.config['LIVE_UPDATES_KEEPALIVE']),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}  # No proxy buffering
+    )
 
 # ============================================================================
 # RESERVATION MANAGEMENT
@@ -45,6 +215,7 @@ def get_available_lots():
 @user_bp.route('/reserve', methods=['POST'])
 @jwt_required()
 @user_required()
+@rate_limit('reserve')
 def reserve_spot():
     """Reserve first available spot in selected lot"""
     data = request.get_json()
@@ -81,24 +252,28 @@ def reserve_spot():
         return jsonify({'error': 'No available spots in this parking lot'}), 400
     
     try:
+        # Lock in the occupancy surcharge the user sees right now
+        # (available_spots is a column, so no counting query)
+        surcharge = get_tariff(lot.id).occupancy_multiplier(
+            occupancy_of(lot.available_spots, lot.number_of_spots))
+        
         # Create reservation
         reservation = Reservation(
             spot_id=available_spot.id,
             user_id=user.id,
             reserved_at=datetime.utcnow(),
-            status='reserved'
+            status='reserved',
+            price_multiplier=surcharge if surcharge != 1.0 else None
         )
         
         db.session.add(reservation)
         db.session.commit()
         
-        # Invalidate available lots cache
-        invalidate_cache('user:lots:available:*')
-        invalidate_cache('admin:spots:*')
+        publish_availability([lot_id])
         
         return jsonify({
             'message': 'Spot reserved successfully',
-            'reservation': reservation.to_dict(include_details=True)
+            'reservation': reservation.to_dict(include_full_details=True)
         }), 201
     
     except Exception as e:
@@ -137,12 +312,11 @@ def occupy_spot(reservation_id):
         
         db.session.commit()
         
-        # Invalidate cache
-        invalidate_cache('admin:spots:*')
+        publish_availability([reservation.spot.lot_id])
         
         return jsonify({
             'message': 'Spot occupied successfully',
-            'reservation': reservation.to_dict(include_details=True)
+            'reservation': reservation.to_dict(include_full_details=True)
         }), 200
     
     except Exception as e:
@@ -175,21 +349,19 @@ def release_spot(reservation_id):
         
         # Calculate cost
         if reservation.spot and reservation.spot.lot:
-            price_per_hour = reservation.spot.lot.price_per_hour
-            reservation.parking_cost = reservation.calculate_cost(price_per_hour)
+            lot = reservation.spot.lot
+            reservation.parking_cost = reservation.calculate_cost(lot.price_per_hour, get_tariff(lot.id))
         
         # Update spot status
         reservation.spot.mark_available()
         
         db.session.commit()
         
-        # Invalidate cache
-        invalidate_cache('user:lots:available:*')
-        invalidate_cache('admin:spots:*')
+        publish_availability([reservation.spot.lot_id])
         
         return jsonify({
             'message': 'Spot released successfully',
-            'reservation': reservation.to_dict(include_details=True),
+            'reservation': reservation.to_dict(include_full_details=True),
             'cost': reservation.parking_cost
         }), 200
     
@@ -218,13 +390,13 @@ def get_current_reservation():
         
         if reserved_reservation:
             return jsonify({
-                'reservation': reserved_reservation.to_dict(include_details=True)
+                'reservation': reserved_reservation.to_dict(include_full_details=True)
             }), 200
         
         return jsonify({'reservation': None}), 200
     
     return jsonify({
-        'reservation': active_reservation.to_dict(include_details=True)
+        'reservation': active_reservation.to_dict(include_full_details=True)
     }), 200
 
 # ============================================================================
@@ -234,37 +406,73 @@ def get_current_reservation():
 @user_bp.route('/reservations', methods=['GET'])
 @jwt_required()
 @user_required()
+@read_replica()
 def get_user_reservations():
-    """Get user's reservation history"""
+    """Get user's reservation history (includes archived reservations when needed)"""
     user = get_current_user()
     
     # Pagination
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    if page < 1 or per_page < 1:
+        # per_page=-1 would become LIMIT -1 (no limit) in SQLite
+        return jsonify({'error': 'page and per_page must be 1 or more'}), 400
+    per_page = min(per_page, MAX_PER_PAGE)
     
-    # Filter by status if provided
+    # Filter by status and date range if provided
     status = request.args.get('status')
+    try:
+        start, end = get_date_range_args()
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
     
-    query = Reservation.query.filter_by(user_id=user.id)
-    
-    if status:
-        query = query.filter_by(status=status)
-    
-    query = query.order_by(Reservation.reserved_at.desc())
-    
-    # Paginate
-    paginated_reservations = query.paginate(page=page, per_page=per_page, error_out=False)
+    rows = reservations_query(user_id=user.id, status=status, start=start, end=end)
     
-    reservations_data = [res.to_dict(include_details=True) for res in paginated_reservations.items]
+    total = db.session.query(func.count()).select_from(rows).scalar()
+    page_rows = db.session.execute(
+        select(rows).order_by(rows.c.reserved_at.desc(), rows.c.id.desc())
+        .limit(per_page).offset((page - 1) * per_page)
+    ).all()
     
-    return jsonify({
-        'reservations': reservations_data,
-        'total': paginated_reservations.total,
+    return json_response({
+        'reservations': serialize_reservation_rows(page_rows),
+        'total': total,
         'page': page,
         'per_page': per_page,
-        'total_pages': paginated_reservations.pages
+        'total_pages': (total + per_page - 1) // per_page
+    })
+
+# ============================================================================
+# INVOICES (built once a month by a background job, just read here)
+# ============================================================================
+
+@user_bp.route('/invoices', methods=['GET'])
+@jwt_required()
+@user_required()
+@read_replica()
+def get_user_invoices():
+    """The user's monthly invoices, newest first"""
+    user = get_current_user()
+    invoices = Invoice.query.filter_by(user_id=user.id).order_by(Invoice.month.desc()).all()
+    
+    return jsonify({
+        'invoices': [invoice.to_dict() for invoice in invoices],
+        'total': len(invoices)
     }), 200
 
+@user_bp.route('/invoices/<string:month>', methods=['GET'])
+@jwt_required()
+@user_required()
+@read_replica()
+def get_user_invoice(month):
+    """One invoice (month as YYYY-MM) with a line per parking lot"""
+    user = get_current_user()
+    invoice = Invoice.query.filter_by(user_id=user.id, month=month).first()
+    if not invoice:
+        return jsonify({'error': 'No invoice for this month'}), 404
+    
+    return jsonify({'invoice': invoice.to_dict(include_lines=True)}), 200
+
 # ============================================================================
 # USER ANALYTICS
 # ============================================================================
@@ -272,63 +480,64 @@ def get_user_reservations():
 @user_bp.route('/analytics/spending', methods=['GET'])
 @jwt_required()
 @user_required()
+@read_replica()
 def get_spending_analytics():
-    """Get user's spending analytics"""
+    """Get user's spending analytics (live + archived reservations)"""
     user = get_current_user()
     
-    # Get completed reservations
-    completed_reservations = Reservation.query.filter_by(
-        user_id=user.id,
-        status='completed'
-    ).all()
+    completed = reservations_query(user_id=user.id, status='completed')
     
-    total_spent = sum(res.parking_cost for res in completed_reservations if res.parking_cost)
+    # Totals are computed in the database instead of loading every reservation
+    total_completed, total_spent = db.session.query(
+        func.count(),
+        func.coalesce(func.sum(completed.c.parking_cost), 0)
+    ).select_from(completed).one()
     
     # Group by month
+    month = func.strftime('%Y-%m', completed.c.leaving_timestamp).label('month')
     monthly_spending = db.session.query(
-        func.strftime('%Y-%m', Reservation.leaving_timestamp).label('month'),
-        func.sum(Reservation.parking_cost).label('total')
+        month,
+        func.sum(completed.c.parking_cost).label('total')
     ).filter(
-        Reservation.user_id == user.id,
-        Reservation.status == 'completed',
-        Reservation.parking_cost.isnot(None)
-    ).group_by('month').order_by('month').all()
+        completed.c.parking_cost.isnot(None)
+    ).group_by(month).order_by(month).all()
     
-    return jsonify({
-        'total_spent': total_spent,
-        'total_completed_parkings': len(completed_reservations),
+    return json_response({
+        'total_spent': float(total_spent),
+        'total_completed_parkings': total_completed,
         'monthly_spending': [
             {'month': month, 'amount': float(total)}
             for month, total in monthly_spending
         ]
-    }), 200
+    })
 
 @user_bp.route('/analytics/usage', methods=['GET'])
 @jwt_required()
 @user_required()
+@read_replica()
 def get_usage_analytics():
-    """Get user's parking usage patterns"""
+    """Get user's parking usage patterns (live + archived reservations)"""
     user = get_current_user()
     
+    rows = reservations_query(user_id=user.id)
+    
     # Most used parking lots
     most_used_lots = db.session.query(
-        ParkingLot.prime_location_name,
-        func.count(Reservation.id).label('usage_count')
-    ).join(ParkingSpot).join(Reservation).filter(
-        Reservation.user_id == user.id
-    ).group_by(ParkingLot.id).order_by(
-        func.count(Reservation.id).desc()
+        rows.c.lot_name,
+        func.count(rows.c.id).label('usage_count')
+    ).filter(
+        rows.c.lot_id.isnot(None)
+    ).group_by(rows.c.lot_id).order_by(
+        func.count(rows.c.id).desc()
     ).limit(5).all()
     
     # Total reservations by status
     status_counts = db.session.query(
-        Reservation.status,
-        func.count(Reservation.id).label('count')
-    ).filter(
-        Reservation.user_id == user.id
-    ).group_by(Reservation.status).all()
+        rows.c.status,
+        func.count(rows.c.id).label('count')
+    ).group_by(rows.c.status).all()
     
-    return jsonify({
+    return json_response({
         'most_used_lots': [
             {'lot_name': name, 'usage_count': count}
             for name, count in most_used_lots
@@ -336,7 +545,7 @@ def get_usage_analytics():
         'reservations_by_status': {
             status: count for status, count in status_counts
         }
-    }), 200
+    })
 
 # ============================================================================
 # CSV EXPORT (Will be async with Celery in Milestone 8)
@@ -355,11 +564,12 @@ def trigger_csv_export():
     # Import the task here to avoid circular imports
     from tasks import export_user_history
     
-    # Start the background task
-    # .delay() is how we tell Celery to run this asynchronously
-    export_user_history.delay(user.id)
+    # Start the background task (on Celery, or in this process if the
+    # Celery broker is not running)
+    job = dispatch(export_user_history, user.id)
     
     return jsonify({
         'message': 'Export started! You will receive an email with the CSV shortly.',
-        'status': 'processing'
+        'status': 'processing',
+        'task_id': job['task_id']
     }), 200
@@ -0,0 +1,152 @@
+"""
+Production Server for the Parking Management API
+Use this instead of `python app.py` (Flask's single-process debug server)
+
+Student Project - Scalability
+Runs the app on gunicorn:
+- The app is built ONCE in the master process (preloading), then the
+  worker processes are forked from it. Workers start in milliseconds and
+  share the loaded code's memory with the master.
+- Each worker answers WEB_THREADS requests at once on a thread pool, and
+  WEB_WORKERS workers run side by side (one Python process per CPU core
+  is the only way around the GIL).
+- Right after the fork every worker drops the database and Redis
+  connections it inherited (utils/forking.py) and opens its own.
+- A worker that dies or hangs longer than WEB_TIMEOUT is replaced.
+
+Usage:
+    python serve.py                                  # settings from config.py / environment
+    python serve.py --bind 0.0.0.0:5000 --workers 4 --threads 8
+
+Reloading without dropping requests (PID is printed at start-up, or use --pid):
+    kill -HUP <pid>    new workers replace the old ones, which first finish
+                       their current requests (same code, settings re-read)
+    kill -USR2 <pid>   starts a second master with the NEW code next to the old one;
+                       then kill -QUIT <old pid> once it is up
+    kill -TERM <pid>   graceful stop (waits up to WEB_GRACEFUL_TIMEOUT seconds)
+
+For thousands of open live-availability streams use serve_gevent.py instead:
+here every open stream keeps one worker thread busy.
+"""
+
+import os
+import argparse
+import tempfile
+from gunicorn.app.base import BaseApplication
+from config import Config
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Run the API on gunicorn with pre-forked workers')
+    parser.add_argument('--bind', default=Config.WEB_BIND, help='host:port to listen on')
+    parser.add_argument('--workers', type=int, default=Config.WEB_WORKERS, help='Worker processes')
+    parser.add_argument('--threads', type=int, default=Config.WEB_THREADS, help='Threads per worker')
+    parser.add_argument('--timeout', type=int, default=Config.WEB_TIMEOUT,
+                        help='Seconds before a stuck worker is restarted')
+    parser.add_argument('--graceful-timeout', type=int, default=Config.WEB_GRACEFUL_TIMEOUT,
+                        help='Seconds workers get to finish their requests on reload/stop')
+    parser.add_argument('--max-requests', type=int, default=Config.WEB_MAX_REQUESTS,
+                        help='Recycle a worker after this many requests (0 = never)')
+    parser.add_argument('--pid', default=None, help='Write the master PID to this file')
+    parser.add_argument('--access-log', action='store_true', help='Log every request to stdout')
+    return parser.parse_args()
+
+
+# ============================================================================
+# GUNICORN HOOKS (run by the master or the workers, see the gunicorn docs)
+# ============================================================================
+
+def when_ready(server):
+    """Master is listening and about to fork the workers"""
+    print("=" * 60)
+    print("🚗 Vehicle Parking Management System (production server)")
+    print("=" * 60)
+    print(f"Server running at: http://{server.cfg.bind[0]}  (master PID {os.getpid()})")
+    print(f"{server.cfg.workers} workers x {server.cfg.threads} threads")
+    print("Reload: kill -HUP, stop: kill -TERM")
+    print("=" * 60)
+
+
+def post_fork(server, worker):
+    """In the new worker, right after the fork: drop the inherited connections"""
+    from utils.forking import reset_after_fork
+    reset_after_fork(server.app.flask_app)
+
+
+def post_worker_init(worker):
+    """Worker is ready to take requests"""
+    # Local jobs left over from the last run (the master never starts them).
+    # Only the worker holding the queue's resume lock does this, see utils/task_dispatch.py
+    from utils.task_dispatch import resume_local_tasks
+    resume_local_tasks()
+
+
+def child_exit(server, worker):
+    """A worker has exited (master): remove its metric files"""
+    from utils.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
+
+
+def on_reload(server):
+    print("♻ Reloading: starting new workers, old ones finish their requests first")
+
+
+# ============================================================================
+# SERVER
+# ============================================================================
+
+class ParkingServer(BaseApplication):
+    """gunicorn application that builds the Flask app once, in the master"""
+
+    def __init__(self, options):
+        self.options = options
+        self.flask_app = None
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # Imported here so PROMETHEUS_MULTIPROC_DIR is set before utils/metrics loads
+        from app import create_app
+        self.flask_app = create_app(resume_tasks=False)
+        return self.flask_app
+
+
+def build_options(args):
+    """gunicorn settings from the command line arguments"""
+    return {
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread' if args.threads > 1 else 'sync',
+        'preload_app': True,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests // 10,  # So workers don't all restart together
+        'keepalive': 5,
+        'pidfile': args.pid,
+        'accesslog': '-' if args.access_log else None,
+        'when_ready': when_ready,
+        'post_fork': post_fork,
+        'post_worker_init': post_worker_init,
+        'child_exit': child_exit,
+        'on_reload': on_reload,
+    }
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    # /api/metrics should add up all workers (see utils/metrics.py)
+    if args.workers > 1 and not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='parking-metrics-')
+
+    if Config.TASK_BACKEND != 'celery' and args.workers > 1:
+        # 'local' always, 'auto' whenever the broker is down
+        print(f"⚠ Warning: with TASK_BACKEND={Config.TASK_BACKEND} background jobs can run inside the "
+              "web workers, taking CPU from requests - use TASK_BACKEND=celery in production")
+
+    ParkingServer(build_options(args)).run()
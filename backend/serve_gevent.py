@@ -0,0 +1,48 @@
+"""
+gevent Server for the Parking Management API
+Use this instead of `python app.py` when browsers keep live availability
+streams open (/api/user/lots/stream)
+
+Student Project - Scalability
+Flask's built-in server uses one thread per connection, so every open
+stream costs an OS thread. gevent runs each connection as a greenlet
+(a few KB of memory), so one process can keep thousands of idle streams
+open while it keeps answering normal requests.
+
+Usage:
+    python serve_gevent.py --port 5000 --max-connections 10000
+"""
+
+# Must run before anything else is imported, so sockets, threads and
+# queues (also inside redis and SQLAlchemy) cooperate with gevent
+from gevent import monkey
+monkey.patch_all()
+
+import argparse
+from gevent.pool import Pool
+from gevent.pywsgi import WSGIServer
+from app import create_app
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Run the API on a gevent server')
+    parser.add_argument('--host', default='0.0.0.0', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=5000, help='Port to listen on')
+    parser.add_argument('--max-connections', type=int, default=10000,
+                        help='Open connections at most (requests and streams together)')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    app = create_app()
+
+    print("=" * 60)
+    print("🚗 Vehicle Parking Management System (gevent)")
+    print("=" * 60)
+    print(f"Server running at: http://{args.host}:{args.port}")
+    print(f"Up to {args.max_connections} connections")
+    print("=" * 60)
+
+    server = WSGIServer((args.host, args.port), app, spawn=Pool(args.max_connections), log=None)
+    server.serve_forever()
@@ -5,22 +5,44 @@ We use Celery to run these so they don't slow down the website.
 
 Tasks included:
 1. Daily Reminders - Reminds users to book a spot
-2. Monthly Report - Sends activity summary to admin
+2. Monthly Report - Saves and sends last month's activity summary to admin
 3. CSV Export - Exports user history to a file
+4. Hold Sweeper - Expires old 'reserved' holds and frees their spots
+5. Replica Refresh - Copies the database into the local read replica
+6. Archival - Moves old completed reservations into the archive table
+7. Change Feed Compaction - Keeps the spot_events log small
+8. Bulk Re-billing - Reprices completed reservations (after a tariff change or a dispute)
+9. Monthly Invoices - One invoice per user for last month
+10. Occupancy Forecasts - Refits every lot's hour-of-week occupancy profile
 
 Student Project - MAD-II
 """
 
 from celery_worker import celery
+from flask import current_app
 from models import db
 from models.user import User
-from models.reservation import Reservation
+from models.reservation import Reservation, format_duration
+from models.reservation_archive import ReservationArchive
 from models.parking_lot import ParkingLot
+from models.parking_spot import ParkingSpot
+from models.monthly_report import MonthlyReport, MonthlyLotReport, get_month_range, get_previous_month
+from sqlalchemy import func, update, select, insert, delete, exists, and_
+from utils.cache import increment_stat
+from utils.task_dispatch import dispatch, run_chord
+from utils.db_routing import use_read_replica, refresh_sqlite_replica
+from utils.archive import reservations_query
+from utils.change_feed import record_spot_events, compact_spot_events
+# utils.billing and utils.forecasting (numpy), utils.http_cache (prometheus_client)
+# and utils.live_updates are imported inside the tasks that use them, so
+# starting a worker or running a `celery` command stays fast. (No task changes
+# lots/spots/reservations through the ORM - the bulk UPDATEs bump the ETag
+# version themselves - so http_cache's flush listener is not needed up front)
 from datetime import datetime, timedelta
 import csv
 import io
-import smtplib  # We will simulate email sending
-from email.mime.text import MIMEText
+import json
+from utils.mailer import build_message, get_mailer
 
 # ============================================================================
 # 1. DAILY REMINDER TASK
@@ -47,23 +69,29 @@ def send_daily_reminders():
     
     print(f"Found {len(users_to_remind)} users to remind.")
     
-    for user in users_to_remind:
-        # In a real app, we would send an actual email here.
-        # For this project, we will simulate it by printing to the console/log.
-        
-        message = f"Hi {user.username}! We haven't seen you in a while. Check out available parking spots!"
-        
-        # Simulate sending email
-        print(f"📧 SENDING EMAIL TO: {user.email}")
-        print(f"   Subject: We miss you!")
-        print(f"   Body: {message}")
-        print("-" * 30)
+    # Build all the emails first, then send them in one pooled batch
+    messages = [
+        build_message(
+            user.email,
+            'We miss you!',
+            f"Hi {user.username}! We haven't seen you in a while. Check out available parking spots!"
+        )
+        for user in users_to_remind
+    ]
+    result = get_mailer().send_batch(messages)
+    
+    sent, failed = result['sent'], len(result['failed'])
+    for email, error in result['failed']:
+        print(f"⚠ Could not send reminder to {email}: {error}")
         
     print("="*50)
-    print("✅ DAILY REMINDERS SENT SUCCESSFULLY")
+    if failed:
+        print(f"⚠ DAILY REMINDERS: {sent} sent, {failed} FAILED")
+    else:
+        print(f"✅ DAILY REMINDERS SENT SUCCESSFULLY ({sent} sent)")
     print("="*50 + "\n")
     
-    return f"Sent reminders to {len(users_to_remind)} users"
+    return f"Sent reminders to {sent} users, {failed} failed"
 
 
 # ============================================================================
@@ -71,34 +99,147 @@ def send_daily_reminders():
 # ============================================================================
 
 @celery.task(name='tasks.send_monthly_report')
-def send_monthly_report():
+def send_monthly_report(month=None):
     """
-    Calculates monthly statistics and sends a report to the admin.
-    Runs on the 1st of every month.
+    Starts the monthly report for one calendar month.
+    Runs on the 1st of every month and covers the month that just ended.
+    
+    Each parking lot is summarised by its own subtask (in parallel), then
+    finalize_monthly_report adds them up, saves the report and emails it.
+    
+    Args:
+        month: Month to report on as 'YYYY-MM' (defaults to last month)
     """
+    month = month or get_previous_month()
+    
     print("\n" + "="*50)
-    print("📊 GENERATING MONTHLY ACTIVITY REPORT")
+    print(f"📊 GENERATING MONTHLY ACTIVITY REPORT FOR {month}")
     print("="*50)
     
-    # Calculate stats for the report
-    total_users = User.query.count()
-    total_reservations = Reservation.query.count()
-    active_reservations = Reservation.query.filter_by(status='active').count()
+    lot_ids = [lot_id for (lot_id,) in db.session.query(ParkingLot.id).all()]
+    
+    if not lot_ids:
+        # Nothing to fan out - build the (empty) report straight away
+        dispatch(finalize_monthly_report, [], month)
+    else:
+        run_chord(
+            [compute_lot_monthly_stats.s(month, lot_id) for lot_id in lot_ids],
+            finalize_monthly_report.s(month)
+        )
+    
+    return f"Monthly report for {month} started ({len(lot_ids)} lots)"
+
+
+@celery.task(name='tasks.compute_lot_monthly_stats')
+def compute_lot_monthly_stats(month, lot_id):
+    """
+    Calculates one lot's activity for one month and saves it as a rollup row.
+    Only reservations inside the month are touched (indexed date-range queries).
+    
+    Returns:
+        Dictionary with the lot's numbers (or None if the lot no longer exists)
+    """
+    lot = ParkingLot.query.get(lot_id)
+    if not lot:
+        return None
+    
+    start, end = get_month_range(month)
+    
+    # Reservations made during the month
+    reservations_made = db.session.query(func.count(Reservation.id)).join(ParkingSpot).filter(
+        ParkingSpot.lot_id == lot_id,
+        Reservation.reserved_at >= start,
+        Reservation.reserved_at < end
+    ).scalar()
     
-    # Calculate total revenue
-    completed_reservations = Reservation.query.filter_by(status='completed').all()
-    total_revenue = sum(r.parking_cost for r in completed_reservations if r.parking_cost)
+    # Parkings that finished during the month (these earned the revenue)
+    completed_parkings, revenue, hours_parked = db.session.query(
+        func.count(Reservation.id),
+        func.coalesce(func.sum(Reservation.parking_cost), 0.0),
+        func.coalesce(func.sum(
+            (func.julianday(Reservation.leaving_timestamp) - func.julianday(Reservation.parking_timestamp)) * 24
+        ), 0.0)
+    ).join(ParkingSpot).filter(
+        ParkingSpot.lot_id == lot_id,
+        Reservation.status == 'completed',
+        Reservation.leaving_timestamp >= start,
+        Reservation.leaving_timestamp < end
+    ).one()
+    
+    # Save the rollup (re-running the report for a month overwrites it)
+    rollup = MonthlyLotReport.query.filter_by(month=month, lot_id=lot_id).first()
+    if not rollup:
+        rollup = MonthlyLotReport(month=month, lot_id=lot_id)
+        db.session.add(rollup)
+    
+    rollup.lot_name = lot.prime_location_name
+    rollup.reservations_made = reservations_made
+    rollup.completed_parkings = completed_parkings
+    rollup.revenue = float(revenue)
+    rollup.hours_parked = float(hours_parked)
+    db.session.commit()
+    
+    return rollup.to_dict()
+
+
+@celery.task(name='tasks.finalize_monthly_report')
+def finalize_monthly_report(lot_results, month):
+    """
+    Combines the per-lot results into the monthly report, saves it
+    and emails it to the admin.
+    
+    Args:
+        lot_results: List of dictionaries from compute_lot_monthly_stats
+        month: Month being reported as 'YYYY-MM'
+    """
+    start, end = get_month_range(month)
+    lot_results = [result for result in lot_results if result]
+    
+    new_users = User.query.filter(
+        User.created_at >= start,
+        User.created_at < end
+    ).count()
+    active_parkings = Reservation.query.filter_by(status='active').count()
+    
+    reservations_made = sum(lot['reservations_made'] for lot in lot_results)
+    completed_parkings = sum(lot['completed_parkings'] for lot in lot_results)
+    total_revenue = sum(lot['revenue'] for lot in lot_results)
+    
+    # Save the report so the admin dashboard can show it later
+    report = MonthlyReport.query.filter_by(month=month).first()
+    if not report:
+        report = MonthlyReport(month=month)
+        db.session.add(report)
+    
+    report.new_users = new_users
+    report.reservations_made = reservations_made
+    report.completed_parkings = completed_parkings
+    report.active_parkings = active_parkings
+    report.total_revenue = total_revenue
+    report.lot_breakdown = json.dumps(sorted(lot_results, key=lambda lot: -lot['revenue']))
+    report.generated_at = datetime.utcnow()
+    db.session.commit()
     
     # Create the report content (HTML format)
+    lot_rows = "".join(
+        f"<tr><td>{lot['lot_name']}</td><td>{lot['reservations_made']}</td>"
+        f"<td>{lot['completed_parkings']}</td><td>₹{lot['revenue']:.2f}</td></tr>"
+        for lot in report.get_lot_breakdown()
+    )
     report_html = f"""
-    <h1>Monthly Parking Activity Report</h1>
-    <p>Here is the summary of activity for this month:</p>
+    <h1>Monthly Parking Activity Report - {month}</h1>
+    <p>Here is the summary of activity for {month}:</p>
     <ul>
-        <li><strong>Total Registered Users:</strong> {total_users}</li>
-        <li><strong>Total Reservations Made:</strong> {total_reservations}</li>
-        <li><strong>Current Active Parkings:</strong> {active_reservations}</li>
-        <li><strong>Total Revenue Generated:</strong> ₹{total_revenue:.2f}</li>
+        <li><strong>New Users:</strong> {new_users}</li>
+        <li><strong>Reservations Made:</strong> {reservations_made}</li>
+        <li><strong>Completed Parkings:</strong> {completed_parkings}</li>
+        <li><strong>Current Active Parkings:</strong> {active_parkings}</li>
+        <li><strong>Revenue Generated:</strong> ₹{total_revenue:.2f}</li>
     </ul>
+    <table>
+        <tr><th>Lot</th><th>Reservations</th><th>Completed</th><th>Revenue</th></tr>
+        {lot_rows}
+    </table>
     <p>Keep up the good work!</p>
     """
     
@@ -106,14 +247,16 @@ def send_monthly_report():
     admin = User.query.filter_by(role='admin').first()
     
     if admin:
-        print(f"📧 SENDING REPORT TO ADMIN: {admin.email}")
-        print(f"   Subject: Monthly Activity Report")
-        print(f"   Content: \n{report_html}")
+        result = get_mailer().send(
+            build_message(admin.email, f'Monthly Activity Report - {month}', report_html, subtype='html')
+        )
+        for email, error in result['failed']:
+            print(f"⚠ Could not send report to {email}: {error}")
     else:
         print("⚠ No admin found to send report to!")
         
     print("="*50)
-    print("✅ MONTHLY REPORT GENERATED")
+    print(f"✅ MONTHLY REPORT FOR {month} GENERATED")
     print("="*50 + "\n")
     
     return "Monthly report sent"
@@ -138,8 +281,13 @@ def export_user_history(user_id):
         print(f"⚠ User {user_id} not found!")
         return "User not found"
         
-    # Get all reservations for this user
-    reservations = Reservation.query.filter_by(user_id=user_id).all()
+    # Get all reservations for this user, archived ones included
+    # (read-only, so the replica is fine)
+    with use_read_replica():
+        rows = reservations_query(user_id=user_id, include_archive=True)
+        reservations = db.session.execute(
+            select(rows).order_by(rows.c.reserved_at, rows.c.id)
+        ).all()
     
     # Create a CSV in memory
     output = io.StringIO()
@@ -150,8 +298,8 @@ def export_user_history(user_id):
     
     # Write data rows
     for res in reservations:
-        lot_name = res.spot.lot.prime_location_name if res.spot and res.spot.lot else "Unknown"
-        spot_num = res.spot.spot_number if res.spot else "N/A"
+        lot_name = res.lot_name or "Unknown"
+        spot_num = res.spot_number if res.spot_number is not None else "N/A"
         date = res.reserved_at.strftime('%Y-%m-%d %H:%M') if res.reserved_at else "N/A"
         cost = f"₹{res.parking_cost:.2f}" if res.parking_cost else "N/A"
         
@@ -160,25 +308,381 @@ def export_user_history(user_id):
             lot_name,
             spot_num,
             date,
-            res.get_duration_string(),
+            format_duration(res.parking_timestamp, res.leaving_timestamp),
             cost,
             res.status
         ])
         
-    # In a real app, we would email this file as an attachment.
-    # Here, we will simulate it.
+    # Email the file as an attachment
     csv_content = output.getvalue()
     
-    print(f"📧 SENDING CSV EXPORT TO: {user.email}")
-    print(f"   Subject: Your Parking History Export")
+    result = get_mailer().send(build_message(
+        user.email,
+        'Your Parking History Export',
+        f'Hi {user.username}, your parking history ({len(reservations)} records) is attached.',
+        attachments=[('parking_history.csv', csv_content, 'csv')]
+    ))
+    
+    if result['failed']:
+        print(f"⚠ Could not send export to {user.email}: {result['failed'][0][1]}")
+        return "Export failed"
+    
     print(f"   Attachment: parking_history.csv ({len(reservations)} records)")
-    print("-" * 30)
-    print("CSV PREVIEW (First 3 lines):")
-    print("\n".join(csv_content.split("\n")[:3]))
-    print("..." + "\n")
     
     print("="*50)
     print("✅ CSV EXPORT COMPLETED")
     print("="*50 + "\n")
     
     return "Export successful"
+
+
+# ============================================================================
+# 4. EXPIRE STALE RESERVATION HOLDS
+# ============================================================================
+
+@celery.task(name='tasks.expire_stale_reservations')
+def expire_stale_reservations(ttl_minutes=None, batch_size=None):
+    """
+    Expires reservations that stayed in 'reserved' state for too long
+    (the user reserved a spot but never parked) and frees their spots.
+    They get the status 'expired': they show up in the reservation history
+    (filter status=expired) but never in costs or revenue, which only
+    count 'completed' reservations. They are not archived.
+    Runs every few minutes from Celery beat.
+    
+    Work is done in batches with set-based UPDATEs, so even a big backlog
+    of holds is cleared without loading reservation objects.
+    
+    Args:
+        ttl_minutes: How old a hold must be to expire (default RESERVATION_HOLD_TTL_MINUTES)
+        batch_size: Holds handled per UPDATE (default RESERVATION_SWEEP_BATCH_SIZE)
+    
+    Returns:
+        Dictionary with how many holds were expired and spots freed
+    """
+    from utils.http_cache import bump_version
+    from utils.live_updates import publish_availability
+    
+    # 'is None', so an explicit 0 (expire every hold right now) is not replaced by the default
+    if ttl_minutes is None:
+        ttl_minutes = current_app.config['RESERVATION_HOLD_TTL_MINUTES']
+    if batch_size is None:
+        batch_size = current_app.config['RESERVATION_SWEEP_BATCH_SIZE']
+    if batch_size < 1:
+        raise ValueError('batch_size must be at least 1')
+    
+    cutoff = datetime.utcnow() - timedelta(minutes=ttl_minutes)
+    expired_total = 0
+    spots_freed = 0
+    batches = 0
+    changed_lots = set()
+    
+    while True:
+        # Pick the next batch of stale holds (uses the status + reserved_at index)
+        stale = db.session.execute(
+            select(Reservation.id, Reservation.spot_id).where(
+                Reservation.status == 'reserved',
+                Reservation.reserved_at < cutoff
+            ).order_by(Reservation.id).limit(batch_size)
+        ).all()
+        
+        if not stale:
+            break
+        
+        reservation_ids = [row.id for row in stale]
+        spot_ids = {row.spot_id for row in stale}
+        
+        # One UPDATE for the whole batch of reservations
+        expired = db.session.execute(
+            update(Reservation).where(
+                Reservation.id.in_(reservation_ids),
+                Reservation.status == 'reserved'  # Skip any that got occupied meanwhile
+            ).values(
+                status='expired',
+                remarks='Hold expired - vehicle never parked'
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+        
+        # Give the spots back, unless someone else is parked there now
+        # (RETURNING tells us which spots were freed, for the change feed)
+        freed_spots = db.session.execute(
+            update(ParkingSpot).where(
+                ParkingSpot.id.in_(spot_ids),
+                ParkingSpot.status != 'available',
+                ~exists().where(and_(
+                    Reservation.spot_id == ParkingSpot.id,
+                    Reservation.status.in_(['reserved', 'active'])
+                ))
+            ).values(status='available').returning(
+                ParkingSpot.id, ParkingSpot.lot_id, ParkingSpot.spot_number
+            ).execution_options(synchronize_session=False)
+        ).all()
+        freed = len(freed_spots)
+        
+        # Bulk UPDATEs skip the ORM flush events, so bump the ETag version and
+        # write the spot events here (same transaction)
+        if expired or freed:
+            bump_version(db.session.connection())
+        record_spot_events(db.session.connection(), [
+            {'spot_id': spot_id, 'lot_id': lot_id, 'spot_number': spot_number,
+             'status': 'available', 'previous_status': None}
+            for spot_id, lot_id, spot_number in freed_spots
+        ])
+        changed_lots.update(lot_id for _, lot_id, _ in freed_spots)
+        
+        db.session.commit()
+        
+        expired_total += expired
+        spots_freed += freed
+        batches += 1
+    
+    if expired_total:
+        publish_availability(changed_lots)
+        print(f"♻ Expired {expired_total} stale holds, freed {spots_freed} spots ({batches} batches)")
+    
+    # Metrics for monitoring
+    increment_stat('holds_reclaimed', expired_total)
+    increment_stat('hold_spots_freed', spots_freed)
+    
+    return {
+        'expired': expired_total,
+        'spots_freed': spots_freed,
+        'batches': batches
+    }
+
+
+# ============================================================================
+# 5. REFRESH LOCAL READ REPLICA
+# ============================================================================
+
+@celery.task(name='tasks.refresh_read_replica')
+def refresh_read_replica():
+    """
+    Copies the primary SQLite database into the replica file.
+    Only used when the replica is a local SQLite stand-in - a real
+    replica database keeps itself up to date.
+    """
+    primary_uri = current_app.config['SQLALCHEMY_DATABASE_URI']
+    replica_uri = current_app.config.get('SQLALCHEMY_REPLICA_URI')
+    
+    if not replica_uri:
+        return "No read replica configured"
+    if not (primary_uri.startswith('sqlite') and replica_uri.startswith('sqlite')):
+        return "Replica is not a local SQLite file - nothing to refresh"
+    
+    seconds = refresh_sqlite_replica(primary_uri, replica_uri)
+    print(f"✓ Read replica refreshed in {seconds:.2f}s")
+    return f"Replica refreshed in {seconds:.2f}s"
+
+
+# ============================================================================
+# 6. ARCHIVE OLD COMPLETED RESERVATIONS
+# ============================================================================
+
+@celery.task(name='tasks.archive_completed_reservations')
+def archive_completed_reservations(older_than_days=None, batch_size=None):
+    """
+    Moves completed reservations that ended more than N days ago from
+    'reservations' into 'reservations_archive'. Runs every night.
+    
+    Keeping only recent rows in the live table keeps every per-user query,
+    admin listing and analytics scan small. History and analytics
+    endpoints still include archived rows (see utils/archive.py).
+    
+    Each batch is one INSERT ... SELECT plus one DELETE in one transaction,
+    so a row is never lost or duplicated if the job stops halfway.
+    
+    Args:
+        older_than_days: Archive rows that left before this many days ago (default ARCHIVE_AFTER_DAYS)
+        batch_size: Rows moved per transaction (default ARCHIVE_BATCH_SIZE)
+    
+    Returns:
+        Dictionary with the number of rows archived and batches used
+    """
+    # 'is None', so an explicit 0 (archive everything that has ended) is not replaced by the default
+    if older_than_days is None:
+        older_than_days = current_app.config['ARCHIVE_AFTER_DAYS']
+    if batch_size is None:
+        batch_size = current_app.config['ARCHIVE_BATCH_SIZE']
+    if batch_size < 1:
+        raise ValueError('batch_size must be at least 1')
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    
+    archived_total = 0
+    batches = 0
+    
+    while True:
+        batch_ids = [row_id for (row_id,) in db.session.execute(
+            select(Reservation.id).where(
+                Reservation.status == 'completed',
+                Reservation.leaving_timestamp < cutoff
+            ).order_by(Reservation.id).limit(batch_size)
+        ).all()]
+        
+        if not batch_ids:
+            break
+        
+        # Copy the rows with their spot/lot details in one statement
+        db.session.execute(
+            insert(ReservationArchive).from_select(
+                ['id', 'spot_id', 'user_id', 'lot_id', 'spot_number', 'lot_name', 'lot_address',
+                 'price_per_hour', 'reserved_at', 'parking_timestamp', 'leaving_timestamp',
+                 'status', 'parking_cost', 'remarks', 'archived_at'],
+                select(
+                    Reservation.id, Reservation.spot_id, Reservation.user_id,
+                    ParkingSpot.lot_id, ParkingSpot.spot_number,
+                    ParkingLot.prime_location_name, ParkingLot.address, ParkingLot.price_per_hour,
+                    Reservation.reserved_at, Reservation.parking_timestamp, Reservation.leaving_timestamp,
+                    Reservation.status, Reservation.parking_cost, Reservation.remarks,
+                    func.current_timestamp()
+                ).select_from(Reservation).outerjoin(
+                    ParkingSpot, Reservation.spot_id == ParkingSpot.id
+                ).outerjoin(
+                    ParkingLot, ParkingSpot.lot_id == ParkingLot.id
+                ).where(Reservation.id.in_(batch_ids))
+            )
+        )
+        
+        db.session.execute(
+            delete(Reservation).where(Reservation.id.in_(batch_ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        
+        archived_total += len(batch_ids)
+        batches += 1
+    
+    if archived_total:
+        print(f"🗄 Archived {archived_total} completed reservations ({batches} batches)")
+    increment_stat('reservations_archived', archived_total)
+    
+    return {'archived': archived_total, 'batches': batches}
+
+
+# ============================================================================
+# 7. COMPACT THE SPOT CHANGE FEED
+# ============================================================================
+
+@celery.task(name='tasks.compact_spot_events')
+def compact_spot_events_task(compact_after_hours=None, removed_retention_days=None):
+    """
+    Keeps the spot_events log small (see utils/change_feed.py). Runs every night.
+    
+    Events older than compact_after_hours are deleted when the same spot has
+    a newer event, so the log holds about one row per spot plus the
+    recent changes. 'removed' events of deleted spots are kept for
+    removed_retention_days.
+    
+    Args:
+        compact_after_hours: Default CHANGE_FEED_COMPACT_AFTER_HOURS
+        removed_retention_days: Default CHANGE_FEED_REMOVED_RETENTION_DAYS
+    
+    Returns:
+        Dictionary with how many events were compacted and removed, and the feed floor
+    """
+    # 'is None', so an explicit 0 (compact everything superseded right now) is not replaced by the default
+    if compact_after_hours is None:
+        compact_after_hours = current_app.config['CHANGE_FEED_COMPACT_AFTER_HOURS']
+    if removed_retention_days is None:
+        removed_retention_days = current_app.config['CHANGE_FEED_REMOVED_RETENTION_DAYS']
+    
+    now = datetime.utcnow()
+    result = compact_spot_events(
+        compact_before=now - timedelta(hours=compact_after_hours),
+        remove_before=now - timedelta(days=removed_retention_days)
+    )
+    
+    if result['compacted'] or result['removed']:
+        print(f"🗄 Change feed compacted: {result['compacted']} superseded and "
+              f"{result['removed']} removed-spot events deleted (floor {result['floor']})")
+    increment_stat('spot_events_compacted', result['compacted'] + result['removed'])
+    
+    return result
+
+
+# ============================================================================
+# 8. BULK RE-BILLING
+# ============================================================================
+
+@celery.task(name='tasks.rebill_reservations')
+def rebill_reservations_task(lot_ids=None, start_date=None, end_date=None, dry_run=False):
+    """
+    Recomputes parking_cost of completed reservations with today's prices
+    and tariffs (see utils/billing.py). Started by the admin.
+    
+    Args:
+        lot_ids: Only these lots (default: all)
+        start_date, end_date: Only stays that ended in this range, 'YYYY-MM-DD' (end inclusive)
+        dry_run: Only report what would change
+    
+    Returns:
+        Dictionary with how many costs changed and the old and new totals
+    """
+    from utils.billing import rebill_reservations
+    
+    start = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+    end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+    
+    result = rebill_reservations(lot_ids, start, end, dry_run=dry_run)
+    
+    print(f"🧾 Re-billing{' (dry run)' if dry_run else ''}: {result['changed']} of "
+          f"{result['reservations']} costs changed, ₹{result['old_total']:.2f} → ₹{result['new_total']:.2f} "
+          f"{result['timings']}")
+    if not dry_run:
+        increment_stat('reservations_rebilled', result['changed'])
+    
+    return result
+
+
+# ============================================================================
+# 9. MONTHLY INVOICES
+# ============================================================================
+
+@celery.task(name='tasks.generate_monthly_invoices')
+def generate_monthly_invoices(month=None):
+    """
+    Builds every user's invoice for one month (see utils/billing.py).
+    Runs on the 1st of every month, before the monthly report.
+    Re-running a month (e.g. after re-billing) replaces its invoices.
+    
+    Args:
+        month: 'YYYY-MM' (defaults to last month)
+    
+    Returns:
+        Dictionary with the number of invoices and the month's total
+    """
+    from utils.billing import generate_invoices
+    
+    month = month or get_previous_month()
+    result = generate_invoices(month)
+    
+    print(f"🧾 Invoices for {month}: {result['invoices']} users, "
+          f"{result['parkings']} parkings, ₹{result['total_amount']:.2f}")
+    
+    return result
+
+
+# ============================================================================
+# 10. OCCUPANCY FORECASTS
+# ============================================================================
+
+@celery.task(name='tasks.fit_occupancy_forecasts')
+def fit_occupancy_forecasts(weeks=None):
+    """
+    Fits every lot's hour-of-week occupancy profile from the last weeks of
+    reservations and saves it (see utils/forecasting.py). Runs every night,
+    so /api/user/lots/<id>/forecast only reads the saved profile.
+    
+    Args:
+        weeks: Weeks of history (default FORECAST_HISTORY_WEEKS)
+    
+    Returns:
+        Dictionary with the number of lots fitted and the time taken
+    """
+    from utils.forecasting import refresh_forecasts
+    
+    result = refresh_forecasts(weeks)
+    
+    print(f"📈 Occupancy forecasts fitted for {result['lots']} lots in {result['total_s']}s")
+    
+    return result
@@ -0,0 +1,151 @@
+"""
+Archive Query Utilities
+Lets history and analytics endpoints read live and archived reservations
+as if they were one table
+
+Student Project - Scalability
+The archive is only queried when it can contain matching rows:
+everything in it finished before the "watermark" (the newest archived
+leaving time), so a date range that starts after the watermark never
+touches the archive.
+"""
+
+from datetime import datetime, timedelta
+from flask import request
+from sqlalchemy import select, union_all, literal, func
+from models import db
+from models.reservation import Reservation
+from models.reservation_archive import ReservationArchive
+from models.parking_spot import ParkingSpot
+from models.parking_lot import ParkingLot
+
+
+def get_archive_watermark():
+    """
+    Newest leaving time in the archive (uses the leaving_timestamp index)
+
+    Returns:
+        datetime, or None if nothing has been archived yet
+    """
+    return db.session.query(func.max(ReservationArchive.leaving_timestamp)).scalar()
+
+
+def range_needs_archive(start=None):
+    """
+    Checks if a date range can include archived reservations
+
+    Args:
+        start: Start of the requested range (None = from the beginning)
+
+    Returns:
+        True if the archive must be included
+    """
+    watermark = get_archive_watermark()
+    if watermark is None:
+        return False
+    return start is None or start <= watermark
+
+
+def get_date_range_args():
+    """
+    Reads optional ?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD query arguments
+    (end_date is inclusive, so the range ends at midnight after it)
+
+    Returns:
+        (start, end) datetimes or None
+
+    Raises:
+        ValueError: If a date is not in YYYY-MM-DD format
+    """
+    start = request.args.get('start_date')
+    end = request.args.get('end_date')
+    start = datetime.strptime(start, '%Y-%m-%d') if start else None
+    end = datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1) if end else None
+    return start, end
+
+
+def _live_select():
+    """Live reservations with their spot and lot details"""
+    return select(
+        Reservation.id,
+        Reservation.spot_id,
+        Reservation.user_id,
+        ParkingSpot.lot_id,
+        ParkingSpot.spot_number,
+        ParkingLot.prime_location_name.label('lot_name'),
+        ParkingLot.address.label('lot_address'),
+        ParkingLot.price_per_hour,
+        Reservation.reserved_at,
+        Reservation.parking_timestamp,
+        Reservation.leaving_timestamp,
+        Reservation.status,
+        Reservation.parking_cost,
+        Reservation.remarks,
+        literal(False).label('archived')
+    ).select_from(Reservation).outerjoin(
+        ParkingSpot, Reservation.spot_id == ParkingSpot.id
+    ).outerjoin(
+        ParkingLot, ParkingSpot.lot_id == ParkingLot.id
+    )
+
+
+def _archive_select():
+    """Archived reservations, same columns as _live_select"""
+    return select(
+        ReservationArchive.id,
+        ReservationArchive.spot_id,
+        ReservationArchive.user_id,
+        ReservationArchive.lot_id,
+        ReservationArchive.spot_number,
+        ReservationArchive.lot_name,
+        ReservationArchive.lot_address,
+        ReservationArchive.price_per_hour,
+        ReservationArchive.reserved_at,
+        ReservationArchive.parking_timestamp,
+        ReservationArchive.leaving_timestamp,
+        ReservationArchive.status,
+        ReservationArchive.parking_cost,
+        ReservationArchive.remarks,
+        literal(True).label('archived')
+    )
+
+
+def _apply_filters(query, model, lot_column, user_id, status, lot_id, start, end):
+    """Adds the common WHERE conditions to one side of the union"""
+    if user_id is not None:
+        query = query.where(model.user_id == user_id)
+    if status:
+        query = query.where(model.status == status)
+    if lot_id is not None:
+        query = query.where(lot_column == lot_id)
+    if start is not None:
+        query = query.where(model.reserved_at >= start)
+    if end is not None:
+        query = query.where(model.reserved_at < end)
+    return query
+
+
+def reservations_query(user_id=None, status=None, lot_id=None, start=None, end=None, include_archive=None):
+    """
+    Builds a query over live (and, if needed, archived) reservations
+
+    Args:
+        user_id, status, lot_id: Optional filters
+        start, end: Optional reserved_at range (start inclusive, end exclusive)
+        include_archive: True/False to force, None to decide from the date range
+
+    Returns:
+        SQLAlchemy subquery with the columns of _live_select
+    """
+    if include_archive is None:
+        include_archive = range_needs_archive(start)
+
+    live = _apply_filters(_live_select(), Reservation, ParkingSpot.lot_id,
+                          user_id, status, lot_id, start, end)
+    if not include_archive:
+        return live.subquery('reservation_rows')
+
+    archived = _apply_filters(_archive_select(), ReservationArchive, ReservationArchive.lot_id,
+                              user_id, status, lot_id, start, end)
+    return union_all(live, archived).subquery('reservation_rows')
+
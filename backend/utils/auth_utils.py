@@ -5,11 +5,16 @@ Helper functions for JWT token management and role checking
 MAD-II Project - Security Functions
 """
 
+from datetime import timedelta
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask import jsonify, request, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, create_access_token
 from models.user import User
 
+# Claim of the short-lived tokens that only open the live availability stream
+STREAM_TOKEN_SCOPE = 'lot_stream'
+STREAM_ENDPOINT = 'user.stream_lot_availability'
+
 def admin_required():
     """
     Decorator to protect routes that only admins can access
@@ -45,11 +50,15 @@ def admin_required():
         return decorator
     return wrapper
 
-def user_required():
+def user_required(locations=None):
     """
     Decorator to protect routes that require any authenticated user
     Both admin and regular users can access these routes
     
+    Args:
+        locations: Where to look for the token, like @jwt_required(locations=...)
+                   (default: the Authorization header)
+    
     Example usage:
         @user_required()
         def some_user_function():
@@ -59,7 +68,7 @@ def user_required():
         @wraps(fn)
         def decorator(*args, **kwargs):
             # Verify token is valid
-            verify_jwt_in_request()
+            verify_jwt_in_request(locations=locations)
             
             # Get user ID from token
             current_user_id = get_jwt_identity()
@@ -86,3 +95,31 @@ def get_current_user():
     """
     current_user_id = get_jwt_identity()
     return User.query.get(current_user_id)
+
+
+def create_stream_token(user_id):
+    """
+    Short-lived token that only opens the live availability stream
+    The browser's EventSource cannot send headers, so this token goes in the
+    URL, where it can end up in access logs. It can't be used for anything
+    else and expires after LIVE_UPDATES_TOKEN_SECONDS.
+    (An open stream keeps running after that - only new connections need a fresh token.)
+
+    Returns:
+        (token, seconds until it expires)
+    """
+    seconds = current_app.config['LIVE_UPDATES_TOKEN_SECONDS']
+    token = create_access_token(identity=str(user_id), expires_delta=timedelta(seconds=seconds),
+                                additional_claims={'scope': STREAM_TOKEN_SCOPE})
+    return token, seconds
+
+
+def init_token_scopes(jwt_manager):
+    """
+    Stream tokens are only accepted by the stream, and the stream only
+    accepts stream tokens (never the long-lived login token in the URL)
+    """
+    @jwt_manager.token_verification_loader
+    def check_token_scope(jwt_header, jwt_data):
+        is_stream_token = jwt_data.get('scope') == STREAM_TOKEN_SCOPE
+        return is_stream_token == (request.endpoint == STREAM_ENDPOINT)
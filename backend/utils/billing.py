@@ -0,0 +1,314 @@
+"""
+Bulk Billing
+Recomputes parking_cost for many reservations at once (after a tariff
+change or a billing dispute) and builds the monthly invoices of every user
+
+Student Project - Business Logic
+Reservation.calculate_cost prices one stay at a time. Here all the stays
+are loaded as NumPy arrays (one entry per reservation) and priced together:
+- Timestamps are read as whole microseconds, so the duration and the
+  round-up to the hour are exactly what calculate_cost gets
+- Flat lots: billable hours x price_per_hour x price_multiplier
+- Lots with a tariff: CompiledTariff.stay_costs (utils/pricing.py), all
+  stays of one lot at once
+- Only costs that changed are written back, with executemany UPDATEs of
+  BILLING_BATCH_SIZE rows (one transaction per batch)
+
+Re-billing uses today's lot prices and tariffs. Archived reservations keep
+the cost they were archived with.
+"""
+
+import json
+import time
+from datetime import datetime
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, update, insert, delete, bindparam, type_coerce, func, String
+from models import db
+from models.reservation import Reservation
+from models.reservation_archive import ReservationArchive
+from models.parking_spot import ParkingSpot
+from models.parking_lot import ParkingLot
+from models.invoice import Invoice
+from models.monthly_report import get_month_range
+from utils.archive import range_needs_archive
+from utils.pricing import get_tariffs, local_hours_of_day
+
+
+# ============================================================================
+# LOADING STAYS AS ARRAYS
+# ============================================================================
+
+def timestamp_text(column):
+    """
+    A DATETIME column as SQLite stores it ('YYYY-MM-DD HH:MM:SS.ffffff'),
+    without making a datetime object per row
+    """
+    return type_coerce(column, String)
+
+
+TIMESTAMP = 'datetime64[us]'  # dtype for timestamp_text columns in rows_to_arrays
+
+
+def rows_to_arrays(rows, dtypes):
+    """
+    Query rows → one NumPy array per column
+    TIMESTAMP columns become whole microseconds since 1970 (NumPy reads
+    the text exactly - no float anywhere, so durations match timedelta's).
+    NULL timestamps become NaT (the smallest int64).
+    """
+    columns = list(zip(*rows)) if rows else [()] * len(dtypes)
+    arrays = []
+    for column, dtype in zip(columns, dtypes):
+        array = np.array(column, dtype=dtype)
+        arrays.append(array.view(np.int64) if dtype == TIMESTAMP else array)
+    return arrays
+
+
+def load_stays(lot_ids=None, start=None, end=None):
+    """
+    Completed reservations in the live table, as arrays
+
+    Args:
+        lot_ids: Only these lots (default: all)
+        start, end: Only stays that ended in this range (end exclusive)
+
+    Returns:
+        Dictionary of arrays: id, lot_id, parked_us, left_us, multiplier, cost
+        (cost is NaN where it was never set)
+    """
+    query = select(
+        Reservation.id,
+        ParkingSpot.lot_id,
+        timestamp_text(Reservation.parking_timestamp),
+        timestamp_text(Reservation.leaving_timestamp),
+        func.coalesce(Reservation.price_multiplier, 1.0),  # x 1.0 = no surcharge, same float
+        Reservation.parking_cost
+    ).join(ParkingSpot, Reservation.spot_id == ParkingSpot.id).where(
+        Reservation.status == 'completed',
+        Reservation.parking_timestamp.is_not(None),
+        Reservation.leaving_timestamp.is_not(None)
+    )
+    if lot_ids:
+        query = query.where(ParkingSpot.lot_id.in_(lot_ids))
+    if start is not None:
+        query = query.where(Reservation.leaving_timestamp >= start)
+    if end is not None:
+        query = query.where(Reservation.leaving_timestamp < end)
+
+    rows = db.session.execute(query).all()
+    names = ('id', 'lot_id', 'parked_us', 'left_us', 'multiplier', 'cost')
+    arrays = rows_to_arrays(rows, (np.int64, np.int64, TIMESTAMP, TIMESTAMP, np.float64, np.float64))
+    return dict(zip(names, arrays))
+
+
+def billable_hours(parked_us, left_us):
+    """
+    Hours rounded up, like calculate_cost (even 10 min = 1 hour)
+    total_seconds() / 3600 is repeated step by step so the floats match.
+    """
+    hours = (left_us - parked_us) / 1e6 / 3600
+    return np.where(hours > 0, np.ceil(hours), 0.0)
+
+
+# ============================================================================
+# PRICING MANY STAYS AT ONCE
+# ============================================================================
+
+def compute_costs(stays, lot_prices, tariffs):
+    """
+    What calculate_cost would charge for each stay
+
+    Args:
+        stays: Dictionary from load_stays
+        lot_prices: {lot_id: price_per_hour}
+        tariffs: {lot_id: CompiledTariff} from get_tariffs()
+
+    Returns:
+        Array of costs (NaN for stays of lots that no longer exist)
+    """
+    lot_ids = stays['lot_id']
+    if not len(lot_ids):
+        return np.zeros(0)
+
+    price_of = np.full(int(max(lot_ids.max(), max(lot_prices, default=0))) + 1, np.nan)
+    price_of[list(lot_prices)] = list(lot_prices.values())
+    rates = price_of[lot_ids] * stays['multiplier']
+
+    hours = billable_hours(stays['parked_us'], stays['left_us'])
+    costs = hours * rates
+
+    # Lots with bands or a daily cap: one stay_costs call per lot
+    tariffed = [lot_id for lot_id, tariff in tariffs.items() if not tariff.is_flat]
+    rows = np.flatnonzero(np.isin(lot_ids, tariffed)) if tariffed else np.zeros(0, dtype=np.int64)
+    if len(rows):
+        rows = rows[np.argsort(lot_ids[rows], kind='stable')]
+        local_starts = local_hours_of_day(stays['parked_us'][rows])
+        lots, firsts = np.unique(lot_ids[rows], return_index=True)
+        for lot_id, first, last in zip(lots.tolist(), firsts, list(firsts[1:]) + [len(rows)]):
+            group = rows[first:last]
+            costs[group] = tariffs[lot_id].stay_costs(rates[group], local_starts[first:last], hours[group])
+
+    return costs
+
+
+def _lot_prices():
+    return dict(db.session.execute(select(ParkingLot.id, ParkingLot.price_per_hour)).all())
+
+
+# ============================================================================
+# RE-BILLING
+# ============================================================================
+
+def rebill_reservations(lot_ids=None, start=None, end=None, dry_run=False, batch_size=None):
+    """
+    Reprices completed reservations with today's prices and tariffs
+
+    Args:
+        lot_ids: Only these lots (default: all)
+        start, end: Only stays that ended in this range
+        dry_run: Only report what would change
+        batch_size: Rows per UPDATE transaction (default BILLING_BATCH_SIZE)
+
+    Returns:
+        Dictionary with counts, old and new totals and timings
+    """
+    batch_size = batch_size or current_app.config['BILLING_BATCH_SIZE']
+    began = time.perf_counter()
+
+    stays = load_stays(lot_ids, start, end)
+    loaded = time.perf_counter()
+
+    costs = compute_costs(stays, _lot_prices(), get_tariffs())
+    priced = time.perf_counter()
+
+    # NaN != NaN, so never-billed stays count as changed; deleted lots are left alone
+    changed = np.flatnonzero((stays['cost'] != costs) & ~np.isnan(costs))
+    old_costs = np.nan_to_num(stays['cost'])
+
+    batches = 0
+    if not dry_run and len(changed):
+        table = Reservation.__table__
+        statement = update(table).where(table.c.id == bindparam('row_id')).values(
+            parking_cost=bindparam('new_cost'))
+        ids, new_costs = stays['id'][changed].tolist(), costs[changed].tolist()
+        for first in range(0, len(ids), batch_size):
+            db.session.execute(statement, [
+                {'row_id': row_id, 'new_cost': cost}
+                for row_id, cost in zip(ids[first:first + batch_size], new_costs[first:first + batch_size])
+            ])
+            db.session.commit()
+            batches += 1
+
+    return {
+        'reservations': len(costs),
+        'changed': len(changed),
+        'old_total': round(float(old_costs[changed].sum()), 2),
+        'new_total': round(float(costs[changed].sum()), 2),
+        'dry_run': dry_run,
+        'batches': batches,
+        'timings': {
+            'load_s': round(loaded - began, 3),
+            'price_s': round(priced - loaded, 3),
+            'write_s': round(time.perf_counter() - priced, 3)
+        }
+    }
+
+
+# ============================================================================
+# MONTHLY INVOICES
+# ============================================================================
+
+def _load_month_charges(start, end):
+    """user_id, lot_id, parked_us, left_us, cost of every parking that ended in the range"""
+    def charges(model, lot_column):
+        return select(
+            model.user_id,
+            func.coalesce(lot_column, 0),  # 0 = lot unknown (archived after its spot was deleted)
+            timestamp_text(model.parking_timestamp),
+            timestamp_text(model.leaving_timestamp),
+            func.coalesce(model.parking_cost, 0.0)
+        ).where(
+            model.status == 'completed',
+            model.parking_timestamp.is_not(None),
+            model.leaving_timestamp >= start,
+            model.leaving_timestamp < end
+        )
+
+    live = charges(Reservation, ParkingSpot.lot_id).join(ParkingSpot, Reservation.spot_id == ParkingSpot.id)
+    rows = db.session.execute(live).all()
+    if range_needs_archive(start):
+        rows += db.session.execute(charges(ReservationArchive, ReservationArchive.lot_id)).all()
+    return rows_to_arrays(rows, (np.int64, np.int64, TIMESTAMP, TIMESTAMP, np.float64))
+
+
+def _lot_names(lot_ids):
+    """Names of current lots, falling back to the name saved in the archive"""
+    names = dict(db.session.execute(
+        select(ParkingLot.id, ParkingLot.prime_location_name).where(ParkingLot.id.in_(lot_ids))
+    ).all())
+    missing = [lot_id for lot_id in lot_ids if lot_id not in names]
+    if missing:
+        names.update(db.session.execute(
+            select(ReservationArchive.lot_id, func.max(ReservationArchive.lot_name))
+            .where(ReservationArchive.lot_id.in_(missing)).group_by(ReservationArchive.lot_id)
+        ).all())
+    return names
+
+
+def generate_invoices(month):
+    """
+    Builds (or rebuilds) every user's invoice for one month
+
+    Args:
+        month: 'YYYY-MM'
+
+    Returns:
+        Dictionary with the number of invoices, parkings and the month's total
+    """
+    start, end = get_month_range(month)
+    user_ids, lot_ids, parked_us, left_us, costs = _load_month_charges(start, end)
+    hours = billable_hours(parked_us, left_us)
+
+    # Add up per (user, lot) pair - one pass with bincount instead of a loop
+    pairs, group = np.unique(np.column_stack((user_ids, lot_ids)), axis=0, return_inverse=True)
+    group = group.reshape(-1)
+    parkings = np.bincount(group, minlength=len(pairs)).tolist()
+    pair_hours = np.bincount(group, weights=hours, minlength=len(pairs)).tolist()
+    pair_amounts = np.bincount(group, weights=costs, minlength=len(pairs)).tolist()
+
+    names = _lot_names(sorted({lot_id for _, lot_id in pairs.tolist()}))
+    invoices = {}
+    for (user_id, lot_id), count, hours_billed, amount in zip(pairs.tolist(), parkings, pair_hours, pair_amounts):
+        invoice = invoices.setdefault(user_id, {'user_id': user_id, 'month': month, 'parkings': 0,
+                                                'billable_hours': 0, 'total_amount': 0.0, 'lines': []})
+        invoice['parkings'] += count
+        invoice['billable_hours'] += int(hours_billed)
+        invoice['total_amount'] += amount
+        invoice['lines'].append({
+            'lot_id': lot_id or None,
+            'lot_name': names.get(lot_id, 'Deleted lot'),
+            'parkings': count,
+            'billable_hours': int(hours_billed),
+            'amount': round(amount, 2)
+        })
+
+    generated_at = datetime.utcnow()
+    rows = []
+    for invoice in invoices.values():
+        invoice['lines'].sort(key=lambda line: -line['amount'])
+        rows.append({**invoice, 'total_amount': round(invoice['total_amount'], 2),
+                     'lines': json.dumps(invoice['lines']), 'generated_at': generated_at})
+
+    # Re-running a month replaces its invoices (one transaction)
+    db.session.execute(delete(Invoice).where(Invoice.month == month))
+    if rows:
+        db.session.execute(insert(Invoice), rows)
+    db.session.commit()
+
+    return {
+        'month': month,
+        'invoices': len(rows),
+        'parkings': len(costs),
+        'total_amount': round(float(costs.sum()), 2)
+    }
@@ -6,21 +6,52 @@ Student Project - Performance Optimization
 Note: App works fine even if Redis is not running (graceful fallback)
 """
 
-import redis
-import json
-import functools
-from flask import request
+import os
 from config import Config
 
-# Try to connect to Redis
-# If Redis is not running, we'll just skip caching
-try:
-    redis_client = redis.Redis.from_url(Config.REDIS_URL, decode_responses=True)
-    redis_client.ping()  # Test connection
-    print("✓ Redis cache connected successfully!")
-except redis.ConnectionError:
-    print("⚠ Warning: Redis not available - caching disabled")
-    redis_client = None
+# The Redis connection is opened the first time it is needed (not at import),
+# so importing this module is cheap - e.g. for Celery workers and CLI commands.
+# It is also reopened in a forked child process instead of sharing the
+# parent's socket.
+redis_client = None
+_redis_checked = False
+_redis_pid = None
+
+def get_redis_client():
+    """
+    Returns the Redis client, connecting on first use
+    If Redis is not running, we'll just skip caching
+    
+    Returns:
+        Redis client, or None if Redis is not available
+    """
+    global redis_client, _redis_checked, _redis_pid
+    
+    if _redis_pid != os.getpid():
+        # First call in this process (or we were forked) - start fresh
+        redis_client, _redis_checked, _redis_pid = None, False, os.getpid()
+    
+    if not _redis_checked:
+        _redis_checked = True
+        import redis  # Here, so processes that never use Redis don't pay for the import
+        try:
+            client = redis.Redis.from_url(Config.REDIS_URL, decode_responses=True)
+            client.ping()  # Test connection
+            redis_client = client
+            print("✓ Redis cache connected successfully!")
+        except redis.ConnectionError:
+            print("⚠ Warning: Redis not available - caching disabled")
+            redis_client = None
+    
+    return redis_client
+
+def reset_redis_client():
+    """
+    Forgets the current Redis connection so the next call reconnects
+    Call this in a process right after it has been forked
+    """
+    global redis_client, _redis_checked, _redis_pid
+    redis_client, _redis_checked, _redis_pid = None, False, None
 
 def is_redis_available():
     """
@@ -29,7 +60,7 @@ def is_redis_available():
     Returns:
         True if Redis is available, False otherwise
     """
-    return redis_client is not None
+    return get_redis_client() is not None
 
 def create_cache_key(*args, **kwargs):
     """
@@ -110,3 +141,20 @@ def get_cache_stats():
             'status': 'error',
             'message': str(e)
         }
+
+def increment_stat(name, amount=1):
+    """
+    Adds to a simple counter stored in Redis (e.g. how many holds were expired)
+    Does nothing if Redis is not running
+    
+    Args:
+        name: Counter name, stored under the key "stats:<name>"
+        amount: How much to add
+    """
+    if not is_redis_available() or not amount:
+        return
+    
+    try:
+        redis_client.incrby(f"stats:{name}", amount)
+    except Exception as e:
+        print(f"⚠ Stats update error: {e}")
@@ -0,0 +1,167 @@
+"""
+Spot Change Feed
+Records every spot status change in the spot_events log and reads it back
+in batches, so consumers sync in O(changes) instead of O(spots)
+
+Student Project - Scalability
+How a consumer (gate display, signage, dashboard) uses it:
+1. GET /api/admin/spots once - the response has 'last_seq'
+2. GET /api/admin/changes?since=<last_seq> - returns the next batch of events
+   and 'next_since'; repeat while 'has_more' is true, then poll again later
+3. Events hold the spot's new status (not "+1/-1"), so seeing an event twice
+   is harmless
+4. HTTP 410 means the consumer was away so long that events it needed were
+   deleted - start again at step 1
+
+Compaction (nightly task): events older than CHANGE_FEED_COMPACT_AFTER_HOURS
+are dropped when a newer event for the same spot exists - a consumer still
+ends with the right status for every spot. 'removed' events of deleted spots
+are dropped after CHANGE_FEED_REMOVED_RETENTION_DAYS; that moves the
+"floor" (the oldest 'since' that still works) up.
+"""
+
+from datetime import datetime
+from sqlalchemy import select, insert, delete, func, inspect, event
+from models import db
+from models.spot_event import SpotEvent
+from models.data_version import DataVersion
+from utils.db_routing import RoutingSession
+
+FEED_FLOOR = 'spot_events_floor'  # DataVersion row: oldest 'since' that is still complete
+
+
+# ============================================================================
+# WRITING EVENTS
+# ============================================================================
+
+def record_spot_events(connection, events):
+    """
+    Appends events to the log
+    Pass the connection of the transaction that changes the spots.
+
+    Args:
+        connection: SQLAlchemy connection, e.g. db.session.connection()
+        events: List of dictionaries (spot_id, lot_id, spot_number, status, previous_status)
+    """
+    if events:
+        now = datetime.utcnow()
+        connection.execute(insert(SpotEvent.__table__), [dict(e, created_at=now) for e in events])
+
+
+def _spot_changes(session):
+    """Events for the spots this flush created, changed or deleted"""
+    from models.parking_spot import ParkingSpot
+
+    events = []
+    for spot in session.new:
+        if isinstance(spot, ParkingSpot):
+            events.append({'spot_id': spot.id, 'lot_id': spot.lot_id, 'spot_number': spot.spot_number,
+                           'status': spot.status or 'available', 'previous_status': None})
+    for spot in session.dirty:
+        if isinstance(spot, ParkingSpot):
+            history = inspect(spot).attrs.status.history
+            if history.has_changes():
+                events.append({'spot_id': spot.id, 'lot_id': spot.lot_id, 'spot_number': spot.spot_number,
+                               'status': spot.status,
+                               'previous_status': history.deleted[0] if history.deleted else None})
+    for spot in session.deleted:
+        if isinstance(spot, ParkingSpot):
+            events.append({'spot_id': spot.id, 'lot_id': spot.lot_id, 'spot_number': spot.spot_number,
+                           'status': 'removed', 'previous_status': spot.status})
+    return events
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _log_spot_changes(session, flush_context):
+    """Writes the events inside the transaction of the change (both commit or neither)"""
+    record_spot_events(session.connection(), _spot_changes(session))
+
+
+# ============================================================================
+# READING THE FEED
+# ============================================================================
+
+def get_last_seq():
+    """Newest sequence number (0 if the log is empty)"""
+    return db.session.execute(select(func.max(SpotEvent.seq))).scalar() or 0
+
+
+def get_feed_floor():
+    """Oldest 'since' value that still gets every needed event"""
+    return db.session.execute(
+        select(DataVersion.version).where(DataVersion.name == FEED_FLOOR)
+    ).scalar() or 0
+
+
+def event_to_dict(row):
+    """One event as sent to consumers"""
+    return {
+        'seq': row.seq,
+        'spot_id': row.spot_id,
+        'lot_id': row.lot_id,
+        'spot_number': row.spot_number,
+        'status': row.status,
+        'previous_status': row.previous_status,
+        'created_at': row.created_at
+    }
+
+
+def get_changes(since, limit):
+    """
+    One batch of events after `since` (uses the primary key - no table scan)
+
+    Args:
+        since: Last sequence number the consumer has seen
+        limit: Most events to return
+
+    Returns:
+        (events, has_more) - events is a list of dictionaries in seq order
+    """
+    rows = db.session.execute(
+        select(SpotEvent.seq, SpotEvent.spot_id, SpotEvent.lot_id, SpotEvent.spot_number,
+               SpotEvent.status, SpotEvent.previous_status, SpotEvent.created_at)
+        .where(SpotEvent.seq > since).order_by(SpotEvent.seq).limit(limit + 1)
+    ).all()
+    return [event_to_dict(row) for row in rows[:limit]], len(rows) > limit
+
+
+# ============================================================================
+# COMPACTION
+# ============================================================================
+
+def compact_spot_events(compact_before, remove_before):
+    """
+    Shrinks the log (see the module docstring). Commits.
+
+    Args:
+        compact_before: Superseded events older than this are deleted
+        remove_before: 'removed' events older than this are deleted
+
+    Returns:
+        Dictionary with how many events were compacted and removed, and the floor
+    """
+    newest_per_spot = select(func.max(SpotEvent.seq)).group_by(SpotEvent.spot_id)
+    compacted = db.session.execute(
+        delete(SpotEvent).where(
+            SpotEvent.created_at < compact_before,
+            SpotEvent.seq.not_in(newest_per_spot)
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+
+    # Deleting the last event of a spot means consumers from before it would miss it
+    removed_floor = db.session.execute(
+        select(func.max(SpotEvent.seq)).where(SpotEvent.status == 'removed', SpotEvent.created_at < remove_before)
+    ).scalar()
+    removed = 0
+    if removed_floor:
+        removed = db.session.execute(
+            delete(SpotEvent).where(SpotEvent.status == 'removed', SpotEvent.created_at < remove_before)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        floor = db.session.get(DataVersion, FEED_FLOOR) or DataVersion(name=FEED_FLOOR, version=0)
+        floor.version = max(floor.version, removed_floor)
+        floor.updated_at = datetime.utcnow()
+        db.session.add(floor)
+
+    db.session.commit()
+    return {'compacted': compacted, 'removed': removed, 'floor': get_feed_floor()}
@@ -0,0 +1,93 @@
+"""
+Response Compression
+Compresses large JSON responses with brotli or gzip, whichever the client
+accepts (Accept-Encoding). Lot and spot lists shrink to about a tenth.
+
+Student Project - Performance Optimization
+- Only JSON bodies of at least COMPRESS_MIN_BYTES are compressed (small ones
+  are not worth the CPU time)
+- brotli is used if the `brotli` package is installed, otherwise gzip
+- A strong ETag gets "-gzip"/"-br" added, because the compressed bytes
+  are a different representation than the uncompressed ones
+- Files (profile downloads) and already-encoded responses are left alone
+
+Turn it off with COMPRESSION_ENABLED=false (e.g. behind nginx with gzip on).
+"""
+
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Optional - gzip is always available
+    brotli = None
+
+ENCODING_ETAG_SUFFIXES = ('-gzip', '-br')
+
+
+def choose_encoding(accept_encodings):
+    """
+    Picks the best encoding the client accepts
+
+    Args:
+        accept_encodings: request.accept_encodings
+
+    Returns:
+        'br', 'gzip' or None
+    """
+    if brotli is not None and accept_encodings['br'] > 0:
+        return 'br'
+    if accept_encodings['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding, level):
+    """
+    Compresses a response body
+
+    Args:
+        body: Bytes to compress
+        encoding: 'br' or 'gzip'
+        level: gzip level 1-9 (brotli uses a fast quality, 4)
+
+    Returns:
+        Compressed bytes
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=4)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def init_compression(app):
+    """
+    Adds response compression to the app (if COMPRESSION_ENABLED)
+    """
+    if not app.config.get('COMPRESSION_ENABLED'):
+        return
+
+    min_bytes = app.config['COMPRESS_MIN_BYTES']
+    level = app.config['COMPRESS_LEVEL']
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or response.mimetype != 'application/json' or 'Content-Encoding' in response.headers):
+            return response
+
+        body = response.get_data()
+        if len(body) < min_bytes:
+            return response
+
+        # The body depends on Accept-Encoding from here on, also for clients without gzip
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        response.set_data(compress(body, encoding, level))  # Also updates Content-Length
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f'{etag}-{encoding}')
+        return response
@@ -0,0 +1,269 @@
+"""
+Synthetic Data Generator
+Fills the database with production-sized data (thousands of lots,
+hundreds of thousands of users, millions of reservations) so performance
+problems can be reproduced locally. Used by `python init_db.py --synthetic`.
+
+Student Project - Performance Testing
+How the data looks:
+- Lot popularity follows a long tail (a few busy lots, many quiet ones)
+- A few users park very often, most only now and then (log-normal weights)
+- Arrivals follow a daily curve with morning and evening peaks, fewer on
+  weekends, and grow slowly over the months
+- Parking time is log-normal (most stays are 1-3 hours, some all day),
+  and each lot has its own typical stay (an airport vs a shopping mall)
+- Reservations are billed like Reservation.calculate_cost (hours rounded up)
+- Lots are spread around one city centre, denser near the middle
+
+Speed: rows are generated with NumPy in batches and inserted with one
+executemany per batch inside large transactions. The reservation indexes
+are dropped during the load and rebuilt at the end, which is much faster
+than updating six indexes for every row.
+
+The same seed and end date always produce exactly the same data.
+"""
+
+import time
+import numpy as np
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from models.user import User
+from models.reservation import Reservation
+from utils.http_cache import bump_version, LOT_LOCATIONS
+
+AREAS = ['Downtown', 'Central', 'Airport', 'Railway Station', 'Tech Park', 'Old City', 'Harbour',
+         'University', 'Hospital', 'Stadium', 'Market', 'Riverside', 'Lake View', 'Industrial Area']
+KINDS = ['Plaza', 'Mall', 'Tower', 'Complex', 'Square', 'Terminal', 'Garage', 'Hub']
+
+# Share of arrivals starting in each hour of the day (00:00 ... 23:00)
+HOURLY_ARRIVALS = np.array([
+    0.2, 0.1, 0.1, 0.1, 0.2, 0.5, 1.5, 4.0, 7.5, 8.5, 7.0, 6.0,
+    6.0, 6.0, 5.5, 5.5, 6.0, 7.0, 7.5, 6.0, 4.0, 2.5, 1.5, 0.7
+])
+HOURLY_ARRIVALS = HOURLY_ARRIVALS / HOURLY_ARRIVALS.sum()
+
+# Monday ... Sunday
+WEEKDAY_FACTOR = np.array([1.0, 1.0, 1.0, 1.05, 1.15, 0.8, 0.6])
+
+SECONDS_PER_HOUR = 3600
+
+# Lots are placed around this point (New Delhi - the pin codes are 1100xx)
+CITY_CENTER = (28.6139, 77.2090)
+CITY_SPREAD_DEGREES = 0.08  # Standard deviation, about 9 km
+
+
+def to_sqlite_datetimes(values):
+    """
+    Converts datetime64 values to the text format SQLAlchemy stores in SQLite
+    ('YYYY-MM-DD HH:MM:SS.ffffff'), without a Python loop
+
+    Args:
+        values: NumPy datetime64 array
+
+    Returns:
+        List of strings
+    """
+    text_values = np.datetime_as_string(values.astype('datetime64[us]'), unit='us').astype('S26')
+    chars = text_values.view(np.uint8).reshape(-1, 26).copy()
+    chars[:, 10] = ord(' ')  # ISO format has a 'T' between date and time
+    return chars.view('S26').ravel().astype('U26').tolist()
+
+
+def _generate_lots(rng, number_of_lots, spots_per_lot):
+    """Lot names, prices, sizes, popularity and typical parking time"""
+    names = [f'{AREAS[i % len(AREAS)]} {KINDS[(i // len(AREAS)) % len(KINDS)]} {i + 1}'
+             for i in range(number_of_lots)]
+    prices = np.round(rng.uniform(20, 100, number_of_lots) / 5) * 5
+    sizes = np.maximum(5, rng.normal(spots_per_lot, spots_per_lot * 0.3, number_of_lots)).astype(int)
+
+    # Long tail: weight of the n-th most popular lot ~ 1 / n^0.8
+    popularity = 1.0 / np.arange(1, number_of_lots + 1) ** 0.8
+    rng.shuffle(popularity)
+    popularity = popularity / popularity.sum()
+
+    # Median stay per lot in hours (1.5 h on average, airports-like lots much longer)
+    typical_stay = np.exp(rng.normal(np.log(1.5), 0.5, number_of_lots))
+    return names, prices, sizes, popularity, typical_stay
+
+
+def _generate_locations(seed, number_of_lots):
+    """
+    Latitude and longitude of each lot
+    Uses its own random generator, so adding positions did not change the
+    rest of the data for a given seed.
+    """
+    rng = np.random.default_rng([seed, 1])
+    offsets = rng.normal(0, CITY_SPREAD_DEGREES, (number_of_lots, 2))
+    latitudes = np.round(CITY_CENTER[0] + offsets[:, 0], 6)
+    longitudes = np.round(CITY_CENTER[1] + offsets[:, 1] / np.cos(np.radians(CITY_CENTER[0])), 6)
+    return latitudes, longitudes
+
+
+def _daily_counts(rng, start, days, total):
+    """How many reservations start on each day (weekday pattern + slow growth)"""
+    weekdays = (np.arange(days) + start.weekday()) % 7
+    growth = np.linspace(0.8, 1.2, days)
+    weights = WEEKDAY_FACTOR[weekdays] * growth
+    return rng.multinomial(total, weights / weights.sum())
+
+
+def _reservation_batch(rng, start, day_numbers, lot_weights, lot_first_spot, lot_sizes,
+                       lot_prices, lot_stays, user_ids, user_weights):
+    """
+    Generates one batch of completed reservations (sorted by reserved_at)
+
+    Returns:
+        List of row tuples for the INSERT statement
+    """
+    count = len(day_numbers)
+
+    # When: day + hour from the daily curve + random second within the hour
+    hours = rng.choice(24, size=count, p=HOURLY_ARRIVALS)
+    seconds = day_numbers * 86400 + hours * SECONDS_PER_HOUR + rng.integers(0, SECONDS_PER_HOUR, count)
+    order = np.argsort(seconds, kind='stable')
+    seconds = seconds[order]
+
+    # Where and who
+    lots = rng.choice(len(lot_weights), size=count, p=lot_weights)
+    spot_ids = lot_first_spot[lots] + (rng.random(count) * lot_sizes[lots]).astype(np.int64)
+    users = user_ids[rng.choice(len(user_ids), size=count, p=user_weights)]
+
+    # How long: a few minutes from reserving to parking, log-normal stay (5 min - 24 h)
+    delay = np.minimum(rng.exponential(8 * 60, count), 3600).astype(np.int64)
+    stay_hours = np.clip(lot_stays[lots] * np.exp(rng.normal(0, 0.7, count)), 5 / 60, 24)
+    stay = (stay_hours * SECONDS_PER_HOUR).astype(np.int64)
+    cost = np.ceil(stay / SECONDS_PER_HOUR) * lot_prices[lots]
+
+    base = np.datetime64(start, 's')
+    reserved_at = base + seconds.astype('timedelta64[s]')
+    parked_at = reserved_at + delay.astype('timedelta64[s]')
+    left_at = parked_at + stay.astype('timedelta64[s]')
+
+    return list(zip(
+        spot_ids.tolist(),
+        users.tolist(),
+        to_sqlite_datetimes(reserved_at),
+        to_sqlite_datetimes(parked_at),
+        to_sqlite_datetimes(left_at),
+        cost.tolist()
+    ))
+
+
+def generate_synthetic_data(db, lots=50, spots_per_lot=100, users=1000, reservations=100000,
+                            months=12, seed=42, end_date=None, batch_size=200000):
+    """
+    Generates lots, spots, users and reservation history
+
+    Call inside an app context, on a database that already has the tables.
+
+    Args:
+        db: Flask-SQLAlchemy instance
+        lots, spots_per_lot, users, reservations: How much data to create
+        months: How many months of history (ending at end_date)
+        seed: Random seed - same seed and end date give the same data
+        end_date: Last day of history (default: today, UTC)
+        batch_size: Reservations generated and inserted per transaction
+
+    Returns:
+        Dictionary with counts and timings
+    """
+    rng = np.random.default_rng(seed)
+    end_date = end_date or datetime.utcnow().date()
+    end = datetime(end_date.year, end_date.month, end_date.day)
+    start = end - timedelta(days=int(months * 30.4))
+    days = (end - start).days
+    created_at = start.strftime('%Y-%m-%d %H:%M:%S.%f')
+    timings = {}
+    began = time.perf_counter()
+
+    # --- Lots and spots ---
+    names, prices, sizes, lot_weights, lot_stays = _generate_lots(rng, lots, spots_per_lot)
+    latitudes, longitudes = _generate_locations(seed, lots)
+    with db.engine.begin() as conn:
+        first_lot_id = (conn.execute(text('SELECT COALESCE(MAX(id), 0) FROM parking_lots')).scalar() or 0) + 1
+        conn.exec_driver_sql(
+            'INSERT INTO parking_lots (prime_location_name, price_per_hour, address, pin_code, '
+            'latitude, longitude, number_of_spots, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [(names[i], float(prices[i]), f'{i + 1} {AREAS[i % len(AREAS)]} Road',
+              str(110001 + i % 99), float(latitudes[i]), float(longitudes[i]), int(sizes[i]),
+              created_at, created_at) for i in range(lots)]
+        )
+        bump_version(conn, LOT_LOCATIONS)  # Raw INSERTs skip the ORM listener
+        lot_ids = np.arange(first_lot_id, first_lot_id + lots)
+        conn.exec_driver_sql(
+            'INSERT INTO parking_spots (lot_id, spot_number, status, created_at) VALUES (?, ?, ?, ?)',
+            [(int(lot_ids[i]), n, 'available', created_at) for i in range(lots) for n in range(1, sizes[i] + 1)]
+        )
+        first_spot = dict(conn.execute(text(
+            'SELECT lot_id, MIN(id) FROM parking_spots WHERE lot_id >= :first GROUP BY lot_id'
+        ), {'first': first_lot_id}).all())
+    lot_first_spot = np.array([first_spot[int(lot_id)] for lot_id in lot_ids], dtype=np.int64)
+    timings['lots_and_spots_s'] = round(time.perf_counter() - began, 2)
+
+    # --- Users (one password hash shared by all - hashing is slow on purpose) ---
+    step = time.perf_counter()
+    template = User(username='template', email='template@example.com')
+    template.set_password('password123')
+    signup_offsets = rng.integers(0, 30 * 86400, users)
+    signups = to_sqlite_datetimes(np.datetime64(start, 's') - signup_offsets.astype('timedelta64[s]'))
+    with db.engine.begin() as conn:
+        first_user_id = (conn.execute(text('SELECT COALESCE(MAX(id), 0) FROM users')).scalar() or 0) + 1
+        conn.exec_driver_sql(
+            'INSERT INTO users (username, email, password_hash, role, created_at) VALUES (?, ?, ?, ?, ?)',
+            [(f'synthetic_user{i}', f'synthetic_user{i}@example.com', template.password_hash, 'user', signups[i])
+             for i in range(users)]
+        )
+    user_ids = np.arange(first_user_id, first_user_id + users)
+    # Log-normal activity, capped so nobody parks more than ~20x as often as a typical user
+    user_weights = np.minimum(rng.lognormal(0, 1.0, users), 20)
+    user_weights = user_weights / user_weights.sum()
+    timings['users_s'] = round(time.perf_counter() - step, 2)
+
+    # --- Reservations, oldest first, in batches ---
+    step = time.perf_counter()
+    reservation_table = Reservation.__table__
+    insert_sql = (
+        'INSERT INTO reservations (spot_id, user_id, reserved_at, parking_timestamp, leaving_timestamp, '
+        "status, parking_cost) VALUES (?, ?, ?, ?, ?, 'completed', ?)"
+    )
+    with db.engine.begin() as conn:
+        for index in reservation_table.indexes:
+            index.drop(conn, checkfirst=True)
+
+    per_day = _daily_counts(rng, start, days - 1, reservations)
+    day_of_row = np.repeat(np.arange(days - 1), per_day)
+    inserted = 0
+    for batch_start in range(0, reservations, batch_size):
+        day_numbers = day_of_row[batch_start:batch_start + batch_size]
+        rows = _reservation_batch(rng, start, day_numbers, lot_weights, lot_first_spot, sizes,
+                                  prices, lot_stays, user_ids, user_weights)
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(insert_sql, rows)
+        inserted += len(rows)
+        rate = inserted / (time.perf_counter() - step)
+        print(f"  ... {inserted:,} / {reservations:,} reservations ({rate:,.0f} rows/s)")
+    timings['reservations_s'] = round(time.perf_counter() - step, 2)
+
+    step = time.perf_counter()
+    print("  ... rebuilding reservation indexes")
+    with db.engine.begin() as conn:
+        for index in reservation_table.indexes:
+            index.create(conn, checkfirst=True)
+        # Reminder emails look at the last booking date
+        conn.execute(text(
+            'UPDATE users SET last_booking_date = '
+            '(SELECT MAX(parking_timestamp) FROM reservations WHERE reservations.user_id = users.id) '
+            'WHERE id >= :first'
+        ), {'first': first_user_id})
+    timings['indexes_s'] = round(time.perf_counter() - step, 2)
+    timings['total_s'] = round(time.perf_counter() - began, 2)
+
+    return {
+        'lots': lots,
+        'spots': int(sizes.sum()),
+        'users': users,
+        'reservations': inserted,
+        'history': f'{start.date()} to {end.date()}',
+        'seed': seed,
+        'timings': timings
+    }
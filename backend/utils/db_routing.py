@@ -0,0 +1,188 @@
+"""
+Read Replica Routing
+Sends read-only endpoints (listings, history, analytics, exports) to a
+replica database so heavy reports can't slow down reservations
+
+Student Project - Scalability
+How it works:
+- DATABASE_REPLICA_URL adds a 'replica' bind next to the main database
+- Routes marked with @read_replica() read from the replica
+- Everything else (and anything that writes) uses the primary
+- Read-your-writes: a user who just changed something reads from the
+  primary for a few seconds, so they never see stale data right after
+  their own update (the replica may lag behind)
+
+Local stand-in: the replica can be a second SQLite file that is refreshed
+from the primary with SQLite's backup API (see refresh_sqlite_replica).
+"""
+
+import time
+import sqlite3
+import threading
+from functools import wraps
+from contextlib import contextmanager
+from flask import g, has_app_context, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from config import Config
+
+REPLICA_BIND = 'replica'
+
+# user_id → time of their last write (used when Redis is not running)
+_recent_writes = {}
+_recent_writes_lock = threading.Lock()
+
+
+class RoutingSession(Session):
+    """
+    Database session that can read from the replica
+
+    Reads go to the replica only when the current request asked for it
+    (g.db_read_replica) and this session has not written anything yet.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not self.info.get('has_writes')
+                and wants_replica()):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _remember_writes(session, flush_context):
+    """After a flush, the rest of this session must read from the primary"""
+    session.info['has_writes'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _record_recent_write(session):
+    """Remembers which user just committed (read-your-writes guard)"""
+    if not session.info.get('has_writes') or not has_request_context():
+        return
+    user_id = _current_user_id()
+    if user_id is not None:
+        mark_recent_write(user_id)
+
+
+def _current_user_id():
+    """JWT user ID of the current request, or None"""
+    try:
+        from flask_jwt_extended import get_jwt_identity
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+
+def wants_replica():
+    """True if the current request/task asked to read from the replica"""
+    return has_app_context() and g.get('db_read_replica', False)
+
+
+def mark_recent_write(user_id):
+    """
+    Records that a user just wrote to the database
+    Their reads stay on the primary for REPLICA_READ_YOUR_WRITES_SECONDS
+    """
+    from utils.cache import get_redis_client
+
+    seconds = Config.REPLICA_READ_YOUR_WRITES_SECONDS
+    client = get_redis_client()
+    if client is not None:
+        try:
+            # Shared between all server processes
+            client.set(f'db:recent_write:{user_id}', 1, ex=seconds)
+            return
+        except Exception:
+            pass
+    with _recent_writes_lock:
+        _recent_writes[str(user_id)] = time.monotonic()
+
+
+def has_recent_write(user_id):
+    """True if the user wrote something within the read-your-writes window"""
+    from utils.cache import get_redis_client
+
+    if user_id is None:
+        return False
+    client = get_redis_client()
+    if client is not None:
+        try:
+            return bool(client.exists(f'db:recent_write:{user_id}'))
+        except Exception:
+            pass
+    with _recent_writes_lock:
+        written_at = _recent_writes.get(str(user_id))
+    return written_at is not None and time.monotonic() - written_at < Config.REPLICA_READ_YOUR_WRITES_SECONDS
+
+
+def is_replica_configured():
+    """True if a replica database URL is set"""
+    return bool(Config.SQLALCHEMY_REPLICA_URI)
+
+
+def read_replica():
+    """
+    Decorator for read-only routes that may be served from the replica
+
+    Example usage:
+        @read_replica()
+        def get_revenue_analytics():
+            pass
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            if is_replica_configured() and not has_recent_write(_current_user_id()):
+                g.db_read_replica = True
+            return fn(*args, **kwargs)
+
+        return decorator
+    return wrapper
+
+
+@contextmanager
+def use_read_replica():
+    """
+    Reads inside this block go to the replica (for background tasks)
+
+    Example:
+        with use_read_replica():
+            reservations = Reservation.query.filter_by(user_id=5).all()
+    """
+    previous = g.get('db_read_replica', False)
+    g.db_read_replica = is_replica_configured()
+    try:
+        yield
+    finally:
+        g.db_read_replica = previous
+
+
+def refresh_sqlite_replica(primary_uri, replica_uri, pages_per_step=1024):
+    """
+    Copies the primary SQLite database into the replica file
+    Uses SQLite's online backup API, so the primary stays usable meanwhile
+
+    Args:
+        primary_uri: SQLAlchemy URL of the primary database
+        replica_uri: SQLAlchemy URL of the replica database
+
+    Returns:
+        Seconds the copy took
+    """
+    primary_path = make_url(primary_uri).database
+    replica_path = make_url(replica_uri).database
+    if not primary_path or not replica_path or primary_path == replica_path:
+        raise ValueError('Replica refresh needs two different SQLite files')
+
+    start = time.perf_counter()
+    source = sqlite3.connect(primary_path, timeout=30)
+    target = sqlite3.connect(replica_path, timeout=30)
+    try:
+        source.backup(target, pages=pages_per_step)
+    finally:
+        target.close()
+        source.close()
+    return time.perf_counter() - start
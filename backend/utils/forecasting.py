@@ -0,0 +1,288 @@
+"""
+Occupancy Forecasts
+Fits a small seasonal model for every lot in the background, so "how full
+will this lot be in the next hours?" is answered from a stored profile
+
+Student Project - Analytics
+The model (all lots at once, with NumPy):
+1. From the reservation history (live and archived), the spot-hours used in
+   every hour of the last FORECAST_HISTORY_WEEKS weeks. Stays are cut at the
+   hour marks: 9:40 → 11:10 adds 1/3 to 9:00, 1 to 10:00 and 1/6 to 11:00.
+2. Divided by the lot's spots = share of spots taken in each hour.
+3. The weeks are blended oldest to newest with exponential smoothing:
+   profile = alpha x this week + (1 - alpha) x profile. Recent weeks count
+   the most, and one odd week (a holiday) only moves the profile a little.
+4. The 168-hour profile is saved in lot_forecasts (models/lot_forecast.py).
+
+A forecast for the next hours is just the profile read at the coming hours
+of the week - nothing is fitted on the request path.
+Hours of the week are counted in UTC (hours since 1970 % 168), which works
+for any fixed local offset.
+"""
+
+import time
+import numpy as np
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, delete, insert, or_
+from models import db
+from models.parking_lot import ParkingLot
+from models.parking_spot import ParkingSpot
+from models.reservation import Reservation
+from models.reservation_archive import ReservationArchive
+from models.lot_forecast import LotForecast, HOURS_PER_WEEK
+from utils.archive import range_needs_archive
+from utils.billing import timestamp_text, rows_to_arrays, TIMESTAMP
+from utils.http_cache import bump_version, FORECASTS
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECONDS_PER_HOUR = 3_600_000_000
+
+
+# ============================================================================
+# HOURS
+# ============================================================================
+
+def current_hour():
+    """Start of the current UTC hour"""
+    return datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+
+
+def forecast_period():
+    """The current UTC hour, like '2026101904' - forecasts move on by one hour every hour"""
+    return current_hour().strftime('%Y%m%d%H')
+
+
+def hours_since_epoch(moment):
+    """Whole UTC hours since 1970 (naive UTC datetime, as the app stores times)"""
+    return (moment - EPOCH) // timedelta(hours=1)
+
+
+# ============================================================================
+# HISTORY → SHARE OF SPOTS TAKEN PER HOUR
+# ============================================================================
+
+def load_window_stays(window_start, window_end):
+    """
+    Stays that overlap the window, as arrays (lot_id, parked_us, left_us)
+    Cars still parked count until window_end.
+    """
+    live = select(
+        ParkingSpot.lot_id,
+        timestamp_text(Reservation.parking_timestamp),
+        timestamp_text(Reservation.leaving_timestamp)
+    ).join(ParkingSpot, Reservation.spot_id == ParkingSpot.id).where(
+        Reservation.status.in_(('active', 'completed')),
+        Reservation.parking_timestamp.is_not(None),
+        Reservation.parking_timestamp < window_end,
+        or_(Reservation.leaving_timestamp.is_(None), Reservation.leaving_timestamp >= window_start)
+    )
+    rows = db.session.execute(live).all()
+
+    if range_needs_archive(window_start):
+        rows += db.session.execute(select(
+            ReservationArchive.lot_id,
+            timestamp_text(ReservationArchive.parking_timestamp),
+            timestamp_text(ReservationArchive.leaving_timestamp)
+        ).where(
+            ReservationArchive.lot_id.is_not(None),
+            ReservationArchive.parking_timestamp.is_not(None),
+            ReservationArchive.parking_timestamp < window_end,
+            ReservationArchive.leaving_timestamp >= window_start
+        )).all()
+
+    lot_ids, parked_us, left_us = rows_to_arrays(rows, (np.int64, TIMESTAMP, TIMESTAMP))
+    still_parked = left_us == np.iinfo(np.int64).min  # NaT
+    left_us[still_parked] = hours_since_epoch(window_end) * MICROSECONDS_PER_HOUR
+    return lot_ids, parked_us, left_us
+
+
+def occupied_spot_hours(lot_index, start_hours, end_hours, lots, hours):
+    """
+    Spot-hours used in each hour, per lot
+
+    Args:
+        lot_index: Array, row of each stay's lot (0 to lots - 1)
+        start_hours, end_hours: Arrays, stay start/end in hours since the
+            window start (0 to hours, fractions allowed)
+        lots, hours: Size of the result
+
+    Returns:
+        lots x hours array
+    """
+    width = hours + 1  # Spare column for stays that end exactly at the window end
+    first = np.floor(start_hours).astype(np.int64)
+    last = np.floor(end_hours).astype(np.int64)
+    row = lot_index * width
+    size = lots * width
+    one_hour = first == last
+    longer = ~one_hour
+
+    # Partial hours: the whole stay if it fits in one hour, else its first and last hour
+    # (float from the start: bincount of an empty selection is int64, even with weights,
+    # and adding float counts to an int array fails)
+    used = np.zeros(size, dtype=np.float64)
+    used += np.bincount(row[one_hour] + first[one_hour],
+                        weights=end_hours[one_hour] - start_hours[one_hour], minlength=size)
+    used += np.bincount(row[longer] + first[longer], weights=first[longer] + 1 - start_hours[longer],
+                        minlength=size)
+    used += np.bincount(row[longer] + last[longer], weights=end_hours[longer] - last[longer],
+                        minlength=size)
+
+    # Full hours in between: +1 after the first hour, -1 at the last, then a running sum
+    steps = (np.bincount(row[longer] + first[longer] + 1, minlength=size)
+             - np.bincount(row[longer] + last[longer], minlength=size))
+    used = used.reshape(lots, width) + np.cumsum(steps.reshape(lots, width), axis=1)
+    return used[:, :hours]
+
+
+def fit_profiles(occupancy, alpha):
+    """
+    Exponential smoothing of the weeks, oldest first
+
+    Args:
+        occupancy: lots x (weeks x 168) shares of spots taken
+        alpha: Weight of each new week (0 to 1)
+
+    Returns:
+        (lots x 168 profiles, weeks of history of each lot)
+        A lot's smoothing starts at its first week with any parking.
+    """
+    weeks = occupancy.reshape(len(occupancy), -1, HOURS_PER_WEEK)
+    profiles = weeks[:, 0].copy()
+    seen = weeks[:, 0].any(axis=1)
+    weeks_of_history = seen.astype(np.int64)
+
+    for week in range(1, weeks.shape[1]):
+        current = weeks[:, week]
+        profiles = np.where(seen[:, None], alpha * current + (1 - alpha) * profiles, current)
+        seen |= current.any(axis=1)
+        weeks_of_history += seen
+    return profiles, weeks_of_history
+
+
+# ============================================================================
+# FITTING AND SAVING
+# ============================================================================
+
+def fit_forecasts(now=None, weeks=None, alpha=None, lot_batch=None):
+    """
+    Fits the hour-of-week profile of every lot
+
+    Args:
+        now: End of the history (default: the start of the current hour)
+        weeks: Weeks of history (default FORECAST_HISTORY_WEEKS)
+        alpha: Smoothing weight (default FORECAST_SMOOTHING)
+        lot_batch: Lots fitted at once, limits memory (default FORECAST_LOT_BATCH)
+
+    Returns:
+        {lot_id: (168 shares of spots taken indexed by hour of week, weeks of history)}
+        Lots without any parking in the window are left out.
+    """
+    config = current_app.config
+    weeks = weeks or config['FORECAST_HISTORY_WEEKS']
+    alpha = alpha if alpha is not None else config['FORECAST_SMOOTHING']
+    lot_batch = lot_batch or config['FORECAST_LOT_BATCH']
+
+    window_end = (now or current_hour()).replace(minute=0, second=0, microsecond=0)
+    window_start = window_end - timedelta(weeks=weeks)
+    first_hour = hours_since_epoch(window_start)
+    hours = weeks * HOURS_PER_WEEK
+
+    lots = db.session.execute(select(ParkingLot.id, ParkingLot.number_of_spots).order_by(ParkingLot.id)).all()
+    all_lot_ids, spots = rows_to_arrays(lots, (np.int64, np.float64))
+
+    lot_ids, parked_us, left_us = load_window_stays(window_start, window_end)
+    start_hours = np.clip(parked_us / MICROSECONDS_PER_HOUR - first_hour, 0, hours)
+    end_hours = np.clip(left_us / MICROSECONDS_PER_HOUR - first_hour, 0, hours)
+
+    # Row of each stay's lot; stays of deleted lots and empty stays are dropped
+    lot_index = np.searchsorted(all_lot_ids, lot_ids)
+    known = (lot_index < len(all_lot_ids)) & (end_hours > start_hours)
+    known[known] = all_lot_ids[lot_index[known]] == lot_ids[known]
+    order = np.argsort(lot_index[known], kind='stable')
+    lot_index, start_hours, end_hours = lot_index[known][order], start_hours[known][order], end_hours[known][order]
+
+    fitted = {}
+    for first in range(0, len(all_lot_ids), lot_batch):
+        last = min(first + lot_batch, len(all_lot_ids))
+        rows = slice(*np.searchsorted(lot_index, [first, last]))
+        used = occupied_spot_hours(lot_index[rows] - first, start_hours[rows], end_hours[rows],
+                                   last - first, hours)
+        batch_spots = spots[first:last, None]
+        occupancy = np.divide(used, batch_spots, out=np.zeros(used.shape), where=batch_spots > 0)
+        profiles, weeks_of_history = fit_profiles(np.clip(occupancy, 0, 1), alpha)
+
+        # Column j of the window is hour of week (first_hour + j) % 168
+        profiles = np.roll(profiles, first_hour % HOURS_PER_WEEK, axis=1)
+        for i in np.flatnonzero(weeks_of_history):
+            fitted[int(all_lot_ids[first + i])] = (profiles[i], int(weeks_of_history[i]))
+    return fitted
+
+
+def save_forecasts(fitted):
+    """
+    Replaces all stored forecasts (one transaction)
+
+    Args:
+        fitted: Dictionary from fit_forecasts
+    """
+    fitted_at = datetime.utcnow()
+    db.session.execute(delete(LotForecast))
+    if fitted:
+        db.session.execute(insert(LotForecast), [
+            {'lot_id': lot_id, 'profile': LotForecast.encode_profile(profile),
+             'weeks_of_history': weeks_of_history, 'fitted_at': fitted_at}
+            for lot_id, (profile, weeks_of_history) in fitted.items()
+        ])
+    bump_version(db.session.connection(), FORECASTS)
+    db.session.commit()
+
+
+def refresh_forecasts(weeks=None):
+    """
+    Fits and saves the forecasts of all lots (the nightly job)
+
+    Returns:
+        Dictionary with the number of lots and the time taken
+    """
+    began = time.perf_counter()
+    fitted = fit_forecasts(weeks=weeks)
+    fit_seconds = time.perf_counter() - began
+    save_forecasts(fitted)
+    return {
+        'lots': len(fitted),
+        'fit_s': round(fit_seconds, 3),
+        'total_s': round(time.perf_counter() - began, 3)
+    }
+
+
+# ============================================================================
+# READING A FORECAST (request path)
+# ============================================================================
+
+def upcoming_hours(forecast, number_of_spots, hours, start=None):
+    """
+    The stored profile for the next hours
+
+    Args:
+        forecast: LotForecast row
+        number_of_spots: Size of the lot
+        hours: How many hours
+        start: First hour (default: the current hour)
+
+    Returns:
+        List of {'hour', 'occupancy', 'expected_available'}
+    """
+    start = start or current_hour()
+    profile = forecast.occupancy_profile()
+    first_slot = hours_since_epoch(start)
+    upcoming = []
+    for h in range(hours):
+        occupancy = float(profile[(first_slot + h) % HOURS_PER_WEEK])
+        upcoming.append({
+            'hour': (start + timedelta(hours=h)).isoformat(),
+            'occupancy': occupancy,
+            'expected_available': int(round(number_of_spots * (1 - occupancy)))
+        })
+    return upcoming
@@ -0,0 +1,39 @@
+"""
+Fork Safety
+Cleans up what a worker process inherited from its parent
+
+Student Project - Scalability
+Both the web server (serve.py, gunicorn with the app preloaded) and the
+Celery prefork pool build the app once in the parent and then fork()
+the workers. A child gets a copy of everything the parent had open:
+- SQLAlchemy's pooled database connections
+- the Redis client's socket
+- the local task queue's SQLite connection
+Two processes talking over the same connection mix up each other's
+answers (or corrupt a SQLite transaction), so every child drops these
+right after the fork and opens its own the first time it needs them.
+
+The inherited connections are forgotten, not closed - closing them in the
+child would also close them for the parent.
+"""
+
+from utils.cache import reset_redis_client
+from utils.task_dispatch import reset_local_queue
+
+
+def reset_after_fork(app=None):
+    """
+    Call this in a child process right after it has been forked
+
+    Args:
+        app: Flask app whose database engines should be reset
+             (None if the parent never set up the database)
+    """
+    if app is not None:
+        from models import db
+        with app.app_context():
+            # All engines, including the read replica bind if there is one
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+    reset_redis_client()
+    reset_local_queue()
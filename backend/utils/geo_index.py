@@ -0,0 +1,272 @@
+"""
+Nearest Parking Lots
+An in-memory spatial index (k-d tree) of lot positions, used to find the
+closest lots that still have a free spot
+
+Student Project - Scalability
+Checking the distance to every lot is O(lots) per request. The k-d tree
+splits the lots into boxes, so a search only opens the few boxes near
+the driver - O(log lots) instead.
+
+- Positions are stored as points on a unit sphere (x, y, z). Straight-line
+  distance between those points grows with the distance over the earth,
+  so there is no trouble near the poles or at longitude ±180.
+- The tree hands out lots nearest-first, as many as asked for. The search
+  takes lots in batches and checks their free spots (the available_spots
+  column, see models/parking_spot.py) until it has k lots with capacity.
+- Each process builds the tree once. When a lot is added, moved or
+  deleted, the 'lot_locations' version goes up (same transaction), and
+  the next search in every process sees the new version and rebuilds.
+"""
+
+import heapq
+import math
+import threading
+import numpy as np
+from sqlalchemy import select, inspect, event
+from models import db
+from models.parking_lot import ParkingLot
+from utils.db_routing import RoutingSession
+from utils.http_cache import get_version, bump_version, LOT_LOCATIONS
+from utils.pricing import make_price_lookup
+
+EARTH_RADIUS_KM = 6371.0088
+LEAF_SIZE = 16  # Lots per box at the bottom of the tree
+
+
+# ============================================================================
+# COORDINATES
+# ============================================================================
+
+def to_unit_vector(latitude, longitude):
+    """Degrees → (x, y, z) on a sphere with radius 1"""
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def chord_to_km(chord):
+    """Straight-line distance on the unit sphere → distance over the earth in km"""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def parse_coordinates(latitude, longitude):
+    """
+    Checks a latitude/longitude pair from a request
+
+    Args:
+        latitude, longitude: Numbers or strings (or both None)
+
+    Returns:
+        (latitude, longitude) as floats, or (None, None)
+
+    Raises:
+        ValueError: If only one is given or they are out of range
+    """
+    if latitude is None and longitude is None:
+        return None, None
+    if latitude is None or longitude is None:
+        raise ValueError('Give both latitude and longitude')
+    latitude, longitude = float(latitude), float(longitude)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError('latitude must be -90 to 90 and longitude -180 to 180')
+    return latitude, longitude
+
+
+# ============================================================================
+# K-D TREE
+# ============================================================================
+
+class SpatialIndex:
+    """
+    k-d tree over lot positions
+
+    Built with numpy (sorting by the widest axis, median split), searched in
+    plain Python: nodes are tuples (box_low, box_high, left, right) and
+    leaves are tuples (box_low, box_high, points) with points as
+    (x, y, z, lot_id).
+    """
+
+    def __init__(self, lot_ids, latitudes, longitudes):
+        lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+        lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+        self.points = np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+        self.lot_ids = np.asarray(lot_ids, dtype=np.int64)
+        self.size = len(self.lot_ids)
+        self.root = self._build(np.arange(self.size)) if self.size else None
+
+    def _build(self, indexes):
+        points = self.points[indexes]
+        low, high = points.min(axis=0), points.max(axis=0)
+        box_low, box_high = tuple(low.tolist()), tuple(high.tolist())
+        if len(indexes) <= LEAF_SIZE:
+            return (box_low, box_high, [(*self.points[i].tolist(), int(self.lot_ids[i])) for i in indexes])
+
+        axis = int(np.argmax(high - low))
+        middle = len(indexes) // 2
+        order = np.argpartition(points[:, axis], middle)
+        return (box_low, box_high, self._build(indexes[order[:middle]]), self._build(indexes[order[middle:]]))
+
+    @staticmethod
+    def _box_distance(query, box_low, box_high):
+        """Squared distance from the query point to the closest point of a box"""
+        total = 0.0
+        for value, low, high in zip(query, box_low, box_high):
+            if value < low:
+                total += (low - value) ** 2
+            elif value > high:
+                total += (value - high) ** 2
+        return total
+
+    def iter_nearest(self, latitude, longitude):
+        """
+        Lots nearest-first, as (distance_km, lot_id)
+        Only opens as many boxes as needed for the lots taken so far.
+        """
+        if self.root is None:
+            return
+        query = to_unit_vector(latitude, longitude)
+        qx, qy, qz = query
+        counter = 0  # Tie-breaker so heapq never compares nodes
+        heap = [(0.0, counter, self.root)]
+        while heap:
+            distance, _, item = heapq.heappop(heap)
+            if isinstance(item, int):
+                yield chord_to_km(math.sqrt(distance)), item
+            elif len(item) == 3:
+                for x, y, z, lot_id in item[2]:
+                    counter += 1
+                    heapq.heappush(heap, ((x - qx) ** 2 + (y - qy) ** 2 + (z - qz) ** 2, counter, lot_id))
+            else:
+                for child in item[2:]:
+                    counter += 1
+                    heapq.heappush(heap, (self._box_distance(query, child[0], child[1]), counter, child))
+
+
+# ============================================================================
+# ONE INDEX PER PROCESS, REBUILT WHEN LOTS CHANGE
+# ============================================================================
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_spatial_index():
+    """
+    The index for the current lot positions (one version query per call)
+
+    Returns:
+        SpatialIndex
+    """
+    global _index, _index_version
+    version = get_version(LOT_LOCATIONS)
+    if _index is not None and _index_version == version:
+        return _index
+
+    with _index_lock:
+        if _index is None or _index_version != version:
+            rows = db.session.execute(
+                select(ParkingLot.id, ParkingLot.latitude, ParkingLot.longitude).where(
+                    ParkingLot.latitude.is_not(None), ParkingLot.longitude.is_not(None)
+                )
+            ).all()
+            lot_ids, latitudes, longitudes = zip(*rows) if rows else ((), (), ())
+            _index = SpatialIndex(lot_ids, latitudes, longitudes)
+            _index_version = version
+    return _index
+
+
+def _changes_locations(session):
+    """True if this flush adds, moves or deletes a lot"""
+    for lot in session.new:
+        if isinstance(lot, ParkingLot):
+            return True
+    for lot in session.deleted:
+        if isinstance(lot, ParkingLot):
+            return True
+    for lot in session.dirty:
+        if isinstance(lot, ParkingLot):
+            state = inspect(lot)
+            if state.attrs.latitude.history.has_changes() or state.attrs.longitude.history.has_changes():
+                return True
+    return False
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _bump_lot_locations(session, flush_context):
+    """Other processes rebuild their index on their next search"""
+    if _changes_locations(session):
+        bump_version(session.connection(), LOT_LOCATIONS)
+
+
+# ============================================================================
+# NEAREST LOTS WITH A FREE SPOT
+# ============================================================================
+
+def find_nearest_available(latitude, longitude, k=5, max_distance_km=None, min_available=1):
+    """
+    The k closest lots with at least min_available free spots
+
+    Args:
+        latitude, longitude: Where the driver is
+        k: How many lots to return
+        max_distance_km: Ignore lots further away than this (default: no limit)
+        min_available: Free spots a lot needs
+
+    Returns:
+        List of dictionaries, nearest first, with distance_km
+    """
+    found = []
+    price_now = make_price_lookup()
+    nearest = get_spatial_index().iter_nearest(latitude, longitude)
+    batch_size = max(2 * k, 32)
+    done = False
+
+    while not done and len(found) < k:
+        # Next batch of lots from the tree (nearest first)
+        batch = []
+        for distance, lot_id in nearest:
+            if max_distance_km is not None and distance > max_distance_km:
+                done = True
+                break
+            batch.append((distance, lot_id))
+            if len(batch) >= batch_size:
+                break
+        else:
+            done = True
+        if not batch:
+            break
+
+        # Which of them have room right now (one primary key lookup per lot;
+        # free spots are compared here, so the query can only use the key)
+        rows = db.session.execute(
+            select(ParkingLot.id, ParkingLot.prime_location_name, ParkingLot.address, ParkingLot.pin_code,
+                   ParkingLot.price_per_hour, ParkingLot.latitude, ParkingLot.longitude,
+                   ParkingLot.number_of_spots, ParkingLot.available_spots)
+            .where(ParkingLot.id.in_([lot_id for _, lot_id in batch]))
+        ).all()
+        lots = {row.id: row for row in rows}
+
+        for distance, lot_id in batch:
+            row = lots.get(lot_id)
+            if row is None or row.available_spots < min_available:
+                continue
+            found.append({
+                'id': row.id,
+                'prime_location_name': row.prime_location_name,
+                'address': row.address,
+                'pin_code': row.pin_code,
+                'price_per_hour': row.price_per_hour,
+                'current_price_per_hour': price_now(row.id, row.price_per_hour, row.available_spots,
+                                                    row.number_of_spots),
+                'latitude': row.latitude,
+                'longitude': row.longitude,
+                'number_of_spots': row.number_of_spots,
+                'available_spots': row.available_spots,
+                'distance_km': round(distance, 3)
+            })
+            if len(found) >= k:
+                break
+        batch_size *= 2  # Crowded area - look further at once
+
+    return found
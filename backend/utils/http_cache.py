@@ -0,0 +1,230 @@
+"""
+HTTP Caching with Version-Stamped ETags
+Lets browsers keep the lot lists and only download them again when
+something actually changed
+
+Student Project - Performance Optimization
+How it works:
+- The 'availability' counter (models/data_version.py) goes up in the same
+  transaction as every change to lots, spot status or reservation status
+- @versioned_etag('user:lots:available') reads the counter (one primary key
+  lookup) and tags the response with ETag "user:lots:available-v<counter>"
+- The browser sends it back in If-None-Match; if the counter has not moved,
+  the answer is an empty 304 Not Modified and the list is not rebuilt
+- Cache-Control: private, no-cache = the browser may keep the response but
+  must check the ETag every time
+- The counters are always read from the primary database. On a
+  @read_replica() route whose replica is behind that counter, the response
+  is built from the primary instead, so an ETag never labels an older body.
+  (A response can still be as old as the moment its counter was read.)
+
+Every check is counted on /api/metrics as a cache hit (304) or miss
+(full response) for the namespace.
+
+The browser does all of this on its own - the frontend code does not change.
+"""
+
+import functools
+from datetime import datetime
+from flask import request, current_app, make_response, g, has_request_context
+from sqlalchemy import select, insert, update, inspect, event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from models import db
+from models.data_version import DataVersion
+from utils.db_routing import RoutingSession, REPLICA_BIND
+from utils.compression import ENCODING_ETAG_SUFFIXES
+from utils.metrics import record_cache_access
+
+AVAILABILITY = 'availability'
+LOT_LOCATIONS = 'lot_locations'  # Lot added, moved or deleted (see utils/geo_index.py)
+TARIFFS = 'tariffs'  # A lot tariff changed (see utils/pricing.py)
+FORECASTS = 'forecasts'  # Occupancy forecasts refitted (see utils/forecasting.py)
+
+
+# ============================================================================
+# VERSION COUNTERS
+# ============================================================================
+
+def get_version(name=AVAILABILITY, bind=None):
+    """
+    Current value of a version counter (0 if it was never bumped)
+
+    Args:
+        name: Counter name
+        bind: Engine to read from (default: the session's choice)
+
+    Returns:
+        Integer version
+    """
+    version = db.session.execute(
+        select(DataVersion.version).where(DataVersion.name == name),
+        bind_arguments={'bind': bind} if bind is not None else None
+    ).scalar()
+    return version or 0
+
+
+def get_all_versions():
+    """
+    Every version counter in one query (there are only a handful),
+    always from the primary database - also on @read_replica() routes
+
+    Returns:
+        Dictionary of name → version
+    """
+    return dict(db.session.execute(
+        select(DataVersion.name, DataVersion.version), bind_arguments={'bind': db.engine}
+    ).all())
+
+
+def request_version(name):
+    """
+    A counter as @versioned_etag read it at the start of this request,
+    so code building the response does not need another query.
+    Outside such a request it reads the counter like get_version().
+    """
+    versions = g.get('data_versions') if has_request_context() else None
+    if versions is None:
+        return get_version(name)
+    return versions.get(name, 0)
+
+
+def bump_version(connection, name=AVAILABILITY):
+    """
+    Adds one to a version counter (creates it if needed)
+    Pass the connection of the transaction that changes the data, so the
+    new version is committed (or rolled back) together with the change.
+
+    Args:
+        connection: SQLAlchemy connection, e.g. db.session.connection()
+        name: Counter name
+    """
+    now = datetime.utcnow()
+    table = DataVersion.__table__
+    dialect = connection.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        # One upsert statement
+        upsert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+        statement = upsert(table).values(name=name, version=1, updated_at=now)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'version': table.c.version + 1, 'updated_at': now}
+        ))
+        return
+
+    # Other databases: plain UPDATE, and INSERT the very first time
+    updated = connection.execute(
+        update(table).where(table.c.name == name).values(version=table.c.version + 1, updated_at=now)
+    )
+    if updated.rowcount == 0:
+        connection.execute(insert(table).values(name=name, version=1, updated_at=now))
+
+
+def _changes_availability(session):
+    """Does this flush change lots, tariffs (prices), spot status or reservation status?"""
+    from models.parking_lot import ParkingLot
+    from models.parking_spot import ParkingSpot
+    from models.reservation import Reservation
+    from models.lot_tariff import LotTariff
+
+    tracked = (ParkingLot, ParkingSpot, Reservation, LotTariff)
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, tracked):
+            return True
+    for obj in session.dirty:
+        if isinstance(obj, (ParkingLot, ParkingSpot, LotTariff)) and session.is_modified(obj):
+            return True
+        if isinstance(obj, Reservation) and inspect(obj).attrs.status.history.has_changes():
+            return True
+    return False
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _bump_availability(session, flush_context):
+    """Bumps the availability version inside the transaction of the change"""
+    if _changes_availability(session):
+        bump_version(session.connection())
+
+
+# ============================================================================
+# ETAGS
+# ============================================================================
+
+def _matching_etag(etag):
+    """
+    Checks the request's If-None-Match against our ETag
+    (also accepts the "-gzip"/"-br" variants utils/compression.py sends)
+
+    Returns:
+        The variant the client has, or None if it has no current copy
+    """
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return None
+    for variant in [etag] + [etag + suffix for suffix in ENCODING_ETAG_SUFFIXES]:
+        if if_none_match.contains(variant):
+            return variant
+    return None
+
+
+def _use_primary_if_replica_behind(version_name, version):
+    """
+    Builds this response from the primary if the replica has not caught up
+    with the counter yet (else the body would be older than its ETag, and the
+    browser would keep that old body for as long as the counter stays put)
+    """
+    replica = db.engines.get(REPLICA_BIND)
+    if replica is not None and get_version(version_name, bind=replica) < version:
+        g.db_read_replica = False
+
+
+def versioned_etag(namespace, version_name=AVAILABILITY, period=None):
+    """
+    Decorator that adds an ETag based on a version counter and answers
+    If-None-Match with 304 without running the route
+    Put it after the login checks and @read_replica().
+
+    Args:
+        namespace: ETag prefix like 'user:lots:available'
+        version_name: Which counter the response depends on
+        period: Optional function for responses that also change with time,
+                e.g. utils.pricing.pricing_period (prices change on the hour)
+
+    Example usage:
+        @versioned_etag('user:lots:available')
+        def get_available_lots():
+            pass
+    """
+    def wrapper(fn):
+        @functools.wraps(fn)
+        def decorator(*args, **kwargs):
+            # Read the version BEFORE building the response: if a change lands
+            # in between, the body is newer than its ETag and the next request
+            # simply downloads it again (never the other way round)
+            # (All counters at once: pricing and the like reuse them via request_version)
+            g.data_versions = get_all_versions()
+            version = g.data_versions.get(version_name, 0)
+            if g.get('db_read_replica'):
+                _use_primary_if_replica_behind(version_name, version)
+            if period is not None:
+                version = f'{version}-{period()}'
+            etag = f'{namespace}-v{version}'
+
+            client_etag = _matching_etag(etag)
+            record_cache_access(namespace, hit=bool(client_etag))
+            if client_etag:
+                response = current_app.response_class(status=304)
+                etag = client_etag  # Same representation the client already has
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = current_app.config['HTTP_CACHE_CONTROL']
+            response.vary.add('Accept-Encoding')
+            return response
+
+        return decorator
+    return wrapper
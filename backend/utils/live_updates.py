@@ -0,0 +1,229 @@
+"""
+Live Availability Updates (Server-Sent Events)
+Pushes the new spot counts of a lot to every open browser as soon as a
+reservation, occupy or release is committed - no more polling
+
+Student Project - Scalability
+How the pieces fit:
+- publish_availability([lot_id]) is called right after a commit that
+  changes spots or lots. It counts the lot's spots and publishes
+  {"lot_id", "available", "occupied"} on the Redis channel LIVE_UPDATES_CHANNEL
+- Every server process has ONE broker with ONE background listener on that
+  channel. Each open stream is just a small queue the listener puts updates
+  into - there is no thread per client
+- GET /api/user/lots/stream sends the events to the browser (EventSource)
+
+Without Redis, updates are delivered inside the publishing process only
+(fine for a single server process). To hold thousands of idle streams per
+process, run the app with gevent (python serve_gevent.py): every stream is
+then a greenlet waiting on its queue instead of an OS thread.
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+from config import Config
+from models.parking_lot import ParkingLot
+from utils.cache import get_redis_client
+
+RESYNC = object()  # Put in a client's queue when it fell behind and missed updates
+
+
+# ============================================================================
+# PUBLISHING
+# ============================================================================
+
+def availability_message(lot_id, counts):
+    """One update as sent to the browser"""
+    return {
+        'lot_id': lot_id,
+        'available': counts.get('available', 0),
+        'occupied': counts.get('occupied', 0)
+    }
+
+
+def publish_availability(lot_ids):
+    """
+    Sends the current spot counts of some lots to all open streams
+    Call it AFTER db.session.commit(), so listeners never see uncommitted counts.
+
+    Args:
+        lot_ids: IDs of the lots whose spots changed
+    """
+    lot_ids = sorted({lot_id for lot_id in lot_ids if lot_id is not None})
+    if not lot_ids:
+        return
+
+    try:
+        counts = ParkingLot.get_spot_counts(lot_ids=lot_ids)  # One GROUP BY for all of them
+        messages = [availability_message(lot_id, counts.get(lot_id, {})) for lot_id in lot_ids]
+    except Exception as e:
+        print(f"⚠ Live update error: {e}")
+        return
+
+    client = get_redis_client()
+    if client is not None:
+        try:
+            client.publish(Config.LIVE_UPDATES_CHANNEL, json.dumps(messages))
+            return  # Every process's listener (this one too) delivers it
+        except Exception as e:
+            print(f"⚠ Live update publish error: {e} - delivering locally only")
+    get_broker().deliver(messages)
+
+
+# ============================================================================
+# BROKER (one per process)
+# ============================================================================
+
+class Subscription:
+    """The queue of one open stream"""
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def get(self, timeout):
+        """Next update, RESYNC, or None if nothing arrived within `timeout` seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AvailabilityBroker:
+    """
+    Fans updates out to the streams of this process
+
+    Example:
+        subscription = broker.subscribe()
+        message = subscription.get(timeout=15)
+        broker.unsubscribe(subscription)
+    """
+
+    def __init__(self, queue_size, max_clients):
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.listener = None
+        self.pid = None
+
+    def subscribe(self):
+        """
+        Registers a new stream
+
+        Returns:
+            Subscription, or None if this process already has max_clients streams
+        """
+        with self.lock:
+            if len(self.subscribers) >= self.max_clients:
+                return None
+            subscription = Subscription(self.queue_size)
+            self.subscribers.add(subscription)
+            self._ensure_listener()
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def client_count(self):
+        return len(self.subscribers)
+
+    def deliver(self, messages):
+        """Puts updates into every stream's queue (never blocks)"""
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            try:
+                for message in messages:
+                    subscription.queue.put_nowait(message)
+            except queue.Full:
+                # A slow client: drop its backlog and tell it to reload the list
+                with subscription.queue.mutex:
+                    subscription.queue.queue.clear()
+                subscription.queue.put_nowait(RESYNC)
+
+    def _ensure_listener(self):
+        # A forked worker does not inherit the parent's thread - start its own
+        if self.listener is None or self.pid != os.getpid() or not self.listener.is_alive():
+            self.pid = os.getpid()
+            self.listener = threading.Thread(target=self._listen, name='live-updates', daemon=True)
+            self.listener.start()
+
+    def _listen(self):
+        """Background listener: Redis channel → deliver() (reconnects if Redis goes away)"""
+        reconnecting = False
+        while True:
+            client = get_redis_client()
+            if client is None:
+                time.sleep(30)  # No Redis - publish_availability delivers locally instead
+                continue
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(Config.LIVE_UPDATES_CHANNEL)
+                if reconnecting:
+                    # Updates published while we were away are lost - everyone reloads once
+                    self.deliver([RESYNC])
+                    reconnecting = False
+                for item in pubsub.listen():
+                    try:
+                        self.deliver(json.loads(item['data']))
+                    except (ValueError, TypeError):
+                        continue  # Not one of our messages
+            except Exception as e:
+                print(f"⚠ Live updates listener error: {e} - reconnecting")
+                reconnecting = True
+                time.sleep(1)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+
+_broker = None
+
+
+def get_broker():
+    """The broker of this process (created on first use)"""
+    global _broker
+    if _broker is None:
+        _broker = AvailabilityBroker(Config.LIVE_UPDATES_QUEUE_SIZE, Config.LIVE_UPDATES_MAX_CLIENTS)
+    return _broker
+
+
+# ============================================================================
+# SERVER-SENT EVENTS
+# ============================================================================
+
+def format_event(event, data):
+    """One SSE message: 'event: <name>\\ndata: <json>\\n\\n'"""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+def event_stream(subscription, snapshot, keepalive):
+    """
+    Generator for the streaming response
+
+    Args:
+        subscription: From AvailabilityBroker.subscribe()
+        snapshot: Current counts of all lots (sent first)
+        keepalive: Seconds between comment lines on an idle stream
+                   (keeps proxies from closing it and notices closed connections)
+    """
+    try:
+        yield 'retry: 5000\n\n'  # Browser reconnects after 5 s if the stream breaks
+        yield format_event('snapshot', snapshot)
+        while True:
+            message = subscription.get(timeout=keepalive)
+            if message is None:
+                yield ': keepalive\n\n'
+            elif message is RESYNC:
+                yield format_event('resync', {})
+            else:
+                yield format_event('availability', message)
+    finally:
+        # Runs when the client disconnects (the server closes the generator)
+        get_broker().unsubscribe(subscription)
@@ -0,0 +1,173 @@
+"""
+Parking Lot Search
+Finds lots by name/address words, pin code, price range and free spots,
+one page at a time, without loading every lot
+
+Student Project - Scalability
+How it stays fast with 100k lots:
+- Words are looked up in an SQLite FTS5 full-text index (parking_lots_fts)
+  instead of LIKE '%word%' on every row. Each word also matches as a
+  prefix, so "cent" finds "Central Mall".
+- Pin code prefixes and price ranges use normal B-tree indexes.
+- parking_lots.available_spots holds the number of free spots, so
+  "at least 3 free spots" is a column filter instead of counting spots.
+
+Both the full-text index and available_spots are kept up to date by
+triggers inside SQLite. A trigger runs in the same transaction as the
+change, for every way of writing - ORM objects, bulk UPDATEs like the hold
+sweeper, and the raw INSERTs of the synthetic data generator.
+
+The triggers are defined next to the models and created together with the
+tables (db.create_all()), so an existing database needs `python init_db.py` once.
+"""
+
+import re
+from sqlalchemy import select, func, table, column, literal_column
+from models import db
+from models.parking_lot import ParkingLot
+from utils.pricing import make_price_lookup
+
+SORT_OPTIONS = ('relevance', 'price', 'available', 'name')
+MAX_PER_PAGE = 100
+
+
+# ============================================================================
+# REBUILDING
+# ============================================================================
+
+def rebuild_search_index(connection):
+    """
+    Fills the full-text index and available_spots from scratch
+    (the triggers are defined with the models, see models/parking_lot.py
+    and models/parking_spot.py). Only needed if rows were changed while the
+    triggers were missing.
+
+    Args:
+        connection: SQLAlchemy connection
+    """
+    connection.exec_driver_sql("INSERT INTO parking_lots_fts (parking_lots_fts) VALUES ('rebuild')")
+    connection.exec_driver_sql(
+        "UPDATE parking_lots SET available_spots = (SELECT COUNT(*) FROM parking_spots "
+        "WHERE parking_spots.lot_id = parking_lots.id AND parking_spots.status = 'available')"
+    )
+
+
+# ============================================================================
+# SEARCH
+# ============================================================================
+
+lots_fts = table('parking_lots_fts', column('rowid'), column('rank'))
+
+
+def build_match_query(text):
+    """
+    Turns what the user typed into an FTS5 query
+    Every word must appear, as a whole word or the start of one. Quotes and
+    FTS operators are dropped, so user input can never break the query.
+
+    Args:
+        text: e.g. 'central ma'
+
+    Returns:
+        FTS5 query like '"central"* "ma"*', or None if there are no words
+    """
+    words = re.findall(r'\w+', text or '')
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _pin_code_range(prefix):
+    """
+    pin_code >= '5600' AND pin_code < '5601' finds every pin starting with 5600
+    (a range the index can use - LIKE '5600%' would scan the table in SQLite)
+    """
+    return ParkingLot.pin_code >= prefix, ParkingLot.pin_code < prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def search_lots(q=None, pin_code=None, min_price=None, max_price=None, min_available=1,
+                sort=None, descending=False, page=1, per_page=20):
+    """
+    One page of lots matching all given filters
+
+    Args:
+        q: Words to find in the lot name or address
+        pin_code: Pin code or the start of one
+        min_price, max_price: Price per hour range (inclusive)
+        min_available: Only lots with at least this many free spots (0 = all)
+        sort: 'relevance' (needs q), 'price', 'available' or 'name'
+              (default: relevance with q, otherwise price)
+        descending: Reverse the sort order
+        page: Page number, from 1
+        per_page: Lots per page (at most MAX_PER_PAGE)
+
+    Returns:
+        (lots, total) - lots has the keys of ParkingLot.to_dict(), total is
+        the number of matching lots on all pages
+
+    Raises:
+        ValueError: If the sort option is unknown
+    """
+    sort = sort or ('relevance' if q else 'price')
+    if sort not in SORT_OPTIONS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_OPTIONS)}")
+
+    query = select(
+        ParkingLot.id, ParkingLot.prime_location_name, ParkingLot.price_per_hour,
+        ParkingLot.address, ParkingLot.pin_code, ParkingLot.latitude, ParkingLot.longitude,
+        ParkingLot.number_of_spots, ParkingLot.available_spots,
+        ParkingLot.created_at, ParkingLot.updated_at
+    )
+    match = build_match_query(q)
+    if match:
+        query = query.join(lots_fts, lots_fts.c.rowid == ParkingLot.id).where(
+            literal_column('parking_lots_fts').op('MATCH')(match)
+        )
+    elif sort == 'relevance':
+        sort = 'price'  # Nothing to rank by
+    if pin_code:
+        query = query.where(*_pin_code_range(pin_code))
+    if min_price is not None:
+        query = query.where(ParkingLot.price_per_hour >= min_price)
+    if max_price is not None:
+        query = query.where(ParkingLot.price_per_hour <= max_price)
+    if min_available:
+        query = query.where(ParkingLot.available_spots >= min_available)
+
+    total = db.session.execute(select(func.count()).select_from(query.subquery())).scalar()
+
+    sort_column = {
+        'relevance': lots_fts.c.rank,  # bm25 score, best match first
+        'price': ParkingLot.price_per_hour,
+        'available': ParkingLot.available_spots,
+        'name': ParkingLot.prime_location_name,
+    }[sort]
+    order = [sort_column.desc() if descending else sort_column, ParkingLot.id]
+    rows = db.session.execute(
+        query.order_by(*order).limit(per_page).offset((page - 1) * per_page)
+    ).all()
+
+    price_now = make_price_lookup()
+
+    # available_spots comes straight from the row (kept exact by the triggers),
+    # so the page needs no extra COUNT over parking_spots; a spot is either
+    # available or occupied, so the rest are occupied
+    lots = []
+    for (lot_id, name, price, address, lot_pin_code, latitude, longitude,
+         number_of_spots, available_spots, created_at, updated_at) in rows:
+        lots.append({
+            'id': lot_id,
+            'prime_location_name': name,
+            'price_per_hour': price,
+            'current_price_per_hour': price_now(lot_id, price, available_spots, number_of_spots),
+            'address': address,
+            'pin_code': lot_pin_code,
+            'latitude': latitude,
+            'longitude': longitude,
+            'number_of_spots': number_of_spots,
+            'available_spots': available_spots,
+            'occupied_spots': number_of_spots - available_spots,
+            'created_at': created_at,
+            'updated_at': updated_at
+        })
+    return lots, total
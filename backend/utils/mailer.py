@@ -0,0 +1,332 @@
+"""
+Email Delivery Utilities
+Sends the emails for our background tasks (reminders, reports, CSV exports)
+
+Student Project - Performance Optimization
+Opening a new SMTP connection for every email is very slow (TCP + TLS + login
+each time), so every worker process keeps a small pool of open connections
+and reuses them for a whole batch of messages.
+Note: If MAIL_SERVER is not configured, emails are printed to the console instead
+"""
+
+import os
+import time
+import socket
+import smtplib
+import threading
+from contextlib import contextmanager
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from email.mime.application import MIMEApplication
+from config import Config
+
+# Errors that usually go away if we reconnect and try again
+TRANSIENT_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    smtplib.SMTPHeloError,
+    socket.timeout,
+    ConnectionError,
+    OSError,
+)
+
+
+def build_message(to, subject, body, subtype='plain', sender=None, attachments=None):
+    """
+    Creates an email message ready to be sent
+
+    Args:
+        to: Recipient email address
+        subject: Email subject line
+        body: Email text (plain text or HTML)
+        subtype: 'plain' or 'html'
+        sender: From address (defaults to MAIL_DEFAULT_SENDER)
+        attachments: Optional list of (filename, content, mime_subtype) tuples
+
+    Returns:
+        Email message object
+    """
+    if attachments:
+        message = MIMEMultipart()
+        message.attach(MIMEText(body, subtype, 'utf-8'))
+        for filename, content, mime_subtype in attachments:
+            if isinstance(content, str):
+                content = content.encode('utf-8')
+            part = MIMEApplication(content, _subtype=mime_subtype)
+            part.add_header('Content-Disposition', 'attachment', filename=filename)
+            message.attach(part)
+    else:
+        message = MIMEText(body, subtype, 'utf-8')
+
+    message['Subject'] = subject
+    message['From'] = sender or Config.MAIL_DEFAULT_SENDER
+    message['To'] = to
+    return message
+
+
+class SMTPConnectionPool:
+    """
+    Keeps a few SMTP connections open so they can be reused
+
+    Connections belong to the process that opened them. After a fork
+    (Celery prefork workers) the child throws away the parent's connections
+    and opens its own.
+    """
+
+    def __init__(self, host, port, use_tls=False, username=None, password=None,
+                 size=2, timeout=10, max_idle=60):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle  # Seconds before an idle connection is checked with NOOP
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []  # List of (connection, last_used_time)
+        self._pid = os.getpid()
+        self.connections_opened = 0
+
+    def _check_fork(self):
+        """Drop connections inherited from a parent process"""
+        if self._pid != os.getpid():
+            # Don't send QUIT - the socket is still shared with the parent
+            self._idle = []
+            self._slots = threading.BoundedSemaphore(self.size)
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+
+    def _connect(self):
+        """Opens and logs in a brand new SMTP connection"""
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        connection.ehlo()
+        if self.use_tls:
+            connection.starttls()
+            connection.ehlo()
+        if self.username:
+            connection.login(self.username, self.password)
+        self.connections_opened += 1
+        return connection
+
+    def _is_alive(self, connection):
+        """Checks an old idle connection before reusing it"""
+        try:
+            return connection.noop()[0] == 250
+        except TRANSIENT_ERRORS:
+            return False
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection from the pool and gives it back afterwards
+
+        If the code using the connection fails, the connection is closed
+        instead of being returned, so a broken socket is never reused.
+        """
+        self._check_fork()
+        self._slots.acquire()
+        connection = None
+        try:
+            with self._lock:
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    if time.monotonic() - last_used > self.max_idle and not self._is_alive(connection):
+                        self._close(connection)
+                        connection = None
+            if connection is None:
+                connection = self._connect()
+
+            yield connection
+
+            with self._lock:
+                self._idle.append((connection, time.monotonic()))
+        except BaseException:
+            if connection is not None:
+                self._close(connection)
+            raise
+        finally:
+            self._slots.release()
+
+    def _close(self, connection):
+        """Closes a connection, ignoring errors from dead sockets"""
+        try:
+            connection.quit()
+        except Exception:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def close_all(self):
+        """Closes every idle connection (used on worker shutdown)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._close(connection)
+
+
+class Mailer:
+    """
+    Sends emails through a pooled SMTP connection
+
+    Features:
+    - Batches: one connection checkout is used for many messages
+    - Rate limiting: never sends faster than `rate_limit` messages per second
+    - Retries: temporary failures are retried with exponential backoff
+    - Fails fast: if the server can't be reached after the retries, the
+      rest of the batch is marked failed instead of retried one by one
+    """
+
+    def __init__(self, pool=None, batch_size=50, rate_limit=0, max_retries=3, retry_backoff=0.5):
+        self.pool = pool  # None means "print to console" mode
+        self.batch_size = max(1, batch_size)
+        self.rate_limit = rate_limit
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._rate_lock = threading.Lock()
+        self._next_send_time = 0.0
+
+    def _wait_for_rate_limit(self):
+        """Sleeps just long enough to respect the messages-per-second limit"""
+        if not self.rate_limit:
+            return
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_send_time - now
+            self._next_send_time = max(now, self._next_send_time) + 1.0 / self.rate_limit
+        if wait > 0:
+            time.sleep(wait)
+
+    def _print_message(self, message):
+        """Console mode - shows the email instead of sending it"""
+        print(f"📧 SENDING EMAIL TO: {message['To']}")
+        print(f"   Subject: {message['Subject']}")
+        print("-" * 30)
+
+    def send(self, message):
+        """
+        Sends a single email
+
+        Returns:
+            Dictionary with 'sent' count and list of 'failed' recipients
+        """
+        return self.send_batch([message])
+
+    def send_batch(self, messages):
+        """
+        Sends many emails, reusing pooled connections
+
+        Args:
+            messages: List of email messages (see build_message)
+
+        Returns:
+            Dictionary with 'sent' count and list of 'failed' (recipient, error) pairs
+        """
+        result = {'sent': 0, 'failed': []}
+
+        if self.pool is None:
+            for message in messages:
+                self._print_message(message)
+                result['sent'] += 1
+            return result
+
+        for start in range(0, len(messages), self.batch_size):
+            pending = list(messages[start:start + self.batch_size])
+            attempt = 0
+
+            while pending:
+                connected = False
+                try:
+                    with self.pool.connection() as connection:
+                        connected = True
+                        while pending:
+                            message = pending[0]
+                            self._wait_for_rate_limit()
+                            try:
+                                connection.send_message(message)
+                                result['sent'] += 1
+                            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+                                    smtplib.SMTPDataError) as e:
+                                # 4xx from the server means "try later", 5xx means never
+                                code = getattr(e, 'smtp_code', 550)
+                                if 400 <= code < 500:
+                                    raise
+                                result['failed'].append((message['To'], str(e)))
+                            pending.pop(0)
+                            attempt = 0
+                except smtplib.SMTPAuthenticationError as e:
+                    # Wrong credentials will not fix themselves - fail the whole batch
+                    result['failed'].extend((message['To'], str(e)) for message in pending)
+                    pending = []
+                except (smtplib.SMTPResponseException,) + TRANSIENT_ERRORS as e:
+                    attempt += 1
+                    if attempt > self.max_retries and not connected:
+                        # The server can't even be reached (down, DNS error, refused) -
+                        # every other message would wait through the same retries, so fail them all now
+                        remaining = pending + list(messages[start + self.batch_size:])
+                        result['failed'].extend((message['To'], str(e)) for message in remaining)
+                        print(f"⚠ Mail server unreachable ({e}) - {len(remaining)} emails not sent")
+                        return result
+                    if attempt > self.max_retries:
+                        # Connected but this message keeps failing - give up on it, send the rest
+                        result['failed'].append((pending.pop(0)['To'], str(e)))
+                        attempt = 0
+                        continue
+                    delay = self.retry_backoff * (2 ** (attempt - 1))
+                    print(f"⚠ Email send failed ({e}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+
+        return result
+
+
+# One mailer per worker process (recreated automatically after a fork)
+_mailer = None
+_mailer_pid = None
+
+
+def create_mailer(config=Config):
+    """
+    Builds a Mailer from the app configuration
+
+    Args:
+        config: Config class or dictionary with MAIL_* settings
+    """
+    get = config.get if isinstance(config, dict) else lambda key, default=None: getattr(config, key, default)
+
+    pool = None
+    if get('MAIL_SERVER'):
+        pool = SMTPConnectionPool(
+            host=get('MAIL_SERVER'),
+            port=get('MAIL_PORT', 25),
+            use_tls=get('MAIL_USE_TLS', False),
+            username=get('MAIL_USERNAME'),
+            password=get('MAIL_PASSWORD'),
+            size=get('MAIL_POOL_SIZE', 2),
+            timeout=get('MAIL_TIMEOUT', 10)
+        )
+
+    return Mailer(
+        pool=pool,
+        batch_size=get('MAIL_BATCH_SIZE', 50),
+        rate_limit=get('MAIL_RATE_LIMIT', 0),
+        max_retries=get('MAIL_MAX_RETRIES', 3),
+        retry_backoff=get('MAIL_RETRY_BACKOFF', 0.5)
+    )
+
+
+def get_mailer():
+    """
+    Returns the mailer for this process, creating it on first use
+
+    Returns:
+        Mailer instance
+    """
+    global _mailer, _mailer_pid
+    if _mailer is None or _mailer_pid != os.getpid():
+        _mailer = create_mailer()
+        _mailer_pid = os.getpid()
+    return _mailer
@@ -0,0 +1,204 @@
+"""
+Prometheus Metrics
+Numbers for dashboards and alerts, served at /api/metrics in the
+Prometheus text format
+
+Student Project - Monitoring
+What is measured:
+- Request latency histogram per blueprint and route, request and error counters
+- How long requests wait for a free database connection (pool checkout)
+- HTTP cache hits and misses per namespace (e.g. user:lots:available):
+  a hit is an ETag check answered with 304 Not Modified (utils/http_cache.py)
+- Background task queue depth (Celery and the local queue)
+- Requests rejected by the rate limiter per route and bucket
+
+Multiple server processes: set the PROMETHEUS_MULTIPROC_DIR environment
+variable to an empty directory BEFORE starting the server. Each process
+then writes its numbers to memory-mapped files in that directory and
+/api/metrics adds up the files of all processes (prometheus_client's
+multiprocess mode). Without it, each process only reports its own numbers.
+
+The numbers show how busy each route is and how often it fails, so
+/api/metrics is not public: scrapers either send the METRICS_TOKEN as a
+Bearer token, or call from an address in METRICS_ALLOWED_IPS (default: only
+this machine). Everybody else gets 403.
+"""
+
+import os
+import hmac
+import time
+from flask import g, request, Response, current_app, jsonify
+from sqlalchemy.pool import QueuePool
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, generate_latest, multiprocess, REGISTRY,
+    CONTENT_TYPE_LATEST
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# Latency buckets in seconds (5 ms up to 10 s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+REQUEST_LATENCY = Histogram(
+    'parking_http_request_duration_seconds', 'Time spent handling a request',
+    ['blueprint', 'route', 'method'], buckets=LATENCY_BUCKETS
+)
+REQUEST_COUNT = Counter(
+    'parking_http_requests_total', 'Requests handled',
+    ['blueprint', 'route', 'method', 'status']
+)
+REQUEST_ERRORS = Counter(
+    'parking_http_request_errors_total', 'Requests that ended in a 5xx error',
+    ['blueprint', 'route', 'method']
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    'parking_db_pool_checkout_wait_seconds', 'Time spent waiting for a database connection from the pool',
+    buckets=POOL_WAIT_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    'parking_cache_requests_total', 'ETag cache checks (hit = 304 Not Modified)',
+    ['namespace', 'result']
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    'parking_rate_limit_rejections_total', 'Requests rejected by the rate limiter',
+    ['route', 'scope', 'backend']
+)
+
+
+def is_multiprocess():
+    """True if metrics are shared between processes through files"""
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+class TimedQueuePool(QueuePool):
+    """
+    Connection pool that records how long each checkout waited
+    (used by the 'production' database profile)
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def record_cache_access(namespace, hit):
+    """
+    Counts one cache lookup
+
+    Args:
+        namespace: Cache namespace like 'user:lots:available'
+        hit: True if the value was found in the cache
+    """
+    CACHE_REQUESTS.labels(namespace=namespace, result='hit' if hit else 'miss').inc()
+
+
+def record_rate_limit_rejection(route, scope, backend):
+    """
+    Counts one request answered with 429 Too Many Requests
+
+    Args:
+        route: Rate limit name like 'login'
+        scope: Bucket that was empty ('ip' or 'user')
+        backend: 'redis' or 'memory' (Redis was down)
+    """
+    RATE_LIMIT_REJECTIONS.labels(route=route, scope=scope, backend=backend).inc()
+
+
+class TaskQueueCollector:
+    """
+    Reads the background task queue depth when metrics are scraped
+    (a live reading, so it does not need to be shared between processes)
+    """
+
+    def collect(self):
+        from utils.task_dispatch import get_dispatch_stats
+
+        gauge = GaugeMetricFamily(
+            'parking_task_queue_depth', 'Background tasks waiting to run', labels=['backend']
+        )
+        try:
+            stats = get_dispatch_stats()
+        except Exception:
+            stats = {}
+        for backend in ('celery', 'local'):
+            depth = stats.get(backend, {}).get('queue_depth')
+            if depth is not None:
+                gauge.add_metric([backend], depth)
+        yield gauge
+
+
+def _route_labels():
+    """Blueprint and URL rule of the current request (not the raw path, so IDs don't create new series)"""
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    return request.blueprint or 'app', route, request.method
+
+
+def is_scraper_allowed():
+    """
+    True if the request may read /api/metrics: it carries the METRICS_TOKEN
+    (Authorization: Bearer <token>) or comes from an address in METRICS_ALLOWED_IPS
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        sent = request.headers.get('Authorization', '')
+        # compare_digest takes the same time whether the token is close or not
+        if hmac.compare_digest(sent.encode(), f'Bearer {token}'.encode()):
+            return True
+    return request.remote_addr in current_app.config.get('METRICS_ALLOWED_IPS', ())
+
+
+def init_metrics(app):
+    """
+    Records request metrics and adds the /api/metrics endpoint
+    (if METRICS_ENABLED)
+    """
+    if not app.config.get('METRICS_ENABLED'):
+        return
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is None or request.endpoint == 'metrics':
+            return response
+
+        blueprint, route, method = _route_labels()
+        REQUEST_LATENCY.labels(blueprint, route, method).observe(time.perf_counter() - started)
+        REQUEST_COUNT.labels(blueprint, route, method, str(response.status_code)).inc()
+        if response.status_code >= 500:
+            REQUEST_ERRORS.labels(blueprint, route, method).inc()
+        return response
+
+    @app.route('/api/metrics', methods=['GET'], endpoint='metrics')
+    def metrics():
+        """All metrics in the Prometheus text format"""
+        if not is_scraper_allowed():
+            return jsonify({'error': 'Metrics access denied'}), 403
+
+        if is_multiprocess():
+            # Add up the files written by every server process
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+
+        queue_registry = CollectorRegistry()
+        queue_registry.register(TaskQueueCollector())
+
+        output = generate_latest(registry) + generate_latest(queue_registry)
+        return Response(output, content_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead(pid):
+    """
+    Cleans up the metric files of a server process that has exited
+    (call this from the process manager in multiprocess mode)
+    """
+    if is_multiprocess():
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,345 @@
+"""
+Dynamic Pricing
+Turns each lot's tariff (models/lot_tariff.py) into a small lookup
+structure, used for the prices in the lot lists and for billing
+
+Student Project - Business Logic
+Price per hour = price_per_hour x time-of-day multiplier x occupancy multiplier
+
+- Time-of-day bands are whole local hours. A tariff is compiled once into
+  segments (runs of hours with the same multiplier) with running totals,
+  like a prefix sum. The price of any stretch of time is then
+  total(end) - total(start), found with a binary search - a 3-day stay
+  costs the same work as a 1-hour stay, no hour-by-hour loop.
+- The daily cap applies per local calendar day. All full days in the
+  middle of a stay cost the same, so they are multiplied, not added up.
+- The occupancy multiplier is taken when the spot is reserved (the price
+  the user saw) and saved on the reservation.
+- Lists show the current price using the spot counts they already load,
+  so no query per lot.
+
+Lots without a tariff are billed exactly like before: hours rounded up
+times price_per_hour.
+
+The compiled tariffs are kept per process and rebuilt when the 'tariffs'
+version goes up (in the same transaction as a tariff change).
+"""
+
+import bisect
+import threading
+import numpy as np
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, event
+from models import db
+from models.lot_tariff import LotTariff
+from utils.db_routing import RoutingSession
+from utils.http_cache import request_version, bump_version, TARIFFS
+
+HOURS_PER_DAY = 24
+
+
+# ============================================================================
+# LOCAL TIME
+# ============================================================================
+
+def to_local_time(utc_time):
+    """UTC datetime (how the app stores times) → local time of the bands"""
+    return utc_time + timedelta(minutes=current_app.config['PRICING_UTC_OFFSET_MINUTES'])
+
+
+def local_hours_of_day(utc_microseconds):
+    """
+    Array version of the start hour stay_cost works out
+
+    Args:
+        utc_microseconds: NumPy int64 array of UTC times (microseconds since 1970)
+
+    Returns:
+        Array of local hours of day, e.g. 8.5 = 8:30
+    """
+    local = utc_microseconds + current_app.config['PRICING_UTC_OFFSET_MINUTES'] * 60_000_000
+    of_day = local % (HOURS_PER_DAY * 3_600_000_000)
+    hour = of_day // 3_600_000_000
+    minute = of_day // 60_000_000 % 60
+    second = of_day // 1_000_000 % 60
+    microsecond = of_day % 1_000_000
+    return hour + minute / 60 + second / 3600 + microsecond / 3600e6
+
+
+def pricing_period():
+    """
+    The current local hour, like '2026101908'
+    Band prices only change on the hour, so list ETags include this.
+    """
+    return to_local_time(datetime.utcnow()).strftime('%Y%m%d%H')
+
+
+# ============================================================================
+# COMPILED TARIFF
+# ============================================================================
+
+class CompiledTariff:
+    """
+    A tariff ready for fast price lookups
+
+    starts[i] is the hour where segment i begins and multipliers[i] its
+    multiplier; totals[i] is the sum of multiplier x hours from midnight
+    to starts[i] (totals[-1] = one whole day).
+    """
+
+    def __init__(self, hour_multipliers, occupancy_multipliers=(), daily_cap=None):
+        self.starts, self.multipliers = [], []
+        for hour, multiplier in enumerate(hour_multipliers):
+            if not self.multipliers or multiplier != self.multipliers[-1]:
+                self.starts.append(hour)
+                self.multipliers.append(multiplier)
+
+        self.totals = [0.0]
+        for i, multiplier in enumerate(self.multipliers):
+            end = self.starts[i + 1] if i + 1 < len(self.starts) else HOURS_PER_DAY
+            self.totals.append(self.totals[-1] + multiplier * (end - self.starts[i]))
+
+        # [(min_occupancy, multiplier), ...] from low to high
+        self.surcharges = sorted(occupancy_multipliers)
+        self.surcharge_levels = [level for level, _ in self.surcharges]
+        self.daily_cap = daily_cap
+
+        # Flat tariffs are billed like before (hours x rate), to the cent
+        self.is_flat = self.multipliers == [1.0] and daily_cap is None
+
+    def band_multiplier(self, hour_of_day):
+        """Time-of-day multiplier at a local hour (0 <= hour_of_day < 24)"""
+        return self.multipliers[bisect.bisect_right(self.starts, hour_of_day) - 1]
+
+    def occupancy_multiplier(self, occupancy):
+        """
+        Surcharge for how full the lot is
+
+        Args:
+            occupancy: Share of spots taken, 0.0 to 1.0
+
+        Returns:
+            Multiplier of the highest level reached (1.0 below all levels)
+        """
+        i = bisect.bisect_right(self.surcharge_levels, occupancy)
+        return self.surcharges[i - 1][1] if i else 1.0
+
+    def _units(self, hour_of_day):
+        """Multiplier x hours from midnight to hour_of_day (0 to 24)"""
+        i = bisect.bisect_right(self.starts, hour_of_day) - 1
+        return self.totals[i] + self.multipliers[i] * (hour_of_day - self.starts[i])
+
+    def _capped(self, cost):
+        return min(cost, self.daily_cap) if self.daily_cap is not None else cost
+
+    def stay_cost(self, hourly_rate, local_start, billable_hours):
+        """
+        Price of parking billable_hours from local_start (O(bands))
+
+        Args:
+            hourly_rate: price_per_hour x occupancy multiplier
+            local_start: When parking started, in local time
+            billable_hours: Whole hours to bill (already rounded up)
+
+        Returns:
+            Cost in rupees, rounded to paise
+        """
+        if self.is_flat:
+            return billable_hours * hourly_rate
+
+        start = (local_start.hour + local_start.minute / 60 + local_start.second / 3600
+                 + local_start.microsecond / 3600e6)
+        end = start + billable_hours
+        last_day = int(end // HOURS_PER_DAY)
+        end_hour = end - last_day * HOURS_PER_DAY
+
+        if last_day == 0:
+            cost = self._capped(hourly_rate * (self._units(end) - self._units(start)))
+        else:
+            cost = (self._capped(hourly_rate * (self.totals[-1] - self._units(start)))
+                    + (last_day - 1) * self._capped(hourly_rate * self.totals[-1])
+                    + self._capped(hourly_rate * self._units(end_hour)))
+        return round(cost, 2)
+
+    def stay_costs(self, hourly_rates, local_starts, billable_hours):
+        """
+        stay_cost for many stays at once (used by utils/billing.py)
+        Same steps in the same order, on NumPy arrays, so every cost is
+        identical to what stay_cost gives for that stay.
+
+        Args:
+            hourly_rates: Array of price_per_hour x occupancy multiplier
+            local_starts: Array of start times as local hour of day (0 to 24)
+            billable_hours: Array of whole hours to bill
+
+        Returns:
+            Array of costs
+        """
+        if self.is_flat:
+            return billable_hours * hourly_rates
+
+        starts = np.array(self.starts, dtype=np.float64)
+        multipliers = np.array(self.multipliers)
+        totals = np.array(self.totals)
+
+        def units(hour_of_day):
+            i = np.searchsorted(starts, hour_of_day, side='right') - 1
+            return totals[i] + multipliers[i] * (hour_of_day - starts[i])
+
+        def capped(cost):
+            return np.minimum(cost, self.daily_cap) if self.daily_cap is not None else cost
+
+        end = local_starts + billable_hours
+        last_day = end // HOURS_PER_DAY
+        end_hour = end - last_day * HOURS_PER_DAY
+
+        same_day = capped(hourly_rates * (units(end) - units(local_starts)))
+        several_days = (capped(hourly_rates * (self.totals[-1] - units(local_starts)))
+                        + (last_day - 1) * capped(hourly_rates * self.totals[-1])
+                        + capped(hourly_rates * units(end_hour)))
+        costs = np.where(last_day == 0, same_day, several_days)
+        # Python's round (np.round can be a paisa off on halves)
+        return np.array([round(cost, 2) for cost in costs.tolist()])
+
+
+FLAT = CompiledTariff([1.0] * HOURS_PER_DAY)
+
+
+def compile_tariff(bands=None, occupancy_multipliers=None, daily_cap=None):
+    """
+    Checks a tariff and compiles it
+
+    Args:
+        bands: [{'start': 8, 'end': 11, 'multiplier': 1.5}, ...] - local hours,
+               end not included, end < start runs past midnight
+        occupancy_multipliers: [{'min_occupancy': 0.8, 'multiplier': 1.25}, ...]
+        daily_cap: Most charged per calendar day, or None
+
+    Returns:
+        CompiledTariff
+
+    Raises:
+        ValueError: If the tariff is not valid
+    """
+    hour_multipliers = [None] * HOURS_PER_DAY
+    for band in bands or []:
+        try:
+            start, end, multiplier = int(band['start']), int(band['end']), float(band['multiplier'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('Each band needs a whole-hour start and end and a multiplier')
+        if not (0 <= start < HOURS_PER_DAY and 0 <= end <= HOURS_PER_DAY) or start == end:
+            raise ValueError('Band hours must be 0 to 24 and start must differ from end')
+        if multiplier <= 0:
+            raise ValueError('Multipliers must be positive')
+        hours = range(start, end) if start < end else list(range(start, HOURS_PER_DAY)) + list(range(0, end))
+        for hour in hours:
+            if hour_multipliers[hour] is not None:
+                raise ValueError(f'Bands overlap at {hour}:00')
+            hour_multipliers[hour] = multiplier
+
+    surcharges = []
+    for level in occupancy_multipliers or []:
+        try:
+            min_occupancy, multiplier = float(level['min_occupancy']), float(level['multiplier'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('Each occupancy level needs min_occupancy (0 to 1) and a multiplier')
+        if not 0 <= min_occupancy <= 1 or multiplier <= 0:
+            raise ValueError('min_occupancy must be 0 to 1 and multipliers positive')
+        surcharges.append((min_occupancy, multiplier))
+    if len({level for level, _ in surcharges}) != len(surcharges):
+        raise ValueError('Two occupancy levels have the same min_occupancy')
+
+    if daily_cap is not None:
+        daily_cap = float(daily_cap)
+        if daily_cap <= 0:
+            raise ValueError('daily_cap must be positive')
+
+    return CompiledTariff([1.0 if m is None else m for m in hour_multipliers], surcharges, daily_cap)
+
+
+# ============================================================================
+# COMPILED TARIFFS OF ALL LOTS (PER PROCESS)
+# ============================================================================
+
+_tariffs = {}
+_tariffs_version = None
+_tariffs_lock = threading.Lock()
+
+
+def get_tariffs():
+    """
+    Compiled tariffs by lot id
+    Lots that are not in the dictionary use FLAT.
+    The version check reuses the counters @versioned_etag already read
+    (no extra query in the lists); version 0 = no tariff was ever saved.
+    """
+    global _tariffs, _tariffs_version
+    version = request_version(TARIFFS)
+    if _tariffs_version == version:
+        return _tariffs
+    if version == 0:
+        _tariffs, _tariffs_version = {}, version
+        return _tariffs
+
+    with _tariffs_lock:
+        if _tariffs_version != version:
+            compiled = {}
+            for tariff in db.session.execute(select(LotTariff)).scalars():
+                try:
+                    compiled[tariff.lot_id] = compile_tariff(
+                        tariff.bands, tariff.occupancy_multipliers, tariff.daily_cap)
+                except ValueError as e:  # Saved tariffs are checked first, so this is unexpected
+                    print(f"⚠ Tariff of lot {tariff.lot_id} is not valid, using the flat price: {e}")
+            _tariffs, _tariffs_version = compiled, version
+    return _tariffs
+
+
+def get_tariff(lot_id):
+    """The compiled tariff of one lot (FLAT if it has none)"""
+    return get_tariffs().get(lot_id, FLAT)
+
+
+def occupancy_of(available, total):
+    """Share of spots taken, from the free spot count"""
+    return 1 - available / total if total else 0.0
+
+
+def make_price_lookup():
+    """
+    For lists: returns price(lot_id, price_per_hour, available, total) that
+    gives the price per hour right now, from counts the list already has
+
+    Example usage:
+        price = make_price_lookup()
+        lot['current_price_per_hour'] = price(lot_id, rate, available, number_of_spots)
+    """
+    tariffs = get_tariffs()
+    now = to_local_time(datetime.utcnow())
+    hour_of_day = now.hour + now.minute / 60
+
+    def price(lot_id, price_per_hour, available, total):
+        tariff = tariffs.get(lot_id)
+        if tariff is None:
+            return price_per_hour
+        return round(price_per_hour * tariff.band_multiplier(hour_of_day)
+                     * tariff.occupancy_multiplier(occupancy_of(available, total)), 2)
+    return price
+
+
+def _changes_tariffs(session):
+    """True if this flush adds, changes or deletes a tariff"""
+    for tariff in list(session.new) + list(session.deleted):
+        if isinstance(tariff, LotTariff):
+            return True
+    for tariff in session.dirty:
+        if isinstance(tariff, LotTariff) and session.is_modified(tariff):
+            return True
+    return False
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _bump_tariffs(session, flush_context):
+    """Every process recompiles on its next price lookup"""
+    if _changes_tariffs(session):
+        bump_version(session.connection(), TARIFFS)
@@ -0,0 +1,191 @@
+"""
+Request Profiler
+Finds out WHY a request was slow by sampling its call stack while it runs
+
+Student Project - Performance Optimization
+How it works:
+- One background thread looks at the stack of every request being
+  profiled every PROFILE_INTERVAL_MS (like py-spy, but inside the app)
+- When the request ends, the samples are saved if the request was slower
+  than PROFILE_SLOW_MS, or if it was picked by PROFILE_SAMPLE_RATE
+- Profiles are saved in PROFILE_DIR as "collapsed stacks" - one line per
+  distinct stack with the number of samples, the format flame graph tools
+  read (flamegraph.pl, speedscope.app)
+- Admins can list and download them at /api/admin/profiles
+
+It is off by default - set PROFILING_ENABLED=true to turn it on.
+Sampling a stack takes microseconds, so it is fine to leave on in production.
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import threading
+from collections import Counter
+from datetime import datetime
+from flask import g, request
+
+PROFILE_EXTENSION = '.collapsed'
+PROFILE_NAME = re.compile(r'^[\w.-]+\.collapsed$')
+
+
+def _frame_label(frame):
+    """One stack frame as 'function (file.py:line)'"""
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def collapse_stack(frame):
+    """
+    Turns a frame and its callers into one collapsed-stack string,
+    outermost call first: 'wsgi_app (app.py:1);dispatch (app.py:2);...'
+    """
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """
+    Background thread that samples the stacks of registered threads
+
+    Example:
+        sampler.start(threading.get_ident())
+        ... do work ...
+        stacks = sampler.stop(threading.get_ident())   # Counter of stack → samples
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.active = {}      # thread id → Counter of collapsed stacks
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+
+    def _ensure_thread(self):
+        # A forked child does not inherit the parent's thread - start a new one
+        if self.thread is None or self.pid != os.getpid() or not self.thread.is_alive():
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+            self.thread.start()
+
+    def start(self, thread_id):
+        with self.lock:
+            self._ensure_thread()
+            self.active[thread_id] = Counter()
+
+    def stop(self, thread_id):
+        with self.lock:
+            return self.active.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not self.active:
+                continue
+            frames = sys._current_frames()
+            with self.lock:
+                for thread_id, stacks in self.active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[collapse_stack(frame)] += 1
+
+
+def profile_filename(method, path, duration_ms):
+    """e.g. 20261019T101500_123456_GET_api-user-reservations_850ms.collapsed"""
+    timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S_%f')
+    safe_path = re.sub(r'[^\w]+', '-', path).strip('-') or 'root'
+    return f'{timestamp}_{method}_{safe_path[:80]}_{int(duration_ms)}ms{PROFILE_EXTENSION}'
+
+
+def save_profile(directory, filename, stacks, keep):
+    """
+    Writes collapsed stacks to a file and deletes the oldest profiles
+    so at most `keep` are left
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, filename), 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(f'{stack} {count}\n')
+
+    profiles = sorted(name for name in os.listdir(directory) if name.endswith(PROFILE_EXTENSION))
+    for old_name in profiles[:-keep] if keep else []:
+        try:
+            os.remove(os.path.join(directory, old_name))
+        except OSError:
+            pass  # Another process removed it first
+
+
+def list_profiles(directory, limit=50):
+    """
+    Recent profiles, newest first
+
+    Returns:
+        List of dictionaries (name, method, path, duration_ms, size, created_at)
+    """
+    if not os.path.isdir(directory):
+        return []
+
+    names = sorted((name for name in os.listdir(directory) if PROFILE_NAME.match(name)), reverse=True)
+    profiles = []
+    for name in names[:limit]:
+        # Name format: <date>_<microseconds>_<METHOD>_<path>_<duration>ms.collapsed
+        parts = name[:-len(PROFILE_EXTENSION)].split('_')
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except OSError:
+            continue
+        profiles.append({
+            'name': name,
+            'method': parts[2] if len(parts) > 4 else None,
+            'path': '_'.join(parts[3:-1]) if len(parts) > 4 else None,
+            'duration_ms': int(parts[-1][:-2]) if parts[-1].endswith('ms') and parts[-1][:-2].isdigit() else None,
+            'size': stat.st_size,
+            'created_at': datetime.utcfromtimestamp(stat.st_mtime).isoformat()
+        })
+    return profiles
+
+
+def is_valid_profile_name(name):
+    """Only plain profile file names (no paths like ../../etc/passwd)"""
+    return bool(PROFILE_NAME.match(name)) and os.path.basename(name) == name
+
+
+def init_profiler(app):
+    """
+    Adds request profiling to the app (if PROFILING_ENABLED)
+    """
+    if not app.config.get('PROFILING_ENABLED'):
+        return
+
+    sampler = StackSampler(app.config['PROFILE_INTERVAL_MS'] / 1000)
+    prefixes = tuple(app.config['PROFILE_PATH_PREFIXES'])
+    slow_ms = app.config['PROFILE_SLOW_MS']
+    sample_rate = app.config['PROFILE_SAMPLE_RATE']
+    directory = app.config['PROFILE_DIR']
+    keep = app.config['PROFILE_KEEP']
+
+    @app.before_request
+    def start_profiling():
+        if request.path.startswith(prefixes) and not request.path.startswith('/api/admin/profiles'):
+            g.profile_started = time.perf_counter()
+            g.profile_picked = random.random() < sample_rate
+            sampler.start(threading.get_ident())
+
+    @app.teardown_request
+    def finish_profiling(error=None):
+        started = g.pop('profile_started', None)
+        if started is None:
+            return
+        stacks = sampler.stop(threading.get_ident())
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        if stacks and (duration_ms >= slow_ms or g.pop('profile_picked', False)):
+            try:
+                save_profile(directory, profile_filename(request.method, request.path, duration_ms), stacks, keep)
+            except OSError as e:
+                print(f"⚠ Could not save profile: {e}")
@@ -0,0 +1,224 @@
+"""
+SQL Query Statistics
+Counts and times the SQL queries run by each request, to find slow pages
+and N+1 problems (one query per row hidden inside a to_dict() loop)
+
+Student Project - Performance Optimization
+How it works:
+- SQLAlchemy's before/after_cursor_execute events time every statement
+- Statements are grouped by "shape" (the SQL with parameters left out),
+  so the same lazy load run for 50 rows shows up as one shape x 50
+- Each response gets X-Query-Count and Server-Timing headers
+  (Server-Timing is shown in the browser dev tools Network tab)
+- A warning is logged when one shape runs more than QUERY_REPEAT_THRESHOLD
+  times in a single request
+
+It is off by default - set QUERY_STATS_ENABLED=true to turn it on.
+assert_query_budget() can be used from scripts (see
+benchmarks/check_query_budgets.py) to make sure an endpoint stays under
+a fixed number of queries.
+"""
+
+import re
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Collectors that are currently recording on this thread (innermost last)
+_local = threading.local()
+_listeners_installed = False
+_listeners_lock = threading.Lock()
+
+_WHITESPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'\(\s*\?(\s*,\s*\?)*\s*\)')   # IN (?, ?, ?) → IN (?)
+_NUMBER = re.compile(r'\b\d+\b')
+
+
+def statement_shape(statement):
+    """
+    Normalizes a SQL statement so repeats of the same query match
+    even when they use different parameters
+
+    Args:
+        statement: SQL text as sent to the database
+
+    Returns:
+        Shortened, normalized SQL string
+    """
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    shape = _IN_LIST.sub('(?)', shape)
+    return _NUMBER.sub('N', shape)
+
+
+class QueryStats:
+    """Queries recorded during one request (or one collect_queries block)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0      # Seconds spent inside the database
+        self.shapes = Counter()    # shape → how many times it ran
+        self.shape_time = Counter()
+
+    def record(self, statement, duration):
+        shape = statement_shape(statement)
+        self.count += 1
+        self.total_time += duration
+        self.shapes[shape] += 1
+        self.shape_time[shape] += duration
+
+    def repeated(self, threshold):
+        """
+        Statement shapes that ran more than `threshold` times
+
+        Returns:
+            List of (shape, count), most repeated first
+        """
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+    def summary(self, limit=5):
+        """Short text report of the most repeated statements"""
+        lines = [f"{self.count} queries, {self.total_time * 1000:.1f} ms in the database"]
+        for shape, count in self.shapes.most_common(limit):
+            lines.append(f"  {count:>4}x  {shape[:160]}")
+        return '\n'.join(lines)
+
+
+def _active_collectors():
+    collectors = getattr(_local, 'collectors', None)
+    if collectors is None:
+        collectors = _local.collectors = []
+    return collectors
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, 'collectors', None):
+        conn.info.setdefault('query_stats_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = getattr(_local, 'collectors', None)
+    starts = conn.info.get('query_stats_start')
+    if not collectors or not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    for stats in collectors:
+        stats.record(statement, duration)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute - drop its start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_stats_start'):
+        conn.info['query_stats_start'].pop()
+
+
+def install_listeners():
+    """
+    Hooks the timing events into every engine (primary and replica)
+    Safe to call more than once
+    """
+    global _listeners_installed
+    with _listeners_lock:
+        if _listeners_installed:
+            return
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _listeners_installed = True
+
+
+@contextmanager
+def collect_queries():
+    """
+    Records every query run on this thread inside the block
+
+    Example:
+        with collect_queries() as stats:
+            ParkingLot.query.all()
+        print(stats.count)
+    """
+    install_listeners()
+    stats = QueryStats()
+    collectors = _active_collectors()
+    collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        collectors.remove(stats)
+
+
+def init_query_stats(app):
+    """
+    Adds per-request query statistics to the app (if QUERY_STATS_ENABLED)
+    """
+    if not app.config.get('QUERY_STATS_ENABLED'):
+        return
+
+    install_listeners()
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats()
+        g.query_stats_started = time.perf_counter()
+        _active_collectors().append(g.query_stats)
+
+    @app.after_request
+    def add_query_stats_headers(response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+        if stats in _active_collectors():
+            _active_collectors().remove(stats)
+
+        total_ms = (time.perf_counter() - g.pop('query_stats_started')) * 1000
+        response.headers['X-Query-Count'] = str(stats.count)
+        response.headers['Server-Timing'] = (
+            f'db;dur={stats.total_time * 1000:.2f};desc="{stats.count} queries", '
+            f'total;dur={total_ms:.2f}'
+        )
+
+        threshold = current_app.config['QUERY_REPEAT_THRESHOLD']
+        for shape, count in stats.repeated(threshold):
+            current_app.logger.warning(
+                f"⚠ Possible N+1: {count}x the same query in {request.method} {request.path}: {shape[:200]}"
+            )
+        return response
+
+    @app.teardown_request
+    def stop_query_stats(error=None):
+        # after_request is skipped when a view raises, so clean up here too
+        stats = g.pop('query_stats', None)
+        if stats is not None and stats in _active_collectors():
+            _active_collectors().remove(stats)
+
+
+def assert_query_budget(client, method, url, max_queries, **kwargs):
+    """
+    Calls an endpoint with a Flask test client and fails if it runs
+    more than `max_queries` SQL queries
+
+    Args:
+        client: app.test_client()
+        method: 'GET', 'POST', ...
+        url: Endpoint URL
+        max_queries: Highest number of queries allowed
+        **kwargs: Passed on to the client (headers, json, ...)
+
+    Returns:
+        (response, QueryStats)
+
+    Raises:
+        AssertionError: If the endpoint went over its budget
+    """
+    with collect_queries() as stats:
+        response = client.open(url, method=method, **kwargs)
+
+    if stats.count > max_queries:
+        raise AssertionError(
+            f"{method} {url} ran {stats.count} queries (budget {max_queries})\n{stats.summary()}"
+        )
+    return response, stats
@@ -0,0 +1,257 @@
+"""
+Rate Limiting with Token Buckets
+Stops one client from using up the server: a login attempt costs a full
+PBKDF2 password check, and every reservation takes the SQLite write lock
+
+Student Project - Reliability
+How a token bucket works:
+- Each bucket holds up to `burst` tokens and refills at a steady rate
+  (RATE_LIMITS, e.g. '5/60' = 5 tokens, refilled at 5 per minute)
+- Every request takes one token; an empty bucket = 429 Too Many Requests
+  with a Retry-After header saying when the next token is there
+- So short bursts are fine, but the long-run rate is capped
+
+A route has up to two buckets: one per client IP and one per user (the JWT
+user, or for /login the username being tried, so one account can't be
+guessed from many IPs). The request must get a token from BOTH - and if
+one is empty, the other one is not charged.
+
+Buckets live in Redis and are checked and updated by one Lua script, so
+all server processes share them and two requests can never take the same
+token. Without Redis every process keeps its own buckets in memory
+(the limit then applies per process).
+"""
+
+import math
+import time
+import threading
+import functools
+from collections import OrderedDict
+from flask import request, current_app, jsonify
+from flask_jwt_extended import get_jwt_identity
+from utils.cache import get_redis_client
+from utils.metrics import record_rate_limit_rejection
+
+KEY_PREFIX = 'ratelimit'
+
+# KEYS: one hash per bucket {tokens, ts}
+# ARGV: burst and refill rate (tokens per second) of every bucket
+# Returns {allowed (1/0), seconds to wait (as text - Lua numbers come back as integers), empty bucket (1-based)}
+TOKEN_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local levels = {}
+local wait, empty = 0, 0
+
+for i = 1, #KEYS do
+    local burst, rate = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    local bucket = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local last = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - last) * rate)
+    levels[i] = tokens
+    if tokens < 1 and (1 - tokens) / rate > wait then
+        wait, empty = (1 - tokens) / rate, i
+    end
+end
+
+if empty > 0 then
+    return {0, tostring(wait), empty}
+end
+
+for i = 1, #KEYS do
+    local burst, rate = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    redis.call('HSET', KEYS[i], 'tokens', tostring(levels[i] - 1), 'ts', tostring(now))
+    -- A full bucket is the same as no bucket, so let Redis drop it then
+    redis.call('PEXPIRE', KEYS[i], math.ceil(burst / rate * 1000) + 1000)
+end
+return {1, '0', 0}
+"""
+
+
+# ============================================================================
+# LIMITS
+# ============================================================================
+
+@functools.lru_cache(maxsize=64)
+def parse_limit(spec):
+    """
+    Turns '5/60' into (burst 5, refill 5/60 tokens per second)
+
+    Returns:
+        (burst, tokens per second), or None if the bucket is turned off
+    """
+    if not spec:
+        return None
+    burst, seconds = spec.split('/')
+    burst, seconds = float(burst), float(seconds)
+    if burst <= 0 or seconds <= 0:
+        return None
+    return burst, burst / seconds
+
+
+def jwt_user():
+    """User key of routes behind @jwt_required() (None on routes without a login)"""
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+def request_field(name):
+    """User key for routes without a login, e.g. request_field('username') on /login"""
+    def user_key():
+        value = (request.get_json(silent=True) or {}).get(name)
+        return str(value)[:100] if value else None
+    return user_key
+
+
+def _buckets(route, user_key):
+    """(scope, Redis key, burst, rate) of every bucket this request must take a token from"""
+    limits = current_app.config['RATE_LIMITS'].get(route, {})
+    buckets = []
+    for scope in ('ip', 'user'):
+        limit = parse_limit(limits.get(scope))
+        if limit is None:
+            continue
+        who = request.remote_addr if scope == 'ip' else (user_key or jwt_user)()
+        if who:
+            buckets.append((scope, f'{KEY_PREFIX}:{route}:{scope}:{who}') + limit)
+    return buckets
+
+
+# ============================================================================
+# BUCKET STORES
+# ============================================================================
+
+_script = None
+_script_client = None
+
+
+def _take_redis(client, buckets):
+    """One token from every bucket, in Redis (atomic, shared by all processes)"""
+    global _script, _script_client
+    if _script_client is not client:
+        # The Redis client is new after a fork or reconnect
+        _script, _script_client = client.register_script(TOKEN_BUCKET_SCRIPT), client
+    args = []
+    for _, _, burst, rate in buckets:
+        args += [burst, rate]
+    allowed, wait, empty = _script(keys=[key for _, key, _, _ in buckets], args=args)
+    return bool(allowed), float(wait), int(empty) - 1
+
+
+class MemoryBuckets:
+    """
+    The same token buckets in this process, used while Redis is down
+    Keeps at most `max_keys` buckets (the least recently used go first)
+    """
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()  # key → (tokens, last refill in monotonic seconds)
+        self.lock = threading.Lock()
+
+    def take(self, buckets):
+        """
+        Takes one token from every bucket, or from none of them
+
+        Args:
+            buckets: List of (scope, key, burst, rate) from _buckets()
+
+        Returns:
+            (allowed, seconds to wait, index of the empty bucket or -1)
+        """
+        now = time.monotonic()
+        with self.lock:
+            levels, wait, empty = [], 0.0, -1
+            for index, (_, key, burst, rate) in enumerate(buckets):
+                tokens, last = self.buckets.get(key, (burst, now))
+                tokens = min(burst, tokens + (now - last) * rate)
+                levels.append(tokens)
+                if tokens < 1 and (1 - tokens) / rate > wait:
+                    wait, empty = (1 - tokens) / rate, index
+            if empty >= 0:
+                return False, wait, empty
+
+            for (_, key, _, _), tokens in zip(buckets, levels):
+                self.buckets[key] = (tokens - 1, now)
+                self.buckets.move_to_end(key)
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return True, 0.0, -1
+
+
+_memory_buckets = None
+
+
+def _take_memory(buckets):
+    """One token from every bucket, in this process's memory"""
+    global _memory_buckets
+    if _memory_buckets is None:
+        _memory_buckets = MemoryBuckets(current_app.config['RATE_LIMIT_MEMORY_KEYS'])
+    return _memory_buckets.take(buckets)
+
+
+def take_tokens(buckets):
+    """
+    Takes one token from every bucket (Redis, or memory if Redis is down)
+
+    Returns:
+        (allowed, seconds to wait, empty bucket index, 'redis' or 'memory')
+    """
+    client = get_redis_client()
+    if client is not None:
+        try:
+            return _take_redis(client, buckets) + ('redis',)
+        except Exception as e:
+            print(f"⚠ Rate limit store error ({e}) - using in-memory buckets")
+    return _take_memory(buckets) + ('memory',)
+
+
+# ============================================================================
+# DECORATOR
+# ============================================================================
+
+def too_many_requests(retry_after):
+    """429 response with a Retry-After header (whole seconds, at least 1)"""
+    seconds = max(1, math.ceil(retry_after))
+    response = jsonify({
+        'error': 'Too many requests - please try again later',
+        'retry_after': seconds
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(seconds)
+    return response
+
+
+def rate_limit(route, user_key=None):
+    """
+    Decorator that applies the RATE_LIMITS entry `route` to a view
+    Put it after @jwt_required() so the user bucket knows who is calling.
+
+    Args:
+        route: Key in RATE_LIMITS like 'reserve'
+        user_key: Function returning the user bucket's key
+                  (default: the JWT identity; skipped if it returns None)
+
+    Example usage:
+        @jwt_required()
+        @rate_limit('reserve')
+        def reserve_spot():
+            pass
+    """
+    def wrapper(fn):
+        @functools.wraps(fn)
+        def decorator(*args, **kwargs):
+            if current_app.config.get('RATE_LIMIT_ENABLED'):
+                buckets = _buckets(route, user_key)
+                if buckets:
+                    allowed, wait, empty, backend = take_tokens(buckets)
+                    if not allowed:
+                        record_rate_limit_rejection(route, buckets[empty][0], backend)
+                        return too_many_requests(wait)
+            return fn(*args, **kwargs)
+
+        return decorator
+    return wrapper
@@ -0,0 +1,290 @@
+"""
+Fast Serializers for List and Analytics Endpoints
+Builds JSON responses straight from selected columns instead of
+loading full ORM objects and calling to_dict() on each one
+
+Student Project - Performance Optimization
+Why this is faster for long lists:
+- Only the columns a response needs are selected, and rows come back as
+  plain tuples - no ORM objects, no identity map, no lazy relationship loads
+- Timestamps are left as datetime objects and written by the JSON encoder,
+  not formatted one by one with isoformat() in Python
+- orjson (written in Rust) encodes the result when it is installed; without
+  it the standard json module is used, so it is an optional speed-up
+
+The dictionaries have the same keys as the matching to_dict() methods, so the
+API responses do not change. Compare both paths with
+`python benchmarks/bench_serializers.py`.
+"""
+
+import json
+from datetime import datetime, date
+from flask import Response
+from sqlalchemy import select, func
+from models import db
+from models.user import User
+from models.parking_lot import ParkingLot
+from models.parking_spot import ParkingSpot
+from models.reservation import Reservation, format_duration
+from models.reservation_archive import ReservationArchive
+from utils.pricing import make_price_lookup
+
+try:
+    import orjson
+except ImportError:  # Optional - falls back to the standard json module
+    orjson = None
+
+
+# ============================================================================
+# JSON ENCODING
+# ============================================================================
+
+def _default(value):
+    """Lets the standard json module write dates like datetime.isoformat()"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(data):
+    """
+    Encodes data as JSON bytes (orjson if installed, otherwise json)
+    Naive datetimes come out exactly like datetime.isoformat()
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_default, separators=(',', ':')).encode()
+
+
+def json_response(data, status=200):
+    """
+    Like jsonify(data), status - but with the fast encoder and datetime support
+
+    Args:
+        data: Dictionary or list to send
+        status: HTTP status code
+
+    Returns:
+        Flask Response with mimetype application/json
+    """
+    return Response(dumps(data), status=status, mimetype='application/json')
+
+
+# ============================================================================
+# PARKING LOTS
+# ============================================================================
+
+def serialize_lots(only_available=False):
+    """
+    All lots with their spot counts, same keys as ParkingLot.to_dict()
+    Two queries: the lot columns and one GROUP BY for the counts
+
+    Args:
+        only_available: Leave out lots without a free spot (user view)
+
+    Returns:
+        List of dictionaries
+    """
+    spot_counts = ParkingLot.get_spot_counts()
+    price_now = make_price_lookup()
+    rows = db.session.execute(select(
+        ParkingLot.id, ParkingLot.prime_location_name, ParkingLot.price_per_hour,
+        ParkingLot.address, ParkingLot.pin_code, ParkingLot.latitude, ParkingLot.longitude,
+        ParkingLot.number_of_spots, ParkingLot.created_at, ParkingLot.updated_at
+    ).order_by(ParkingLot.id)).all()
+
+    lots = []
+    for (lot_id, name, price, address, pin_code, latitude, longitude,
+         number_of_spots, created_at, updated_at) in rows:
+        counts = spot_counts.get(lot_id, {})
+        available = counts.get('available', 0)
+        if only_available and available <= 0:
+            continue
+        lots.append({
+            'id': lot_id,
+            'prime_location_name': name,
+            'price_per_hour': price,
+            'current_price_per_hour': price_now(lot_id, price, available, number_of_spots),
+            'address': address,
+            'pin_code': pin_code,
+            'latitude': latitude,
+            'longitude': longitude,
+            'number_of_spots': number_of_spots,
+            'available_spots': available,
+            'occupied_spots': counts.get('occupied', 0),
+            'created_at': created_at,
+            'updated_at': updated_at
+        })
+    return lots
+
+
+def serialize_occupancy():
+    """
+    Occupancy of every lot (for the admin occupancy chart)
+
+    Returns:
+        List of dictionaries (lot_id, lot_name, total_spots, occupied_spots,
+        available_spots, occupancy_rate)
+    """
+    spot_counts = ParkingLot.get_spot_counts()
+    rows = db.session.execute(select(
+        ParkingLot.id, ParkingLot.prime_location_name, ParkingLot.number_of_spots
+    ).order_by(ParkingLot.id)).all()
+
+    occupancy_data = []
+    for lot_id, name, total_spots in rows:
+        counts = spot_counts.get(lot_id, {})
+        occupied = counts.get('occupied', 0)
+        occupancy_rate = (occupied / total_spots * 100) if total_spots > 0 else 0
+        occupancy_data.append({
+            'lot_id': lot_id,
+            'lot_name': name,
+            'total_spots': total_spots,
+            'occupied_spots': occupied,
+            'available_spots': counts.get('available', 0),
+            'occupancy_rate': round(occupancy_rate, 2)
+        })
+    return occupancy_data
+
+
+# ============================================================================
+# PARKING SPOTS
+# ============================================================================
+
+def serialize_spots(lot_id=None, status=None):
+    """
+    Spots with their active reservation, same keys as ParkingSpot.to_dict()
+    plus 'current_reservation' (Reservation.to_dict()) for occupied spots.
+    One query: spots LEFT JOIN active reservations.
+
+    Args:
+        lot_id, status: Optional filters
+
+    Returns:
+        List of dictionaries
+    """
+    query = select(
+        ParkingSpot.id, ParkingSpot.lot_id, ParkingSpot.spot_number, ParkingSpot.status,
+        ParkingSpot.created_at,
+        Reservation.id, Reservation.user_id, Reservation.reserved_at,
+        Reservation.parking_timestamp, Reservation.leaving_timestamp, Reservation.status,
+        Reservation.parking_cost, Reservation.remarks
+    ).select_from(ParkingSpot).outerjoin(
+        Reservation, (Reservation.spot_id == ParkingSpot.id) & (Reservation.status == 'active')
+    ).order_by(ParkingSpot.id)
+    if lot_id:
+        query = query.where(ParkingSpot.lot_id == lot_id)
+    if status:
+        query = query.where(ParkingSpot.status == status)
+
+    spots = []
+    seen = set()
+    for (spot_id, spot_lot_id, spot_number, spot_status, created_at,
+         res_id, user_id, reserved_at, parked_at, left_at, res_status, cost, remarks) in db.session.execute(query):
+        if spot_id in seen:
+            continue  # Should not happen, but a spot is listed once even with two active rows
+        seen.add(spot_id)
+        spot_data = {
+            'id': spot_id,
+            'lot_id': spot_lot_id,
+            'spot_number': spot_number,
+            'status': spot_status,
+            'created_at': created_at
+        }
+        if res_id is not None:
+            spot_data['current_reservation'] = {
+                'id': res_id,
+                'spot_id': spot_id,
+                'user_id': user_id,
+                'reserved_at': reserved_at,
+                'parking_timestamp': parked_at,
+                'leaving_timestamp': left_at,
+                'status': res_status,
+                'parking_cost': cost,
+                'duration': format_duration(parked_at, left_at),
+                'remarks': remarks
+            }
+        spots.append(spot_data)
+    return spots
+
+
+# ============================================================================
+# USERS
+# ============================================================================
+
+def serialize_users():
+    """
+    Regular users with reservation counts, same keys as
+    User.to_dict(include_sensitive=True) plus total/active/completed counts
+    (archived reservations count as completed). Three queries in total.
+
+    Returns:
+        List of dictionaries
+    """
+    archived_counts = dict(db.session.execute(
+        select(ReservationArchive.user_id, func.count(ReservationArchive.id))
+        .group_by(ReservationArchive.user_id)
+    ).all())
+
+    live_counts = {}
+    for user_id, status, count in db.session.execute(
+        select(Reservation.user_id, Reservation.status, func.count(Reservation.id))
+        .group_by(Reservation.user_id, Reservation.status)
+    ):
+        live_counts.setdefault(user_id, {})[status] = count
+
+    rows = db.session.execute(select(
+        User.id, User.username, User.role, User.created_at, User.email, User.last_booking_date
+    ).where(User.role == 'user').order_by(User.id))
+
+    users = []
+    for user_id, username, role, created_at, email, last_booking_date in rows:
+        archived = archived_counts.get(user_id, 0)
+        counts = live_counts.get(user_id, {})
+        users.append({
+            'id': user_id,
+            'username': username,
+            'role': role,
+            'created_at': created_at,
+            'email': email,
+            'last_booking_date': last_booking_date,
+            'total_reservations': sum(counts.values()) + archived,
+            'active_reservations': counts.get('active', 0),
+            'completed_reservations': counts.get('completed', 0) + archived
+        })
+    return users
+
+
+# ============================================================================
+# RESERVATIONS
+# ============================================================================
+
+def serialize_reservation_rows(rows):
+    """
+    Converts rows from utils.archive.reservations_query into the same
+    shape as Reservation.to_dict(include_full_details=True), plus 'archived'
+
+    Args:
+        rows: Result rows of select(reservations_query(...))
+
+    Returns:
+        List of dictionaries
+    """
+    return [{
+        'id': res_id,
+        'spot_id': spot_id,
+        'user_id': user_id,
+        'reserved_at': reserved_at,
+        'parking_timestamp': parked_at,
+        'leaving_timestamp': left_at,
+        'status': status,
+        'parking_cost': cost,
+        'duration': format_duration(parked_at, left_at),
+        'remarks': remarks,
+        'spot_number': spot_number,
+        'lot_name': lot_name,
+        'lot_address': lot_address,
+        'price_per_hour': price,
+        'archived': bool(archived)
+    } for (res_id, spot_id, user_id, _lot_id, spot_number, lot_name, lot_address, price,
+           reserved_at, parked_at, left_at, status, cost, remarks, archived) in rows]
@@ -0,0 +1,280 @@
+"""
+Slow Query Log
+Writes every SQL statement slower than SLOW_QUERY_THRESHOLD_MS to a log
+file, together with the route that ran it and the database's query plan
+
+Student Project - Performance Optimization
+Each log line is one JSON object:
+- sql: the statement with parameters left out (same "shape" as utils/query_stats.py)
+- params: parameter types only (values are redacted - they can be emails etc.)
+- route: e.g. "GET /api/admin/analytics/revenue", or the Celery task name
+- plan: EXPLAIN QUERY PLAN output, captured the first time a shape is seen
+  (look for "SCAN <table>" = reads the whole table, "SEARCH ... USING INDEX" = good)
+
+Every process (each gunicorn worker, each Celery worker) writes its own
+file, e.g. logs/slow_queries.4711.log for PID 4711, and rotates it at
+SLOW_QUERY_LOG_MAX_BYTES. Rotating one shared file is not safe with several
+processes: one renames it while the others keep writing to the old file.
+GET /api/admin/slow-queries adds up all log files and shows the statements
+that cost the most time.
+It is off by default - set SLOW_QUERY_LOG_ENABLED=true to turn it on.
+"""
+
+import os
+import re
+import glob
+import json
+import time
+import logging
+import threading
+from datetime import datetime, date
+from logging.handlers import RotatingFileHandler
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.query_stats import statement_shape
+
+_settings = {'threshold': None, 'path': None}
+_logger = logging.getLogger('parking.slow_queries')
+_logger.propagate = False  # Only goes to the slow query file
+_explained_shapes = set()
+_explained_lock = threading.Lock()
+_listeners_installed = False
+OLD_LOG_DAYS = 7  # Files of other processes untouched this long are deleted
+
+
+def process_log_path(path, pid=None):
+    """
+    Log file of one process
+
+    Example:
+        process_log_path('logs/slow_queries.log', 4711) → 'logs/slow_queries.4711.log'
+    """
+    root, extension = os.path.splitext(path)
+    return f'{root}.{pid or os.getpid()}{extension}'
+
+
+class ProcessFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that writes to this process's own file
+    A process forked after the handler was set up (preloaded gunicorn
+    master → worker) switches to a file with its own PID on the first write.
+    """
+
+    def __init__(self, path, max_bytes, backups):
+        self.shared_path = path
+        self.pid = os.getpid()
+        super().__init__(process_log_path(path, self.pid), maxBytes=max_bytes,
+                         backupCount=backups, delay=True)
+
+    def emit(self, record):
+        if self.pid != os.getpid():
+            with self.lock:
+                # The parent's file object is left alone (the parent still uses it)
+                self.stream = None
+                self.pid = os.getpid()
+                self.baseFilename = os.path.abspath(process_log_path(self.shared_path, self.pid))
+        super().emit(record)
+
+
+def redact_parameters(parameters):
+    """
+    Replaces parameter values with their type (and length for text),
+    so the log shows what kind of values were used without leaking data
+
+    Example:
+        ('john@example.com', 5) → ['<str:16>', '<int>']
+    """
+    def redact(value):
+        if value is None:
+            return None
+        if isinstance(value, (str, bytes)):
+            return f'<{type(value).__name__}:{len(value)}>'
+        if isinstance(value, (datetime, date)):
+            return '<datetime>'
+        return f'<{type(value).__name__}>'
+
+    if isinstance(parameters, dict):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(value) for value in parameters]
+    return redact(parameters)
+
+
+def current_route():
+    """What issued the query: the request's route, a Celery task, or 'script'"""
+    if has_request_context():
+        rule = request.url_rule.rule if request.url_rule else request.path
+        return f'{request.method} {rule}'
+    try:
+        from celery import current_task
+        if current_task and current_task.name:
+            return f'task {current_task.name}'
+    except Exception:
+        pass
+    return 'script'
+
+
+def explain_query(conn, statement, parameters):
+    """
+    Gets the query plan from the database without running the query
+
+    Returns:
+        List of plan lines, or None if it could not be explained
+    """
+    if conn.dialect.name != 'sqlite':
+        return None  # Only SQLite's EXPLAIN QUERY PLAN is supported
+    try:
+        # A separate cursor, so the real query's results are not disturbed
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters or ())
+            return [row[-1] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception as e:
+        return [f'(could not explain: {e})']
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute - drop its start time
+    # so the next statement on this connection is not timed from it
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('slow_query_start'):
+        conn.info['slow_query_start'].pop()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('slow_query_start')
+    if not starts:
+        return
+    duration_ms = (time.perf_counter() - starts.pop()) * 1000
+    if duration_ms < _settings['threshold']:
+        return
+
+    shape = statement_shape(statement)
+    record = {
+        'time': datetime.utcnow().isoformat(),
+        'duration_ms': round(duration_ms, 2),
+        'sql': shape,
+        'params': None if executemany else redact_parameters(parameters),
+        'executemany': executemany,
+        'route': current_route(),
+    }
+
+    with _explained_lock:
+        first_sight = shape not in _explained_shapes
+        _explained_shapes.add(shape)
+    if first_sight and not executemany:
+        record['plan'] = explain_query(conn, statement, parameters)
+
+    _logger.warning(json.dumps(record))
+
+
+def init_slow_query_log(app):
+    """
+    Starts logging slow statements (if SLOW_QUERY_LOG_ENABLED)
+    Works for the web app and for the Celery worker app
+    """
+    global _listeners_installed
+    if not app.config.get('SLOW_QUERY_LOG_ENABLED'):
+        return
+
+    path = app.config['SLOW_QUERY_LOG_PATH']
+    _settings['threshold'] = app.config['SLOW_QUERY_THRESHOLD_MS']
+
+    if _settings['path'] != path:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        for handler in list(_logger.handlers):
+            _logger.removeHandler(handler)
+            handler.close()
+        remove_old_logs(path)
+        handler = ProcessFileHandler(path, app.config['SLOW_QUERY_LOG_MAX_BYTES'],
+                                     app.config['SLOW_QUERY_LOG_BACKUPS'])
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        _logger.addHandler(handler)
+        _logger.setLevel(logging.WARNING)
+        _settings['path'] = path
+
+    if not _listeners_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _listeners_installed = True
+
+
+def log_files(path, backups):
+    """
+    All slow query files: every process's file and its rotated copies (.1, .2, ...),
+    plus the single shared file older versions wrote
+    """
+    root, extension = os.path.splitext(path)
+    pattern = re.compile(re.escape(root) + r'\.\d+' + re.escape(extension) + r'(\.\d+)?$')
+    files = [file_path for file_path in glob.glob(glob.escape(root) + '.*')
+             if pattern.match(file_path)]
+    legacy = [path] + [f'{path}.{n}' for n in range(1, backups + 1)]
+    return sorted(files) + [file_path for file_path in legacy if os.path.exists(file_path)]
+
+
+def remove_old_logs(path, days=OLD_LOG_DAYS):
+    """
+    Deletes log files nobody wrote to for `days` days
+    (workers are replaced over time, and each new PID starts a new file)
+    """
+    cutoff = time.time() - days * 86400
+    for file_path in log_files(path, backups=0):
+        try:
+            if os.path.getmtime(file_path) < cutoff:
+                os.remove(file_path)
+        except OSError:
+            continue  # Another process removed it first
+
+
+def read_slow_queries(path, backups):
+    """Reads all records from every process's log file and their rotated copies"""
+    records = []
+    for file_path in log_files(path, backups):
+        try:
+            f = open(file_path)
+        except OSError:
+            continue  # Rotated away while we were reading
+        with f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # Half-written line (the process is still writing it)
+    return records
+
+
+def top_slow_queries(path, backups, limit=20):
+    """
+    Groups the log by statement and sorts by total time spent
+
+    Returns:
+        List of dictionaries (sql, count, total_ms, avg_ms, max_ms, routes, plan, last_seen)
+    """
+    groups = {}
+    for record in read_slow_queries(path, backups):
+        group = groups.setdefault(record['sql'], {
+            'sql': record['sql'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'routes': {}, 'plan': None, 'last_seen': None
+        })
+        group['count'] += 1
+        group['total_ms'] += record['duration_ms']
+        group['max_ms'] = max(group['max_ms'], record['duration_ms'])
+        group['routes'][record['route']] = group['routes'].get(record['route'], 0) + 1
+        if record.get('plan'):
+            group['plan'] = record['plan']
+        group['last_seen'] = max(group['last_seen'] or record['time'], record['time'])
+
+    top = sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)[:limit]
+    for group in top:
+        group['total_ms'] = round(group['total_ms'], 2)
+        group['avg_ms'] = round(group['total_ms'] / group['count'], 2)
+        group['max_ms'] = round(group['max_ms'], 2)
+    return top
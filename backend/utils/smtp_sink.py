@@ -0,0 +1,141 @@
+"""
+Local SMTP Sink
+A tiny fake mail server that accepts every email and keeps it in memory.
+Works like an aiosmtpd "sink" but only needs the standard library.
+
+Student Project - Development Helper
+Usage:
+    python -m utils.smtp_sink            # listens on localhost:1025
+    MAIL_SERVER=localhost MAIL_PORT=1025 celery -A celery_worker.celery worker
+"""
+
+import socketserver
+import threading
+import time
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough SMTP for smtplib to deliver messages"""
+
+    def _reply(self, line):
+        self.wfile.write((line + '\r\n').encode('ascii'))
+
+    def handle(self):
+        sink = self.server.sink
+        sink.connections += 1
+        self._reply('220 parking-sink ESMTP ready')
+
+        mail_from, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+
+            if verb == 'EHLO':
+                self._reply('250-parking-sink')
+                self._reply('250 8BITMIME')
+            elif verb == 'HELO':
+                self._reply('250 parking-sink')
+            elif verb == 'MAIL':
+                mail_from, recipients = command[10:].strip(), []
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command[8:].strip())
+                self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b'.\r\n', b'.\n'):
+                        break
+                    if data_line.startswith(b'..'):
+                        data_line = data_line[1:]
+                    data.append(data_line)
+                sink._store(mail_from, recipients, b''.join(data))
+                mail_from, recipients = None, []
+                self._reply('250 OK: queued')
+            elif verb == 'RSET':
+                mail_from, recipients = None, []
+                self._reply('250 OK')
+            elif verb == 'NOOP':
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                break
+            else:
+                self._reply('502 Command not implemented')
+
+
+class _ThreadedServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LocalSMTPSink:
+    """
+    In-memory SMTP server for local development and benchmarks
+
+    Example:
+        with LocalSMTPSink() as sink:
+            mailer = create_mailer({'MAIL_SERVER': sink.host, 'MAIL_PORT': sink.port})
+            mailer.send(build_message('a@b.com', 'Hi', 'Hello'))
+            assert len(sink.messages) == 1
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, keep_messages=True):
+        self.host = host
+        self.port = port  # 0 picks any free port
+        self.keep_messages = keep_messages
+        self.messages = []
+        self.message_count = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def _store(self, mail_from, recipients, data):
+        with self._lock:
+            self.message_count += 1
+            if self.keep_messages:
+                self.messages.append({
+                    'from': mail_from,
+                    'to': recipients,
+                    'data': data,
+                    'received_at': time.time()
+                })
+
+    def start(self):
+        """Starts the server in a background thread"""
+        self._server = _ThreadedServer((self.host, self.port), _SMTPHandler)
+        self._server.sink = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Shuts the server down"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == '__main__':
+    sink = LocalSMTPSink(port=1025, keep_messages=False).start()
+    print(f"📭 SMTP sink listening on {sink.host}:{sink.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"   Received {sink.message_count} messages on {sink.connections} connections")
+    except KeyboardInterrupt:
+        sink.stop()
@@ -0,0 +1,485 @@
+"""
+Task Dispatch Utilities
+Starts background tasks either on Celery or inside this process
+
+Student Project - Reliability
+Backends (TASK_BACKEND setting):
+- 'celery': always send to the Celery broker (Redis)
+- 'local':  run on a small thread pool inside this process
+- 'auto':   use Celery, but fall back to 'local' if the broker is unreachable
+
+Local jobs are saved in a small SQLite file before they run, so jobs that
+were queued (or running) when the server stopped are picked up again on
+the next start. Several processes may share the file: a job is claimed
+with one atomic UPDATE, and a running job is only put back in the queue
+once the process that claimed it (owner_pid) is gone.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+
+# Marks threads that belong to the local pool (tasks started from inside
+# a local task must stay local - there is no broker to send them to)
+_thread_state = threading.local()
+
+
+def is_local_worker():
+    """True if the current thread is running a task from the local queue"""
+    return getattr(_thread_state, 'local_worker', False)
+
+
+def _is_process_alive(pid):
+    """True if a process with this PID is running (on this machine)"""
+    if pid == os.getpid():
+        return False  # A job can't be ours yet - the PID was reused after a restart
+    try:
+        os.kill(pid, 0)  # Signal 0 = only check that the process exists
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, but belongs to another user
+    return True
+
+
+class LocalTaskQueue:
+    """
+    Persistent job queue stored in SQLite, run by a bounded pool of threads
+
+    Job status: 'pending' → 'running' → 'done' (or 'failed')
+    """
+
+    def __init__(self, path, workers=4, keep_finished=1000):
+        self.path = path
+        self.workers = max(1, workers)
+        self.keep_finished = keep_finished  # Finished jobs kept in the file for inspection
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._threads = []
+        self._stopping = False
+        self._pid = os.getpid()
+
+        # Recent timings in seconds, for the stats endpoint
+        self.wait_times = deque(maxlen=1000)  # Queued → started
+        self.run_times = deque(maxlen=1000)   # Started → finished
+        self.completed = 0
+        self.failed = 0
+
+        # timeout: other processes may be writing the same file, wait for them
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS task_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_name TEXT NOT NULL,
+                args TEXT NOT NULL,
+                kwargs TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                enqueued_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                owner_pid INTEGER
+            )
+        """)
+        columns = [row[1] for row in self._db.execute('PRAGMA table_info(task_queue)')]
+        if 'owner_pid' not in columns:
+            # Queue file from before owner_pid was recorded
+            try:
+                self._db.execute('ALTER TABLE task_queue ADD COLUMN owner_pid INTEGER')
+            except sqlite3.OperationalError:
+                pass  # Another process starting at the same time added it first
+        self._db.execute('CREATE INDEX IF NOT EXISTS ix_task_queue_status ON task_queue (status, id)')
+        self.requeue_orphaned_jobs()
+
+    def requeue_orphaned_jobs(self):
+        """
+        Puts jobs whose process died while running them back in the queue
+        Jobs of processes that are still alive (other server workers sharing
+        this file) are left alone - they are still being run.
+
+        Returns:
+            Number of jobs put back
+        """
+        owners = [row[0] for row in self._db.execute(
+            "SELECT DISTINCT owner_pid FROM task_queue WHERE status = 'running'"
+        )]
+        dead = [pid for pid in owners if pid is not None and not _is_process_alive(pid)]
+        placeholders = ', '.join('?' * len(dead)) or 'NULL'
+        cursor = self._db.execute(
+            "UPDATE task_queue SET status = 'pending', owner_pid = NULL "
+            f"WHERE status = 'running' AND (owner_pid IS NULL OR owner_pid IN ({placeholders}))",
+            dead
+        )
+        return cursor.rowcount
+
+    def enqueue(self, task_name, args=(), kwargs=None):
+        """
+        Saves a job and wakes up a worker thread
+
+        Returns:
+            ID of the queued job
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                'INSERT INTO task_queue (task_name, args, kwargs, enqueued_at) VALUES (?, ?, ?, ?)',
+                (task_name, json.dumps(list(args)), json.dumps(kwargs or {}), time.time())
+            )
+            self._wakeup.notify()
+        self.start()
+        return cursor.lastrowid
+
+    def _claim_next(self):
+        """
+        Takes the oldest pending job (caller holds the lock)
+        One UPDATE ... RETURNING statement, so two processes sharing the
+        file can never claim the same job (SQLite runs it under its write lock)
+        """
+        return self._db.execute(
+            "UPDATE task_queue SET status = 'running', owner_pid = ?, started_at = ?, attempts = attempts + 1 "
+            "WHERE id = (SELECT id FROM task_queue WHERE status = 'pending' ORDER BY id LIMIT 1) "
+            "AND status = 'pending' "
+            "RETURNING id, task_name, args, kwargs, enqueued_at",
+            (os.getpid(), time.time())
+        ).fetchone()
+
+    def _finish(self, job_id, error=None):
+        """Records the result of a job and trims old finished jobs"""
+        with self._lock:
+            self._db.execute(
+                'UPDATE task_queue SET status = ?, error = ?, finished_at = ? WHERE id = ?',
+                ('failed' if error else 'done', error, time.time(), job_id)
+            )
+            if job_id % 100 == 0:
+                self._db.execute(
+                    "DELETE FROM task_queue WHERE status IN ('done', 'failed') AND id <= ?",
+                    (job_id - self.keep_finished,)
+                )
+
+    def _worker_loop(self):
+        """Runs jobs until the queue is stopped"""
+        _thread_state.local_worker = True
+        while True:
+            with self._lock:
+                job = self._claim_next()
+                while job is None and not self._stopping:
+                    self._wakeup.wait(timeout=5)
+                    job = self._claim_next()
+                if job is None:
+                    return
+
+            job_id, task_name, args, kwargs, enqueued_at = job
+            started = time.time()
+            self.wait_times.append(started - enqueued_at)
+            try:
+                run_task_by_name(task_name, json.loads(args), json.loads(kwargs))
+                self.completed += 1
+                self._finish(job_id)
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠ Local task {task_name} (job {job_id}) failed: {e}")
+                self._finish(job_id, error=str(e))
+            self.run_times.append(time.time() - started)
+
+    def start(self):
+        """Starts the worker threads (only once per process)"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Threads don't survive a fork - the child starts its own
+                self._threads, self._pid = [], os.getpid()
+            if self._threads:
+                return
+            for number in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker_loop, name=f'local-task-{number}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=10):
+        """Lets running jobs finish, then stops the threads"""
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stopping = False
+
+    def run_pending(self):
+        """
+        Runs every pending job in the calling thread, then returns
+        Handy for tests and one-off scripts
+
+        Returns:
+            Number of jobs run
+        """
+        count = 0
+        _thread_state.local_worker = True
+        try:
+            while True:
+                with self._lock:
+                    job = self._claim_next()
+                if job is None:
+                    return count
+                job_id, task_name, args, kwargs, enqueued_at = job
+                started = time.time()
+                self.wait_times.append(started - enqueued_at)
+                try:
+                    run_task_by_name(task_name, json.loads(args), json.loads(kwargs))
+                    self.completed += 1
+                    self._finish(job_id)
+                except Exception as e:
+                    self.failed += 1
+                    self._finish(job_id, error=str(e))
+                self.run_times.append(time.time() - started)
+                count += 1
+        finally:
+            _thread_state.local_worker = False
+
+    def get_stats(self):
+        """
+        Queue depth and timing numbers for monitoring
+
+        Returns:
+            Dictionary of stats
+        """
+        with self._lock:
+            counts = dict(self._db.execute(
+                'SELECT status, COUNT(*) FROM task_queue GROUP BY status'
+            ).fetchall())
+
+        def summary(samples):
+            samples = sorted(samples)
+            if not samples:
+                return {'count': 0, 'avg_ms': 0, 'p95_ms': 0}
+            return {
+                'count': len(samples),
+                'avg_ms': round(sum(samples) / len(samples) * 1000, 2),
+                'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2)
+            }
+
+        return {
+            'backend': 'local',
+            'workers': self.workers,
+            'queue_depth': counts.get('pending', 0),
+            'running': counts.get('running', 0),
+            'completed': self.completed,
+            'failed': self.failed,
+            'wait_time': summary(self.wait_times),
+            'run_time': summary(self.run_times)
+        }
+
+
+def run_task_by_name(task_name, args, kwargs):
+    """Looks up a registered Celery task and runs it in this thread"""
+    from celery_worker import celery
+    return celery.tasks[task_name](*args, **kwargs)
+
+
+# ============================================================================
+# DISPATCHING
+# ============================================================================
+
+_local_queue = None
+_local_queue_lock = threading.Lock()
+_forked_queues = []  # Queues inherited through fork() (see reset_local_queue)
+
+
+def get_local_queue():
+    """
+    Returns this process's local task queue, creating it on first use
+
+    Returns:
+        LocalTaskQueue instance
+    """
+    global _local_queue
+    with _local_queue_lock:
+        if _local_queue is None:
+            _local_queue = LocalTaskQueue(
+                Config.LOCAL_TASK_QUEUE_PATH,
+                workers=Config.LOCAL_TASK_WORKERS
+            )
+    return _local_queue
+
+
+def reset_local_queue():
+    """
+    Forgets the local queue inherited from the parent process
+    Call this in a process right after it has been forked: the parent's
+    SQLite connection and lock must not be used by the child, which opens
+    its own queue the next time one is needed.
+    """
+    global _local_queue, _local_queue_lock
+    if _local_queue is not None:
+        # Keep a reference so the parent's connection is never closed from here
+        _forked_queues.append(_local_queue)
+    _local_queue, _local_queue_lock = None, threading.Lock()
+
+
+def _celery_dispatch_stats():
+    """Approximate Celery queue depth (number of messages waiting in Redis)"""
+    from utils.cache import get_redis_client
+
+    client = get_redis_client()
+    depth = None
+    if client is not None:
+        try:
+            depth = client.llen('celery')  # Default Celery queue is a Redis list
+        except Exception:
+            depth = None
+    return {'backend': 'celery', 'queue_depth': depth}
+
+
+_broker_status = {'available': None, 'checked_at': 0.0}
+BROKER_CHECK_INTERVAL = 10  # Seconds to remember whether the broker was reachable
+
+
+def is_broker_available(app):
+    """
+    Quick check that the Celery broker accepts connections
+
+    Celery itself retries for a long time when Redis is down (the request
+    would hang for many seconds), so in 'auto' mode we check first and
+    remember the answer for a few seconds.
+    """
+    now = time.monotonic()
+    if _broker_status['available'] is not None and now - _broker_status['checked_at'] < BROKER_CHECK_INTERVAL:
+        return _broker_status['available']
+
+    try:
+        with app.connection_for_write() as connection:
+            connection.ensure_connection(max_retries=0, timeout=1)
+        available = True
+    except Exception:
+        available = False
+
+    _broker_status.update(available=available, checked_at=now)
+    return available
+
+
+def dispatch(task, *args, **kwargs):
+    """
+    Starts a background task using the configured backend
+
+    Args:
+        task: A Celery task function from tasks.py
+        *args, **kwargs: Arguments for the task
+
+    Returns:
+        Dictionary with the backend used and the task/job ID
+    """
+    backend = Config.TASK_BACKEND
+
+    use_celery = backend == 'celery' or (
+        backend == 'auto' and not is_local_worker() and is_broker_available(task.app)
+    )
+
+    if use_celery:
+        try:
+            # retry=False: fail fast instead of waiting for the broker to come back
+            result = task.apply_async(args=args, kwargs=kwargs, retry=backend == 'celery')
+            return {'backend': 'celery', 'task_id': result.id}
+        except Exception as e:
+            # kombu raises OperationalError when Redis is down
+            if backend == 'celery':
+                raise
+            _broker_status['available'] = False
+            print(f"⚠ Celery broker unavailable ({e}) - running {task.name} locally")
+    elif backend == 'auto' and not is_local_worker():
+        print(f"⚠ Celery broker unavailable - running {task.name} locally")
+
+    job_id = get_local_queue().enqueue(task.name, args, kwargs)
+    return {'backend': 'local', 'task_id': f'local-{job_id}'}
+
+
+def run_chord(header, callback):
+    """
+    Runs a group of task signatures in parallel, then the callback with their results
+
+    On Celery this is a normal chord. Inside a local worker thread (no broker)
+    the group runs on a small thread pool and the callback runs right after.
+
+    Args:
+        header: List of task signatures, e.g. [task.s(1), task.s(2)]
+        callback: Signature called with the list of results as its first argument
+    """
+    from celery import chord
+
+    header = list(header)
+    if not is_local_worker():
+        return chord(header)(callback)
+
+    def run_signature(signature):
+        _thread_state.local_worker = True
+        return signature.apply().get()
+
+    with ThreadPoolExecutor(max_workers=Config.LOCAL_TASK_WORKERS) as pool:
+        results = list(pool.map(run_signature, header))
+    return callback.apply(args=(results,))
+
+
+_resume_lock = None  # Open lock file of the process that resumes left-over jobs
+
+
+def _take_resume_lock():
+    """
+    Only one process sharing the queue file resumes left-over jobs (e.g. one
+    of the serve.py workers). It keeps this lock until it exits, then the
+    next worker that starts takes over.
+
+    Returns:
+        True if this process holds the lock
+    """
+    global _resume_lock
+    if _resume_lock is not None:
+        return True
+    try:
+        import fcntl
+    except ImportError:
+        return True  # Windows: only the single-process debug server runs there
+    lock_file = open(Config.LOCAL_TASK_QUEUE_PATH + '.resume.lock', 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False  # Another process is the resumer
+    _resume_lock = lock_file
+    return True
+
+
+def resume_local_tasks():
+    """
+    Starts the local worker threads if jobs were left in the queue file
+    by a previous run (called when the web app or a server worker starts)
+    """
+    if Config.TASK_BACKEND == 'celery' or not os.path.exists(Config.LOCAL_TASK_QUEUE_PATH):
+        return
+    if not _take_resume_lock():
+        return
+    queue = get_local_queue()
+    if queue.get_stats()['queue_depth'] > 0:
+        print("↻ Resuming background jobs left over from the last run")
+        queue.start()
+
+
+def get_dispatch_stats():
+    """
+    Stats for the configured task backend (queue depth, task latency)
+
+    Returns:
+        Dictionary of stats
+    """
+    stats = {'configured_backend': Config.TASK_BACKEND}
+    if Config.TASK_BACKEND != 'local':
+        stats['celery'] = _celery_dispatch_stats()
+    if Config.TASK_BACKEND != 'celery' and (_local_queue is not None or Config.TASK_BACKEND == 'local'):
+        stats['local'] = get_local_queue().get_stats()
+    return stats